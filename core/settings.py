@@ -25,9 +25,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = "django-insecure-b&&6%vy@-m**58#8$r-%$kllw77gg7z=ly8ox@vay8pvwwc*ou"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get("DJANGO_DEBUG", "1") == "1"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",") if host]
 
 
 # Application definition
@@ -45,14 +45,27 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Answers static requests before sessions/auth run; inactive under DEBUG.
+    "school_management.middleware.PrecompressedStaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "school_management.middleware.RequestInstrumentationMiddleware",
+    # Needs the session; inactive without DATABASE_REPLICAS.
+    "school_management.middleware.ReplicaRoutingMiddleware",
 ]
 
+# Per-request query/timing report (Server-Timing header + log line).
+# Off by default; SAMPLE_RATE keeps the overhead negligible in production.
+REQUEST_INSTRUMENTATION = {
+    "ENABLED": os.environ.get("REQUEST_INSTRUMENTATION") == "1",
+    "SAMPLE_RATE": float(os.environ.get("REQUEST_INSTRUMENTATION_SAMPLE_RATE", "1.0")),
+    "REPEATED_QUERY_THRESHOLD": 3,
+}
+
 ROOT_URLCONF = "core.urls"
 
 TEMPLATES = [
@@ -76,6 +89,17 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "core.wsgi.application"
 
+# Serve the public pages and notifications with their async views; on by
+# default under ASGI (see core/asgi.py), where sync views cost a thread hop.
+ASYNC_VIEWS = os.environ.get("DJANGO_ASYNC_VIEWS", "0") == "1"
+
+# Live notifications over server-sent events, served with the async views.
+# Limits are per worker process; see utils/notification_broker.py for the rest.
+NOTIFICATION_STREAM = {
+    "HEARTBEAT": 15,
+    "MAX_CONNECTIONS": int(os.environ.get("NOTIFICATION_STREAM_MAX_CONNECTIONS", "200")),
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -87,6 +111,64 @@ DATABASES = {
     }
 }
 
+# DATABASE_PROFILE=production tunes SQLite for concurrent traffic: WAL lets
+# readers proceed while a writer commits, IMMEDIATE transactions take the
+# write lock up front (no deadlocking lock upgrades), writers wait up to
+# `timeout` seconds for the lock, and connections are kept between requests.
+SQLITE_PRODUCTION_OPTIONS = {
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA foreign_keys=ON;"
+    ),
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 20,
+}
+
+DATABASE_PROFILE = os.environ.get("DATABASE_PROFILE", "development")
+if DATABASE_PROFILE == "production":
+    DATABASES["default"].update(
+        OPTIONS=SQLITE_PRODUCTION_OPTIONS,
+        CONN_MAX_AGE=int(os.environ.get("DATABASE_CONN_MAX_AGE", "600")),
+        CONN_HEALTH_CHECKS=True,
+    )
+
+# DATABASE_REPLICAS=path[,path...] adds read-only copies of the primary as
+# `replica1`, `replica2`, ... Views decorated with `read_from_replica` read
+# from them; locally `manage.py sync_replica` keeps the files current.
+for index, path in enumerate(filter(None, os.environ.get("DATABASE_REPLICAS", "").split(",")), start=1):
+    DATABASES[f"replica{index}"] = {**DATABASES["default"], "NAME": path, "TEST": {"MIRROR": "default"}}
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["school_management.routers.ReplicaRouter"]
+
+# Seconds a replica may trail the primary: a session that wrote reads from
+# the primary this long, and catalog data read from a replica this soon
+# after a change is not cached.
+REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", "10"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Tag invalidation only reaches other worker processes through a shared
+# backend (Redis, Memcached, database); the local-memory default suits a
+# single process.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "school-management"),
+    }
+}
+
+# Seconds a rendered public catalog page may be served from the cache.
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", "300"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -126,9 +208,24 @@ USE_TZ = True
 
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+# Uploads, e.g. CSV files waiting for process_user_imports.
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 STATICFILES_DIRS = [
     BASE_DIR / "static",  # Reference to the global static folder
 ]
+
+# Outside DEBUG, collectstatic writes content-hashed names plus .gz/.br
+# variants, served by PrecompressedStaticFilesMiddleware.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "school_management.storage.CompressedManifestStaticFilesStorage"
+        )
+    },
+}
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -138,3 +235,14 @@ LOGIN_REDIRECT_URL = "dashboard"
 LOGOUT_REDIRECT_URL = "home"
 
 LOGIN_URL = "login"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "school_management": {"handlers": ["console"], "level": "INFO"},
+    },
+}
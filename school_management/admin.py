@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Filia, Course, Group, Student, Teacher, Manager, Experience, Goal, StudentGroupMembership
+from .models import (
+    CustomUser, Filia, Course, Group, Student, Teacher, Manager, Experience, Goal, StudentGroupMembership,
+)
 
 
 class BaseUserAdmin(UserAdmin):
@@ -28,6 +30,12 @@ class BaseUserAdmin(UserAdmin):
         js = ("js/scripts.js",)
 
 
+@admin.register(CustomUser)
+class CustomUserAdmin(BaseUserAdmin):
+    list_display = BaseUserAdmin.list_display + ("user_type", "manager_role")
+    list_filter = ("user_type", "manager_role", "is_active")
+
+
 class StudentGroupMembershipInline(admin.TabularInline):
     model = StudentGroupMembership
     extra = 1
@@ -101,6 +109,6 @@ class CourseAdmin(admin.ModelAdmin):
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ("name", "course", "filia")
+    list_display = ("name", "course", "filia", "enrolled_count", "group_size")
     list_filter = ("course", "filia")
     search_fields = ("name",)
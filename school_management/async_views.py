@@ -0,0 +1,215 @@
+"""
+Async implementations of the public catalog pages and the notifications
+page, served instead of their sync counterparts in `views` when
+`settings.ASYNC_VIEWS` is on (the ASGI entry point turns it on).
+
+They load everything the template shows with the async ORM before
+rendering: a lazy queryset evaluated by a template would be a sync query
+inside the event loop. Code with no async API (filter forms, transactions)
+runs through `sync_to_async`.
+"""
+from typing import List, Optional
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.urls import URLPattern, path
+from django.views.decorators.http import require_http_methods
+
+from .models import Course, Notification, Student
+from .forms import EnrollmentForm
+from .views import CourseDetailView, FiliaDetailView, FiliaListView
+from school_management.utils.filters import CourseFilter
+from school_management.utils.role_access_checking import user_is_student_or_teacher
+from .utils.caching import CATALOG_TAG, cache_page_by_tags, course_tag, filia_tag
+from .utils.conditional_get import acourse_page_state, afilia_page_state, conditional_page
+from .utils.decorators.authentication import login_required_401
+from .utils.decorators.db_routing import read_from_replica
+from .utils.decorators.permissions import user_passes_test_403
+from .utils.enums import SeatReservationOutcome
+from .utils.keyset_pagination import apaginate_by_keyset
+from .utils.notification_broker import broker, stream_settings
+from .utils.notification_stream import notification_events
+from .utils.seat_reservation import reserve_course_seat
+from .utils.sorting import apply_sorting
+
+
+@cache_page_by_tags(lambda request: [CATALOG_TAG])
+@read_from_replica
+async def home(request: HttpRequest) -> HttpResponse:
+    courses = Course.objects.prefetch_related("experience").order_by("name")[:3]
+
+    context = {"courses": [course async for course in courses]}
+
+    return render(request, "unauthorized/home.html", context)
+
+
+@cache_page_by_tags(lambda request: [CATALOG_TAG])
+@read_from_replica
+async def filia_list(request: HttpRequest) -> HttpResponse:
+    filias = [filia async for filia in FiliaListView.queryset.all()]
+    return render(request, "unauthorized/filias.html", {"filias": filias, "object_list": filias})
+
+
+@conditional_page(afilia_page_state)
+@cache_page_by_tags(lambda request, pk: [filia_tag(pk)])
+@read_from_replica
+async def filia_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    filia = await aget_object_or_404(FiliaDetailView.queryset, pk=pk)
+    return render(request, "unauthorized/filia_details.html", {"filia": filia, "object": filia})
+
+
+@cache_page_by_tags(lambda request: [CATALOG_TAG])
+@read_from_replica
+async def course_list(request: HttpRequest) -> HttpResponse:
+    queryset = Course.objects.prefetch_related("experience", "groups__filia").distinct()
+    queryset = apply_sorting(queryset, request.GET.get(key="sort", default="name"))
+
+    def filter_courses():
+        # Validates the form like FilterView, in this sync thread.
+        filterset = CourseFilter(request.GET or None, queryset=queryset, request=request)
+        object_list = filterset.qs if not filterset.is_bound or filterset.is_valid() else queryset.none()
+        # Building the form runs the facet count query; do it here rather
+        # than from the template, which renders on the event loop.
+        _ = filterset.form
+        return filterset, object_list
+
+    filterset, object_list = await sync_to_async(filter_courses)()
+    courses = [course async for course in object_list]
+    return render(
+        request,
+        "unauthorized/courses.html",
+        {"filter": filterset, "courses": courses, "object_list": courses},
+    )
+
+
+async def _course_page(request: HttpRequest, pk: int) -> HttpResponse:
+    course = await aget_object_or_404(CourseDetailView.queryset.prefetch_related("goals"), pk=pk)
+    form = EnrollmentForm(course=course)
+    # The select would query its choices while the template renders.
+    field = form.fields["filia"]
+    field.widget.choices = [("", field.empty_label)] + [
+        (filia.pk, str(filia)) async for filia in field.queryset
+    ]
+    return render(request, "unauthorized/course_details.html", {"course": course, "object": course, "form": form})
+
+
+async def _enroll(request: HttpRequest, pk: int) -> HttpResponse:
+    course = await aget_object_or_404(Course, pk=pk)
+    student = await aget_object_or_404(Student, pk=request.user.id)
+    form = EnrollmentForm(request.POST, course=course)
+
+    if await sync_to_async(form.is_valid)():
+        filia = form.cleaned_data["filia"]
+
+        outcome, group = await sync_to_async(reserve_course_seat)(student.id, course, filia)
+
+        if outcome == SeatReservationOutcome.RESERVED:
+            messages.success(request, f"You have been added to the group: {group.name}.")
+            return redirect("student_group_details", pk=group.pk)
+        elif outcome == SeatReservationOutcome.ALREADY_ENROLLED:
+            messages.error(request, "You already have an active enrollment in this course and filia.")
+        else:
+            messages.error(request, "No available slots on groups. Try again later")
+
+        return redirect("course_details", pk=course.pk)
+    else:
+        messages.error(request, "Something went wrong. Please try again.")
+        return await _course_page(request, pk)
+
+
+@require_http_methods(["GET", "HEAD", "POST"])
+@conditional_page(acourse_page_state)
+@cache_page_by_tags(lambda request, pk: [course_tag(pk)])
+@read_from_replica
+async def course_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    if request.method == "POST":
+        return await _enroll(request, pk)
+    return await _course_page(request, pk)
+
+
+@login_required_401
+@user_passes_test_403(user_is_student_or_teacher)
+async def notifications_view(request: HttpRequest) -> HttpResponse:
+    if request.method == "POST":
+        # Both run in a transaction, which the async ORM cannot open.
+        if "mark_all_read" in request.POST:
+            await sync_to_async(Notification.mark_all_read)(request.user)
+        elif "mark_read" in request.POST:
+            await sync_to_async(Notification.mark_read)(request.user, request.POST.get("notification_id"))
+        return redirect("notifications")
+
+    page_obj = await apaginate_by_keyset(
+        queryset=Notification.objects.filter(user=request.user),
+        ordering=["-datetime", "-id"],
+        cursor=request.GET.get("cursor"),
+        per_page=20,
+    )
+    return render(request, 'students/notifications.html', {'page_obj': page_obj})
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """A server-sent events stream holding one of the worker's connection slots."""
+
+    def __init__(self, events, *args, **kwargs):
+        super().__init__(events, *args, content_type="text/event-stream", **kwargs)
+        self["Cache-Control"] = "no-cache"
+        # Proxies must pass events through as they are written.
+        self["X-Accel-Buffering"] = "no"
+        self._holds_slot = True
+
+    def close(self):
+        if self._holds_slot:
+            self._holds_slot = False
+            broker.release()
+        super().close()
+
+
+def _last_event_id(request: HttpRequest) -> Optional[int]:
+    # EventSource resends the header on reconnect; the query parameter lets a
+    # fresh page resume from what it rendered.
+    value = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+@login_required_401
+@user_passes_test_403(user_is_student_or_teacher)
+async def notification_stream(request: HttpRequest) -> HttpResponse:
+    if not broker.acquire():
+        response = HttpResponse("Too many open notification streams.", status=503)
+        response["Retry-After"] = str(stream_settings()["RETRY"] // 1000)
+        return response
+    return EventStreamResponse(notification_events(request.user.pk, _last_event_id(request)))
+
+
+ASYNC_VIEWS = {
+    "home": home,
+    "filias": filia_list,
+    "filia_details": filia_detail,
+    "courses": course_list,
+    "course_details": course_detail,
+    "notifications": notifications_view,
+}
+
+
+# Long-lived responses a sync worker would hold a thread for; ASGI only.
+ASYNC_ONLY_URLPATTERNS = [
+    path("notifications/stream/", notification_stream, name="notification_stream"),
+]
+
+
+def with_async_views(urlpatterns: List[URLPattern]) -> List[URLPattern]:
+    """
+    `urlpatterns` with the named routes pointing at their async
+    implementations, plus the routes only served asynchronously.
+    """
+    return [
+        URLPattern(pattern.pattern, ASYNC_VIEWS[pattern.name], pattern.default_args, pattern.name)
+        if getattr(pattern, "name", None) in ASYNC_VIEWS
+        else pattern
+        for pattern in urlpatterns
+    ] + ASYNC_ONLY_URLPATTERNS
@@ -100,4 +100,11 @@ class EnrollmentForm(forms.Form):
     def __init__(self, *args, course=None, **kwargs):
         super().__init__(*args, **kwargs)
         if course:
-            self.fields["filia"].queryset = Filia.objects.filter(groups__course=course).distinct()
\ No newline at end of file
+            self.fields["filia"].queryset = Filia.objects.filter(groups__course=course).distinct()
+
+
+class UserImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label="CSV file",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,text/csv"}),
+    )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from school_management.models import CustomUser, Manager
+from school_management.utils.enums import UserType
+
+
+class Command(BaseCommand):
+    help = "Fill CustomUser.user_type and manager_role for rows created before the columns existed."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            students = CustomUser.objects.filter(student__isnull=False).update(
+                user_type=UserType.STUDENT.value[0], manager_role=""
+            )
+            teachers = CustomUser.objects.filter(teacher__isnull=False).update(
+                user_type=UserType.TEACHER.value[0], manager_role=""
+            )
+            managers = CustomUser.objects.filter(manager__isnull=False).update(
+                user_type=UserType.MANAGER.value[0],
+                manager_role=Coalesce(
+                    Subquery(Manager.objects.filter(pk=OuterRef("pk")).values("role")),
+                    Value(""),
+                ),
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backfilled {students} student(s), {teachers} teacher(s) and {managers} manager(s)."
+            )
+        )
@@ -0,0 +1,186 @@
+import asyncio
+import io
+import itertools
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Tuple
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+from school_management.async_views import with_async_views
+from school_management.models import Course, Filia
+from school_management.urls import sync_urlpatterns
+from school_management.utils.benchmarking import benchmark_database, summarize_latencies
+
+HOST = "testserver"
+
+
+class SyncUrlconf:
+    urlpatterns = sync_urlpatterns
+
+
+class AsyncUrlconf:
+    urlpatterns = with_async_views(sync_urlpatterns)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the public pages served by the async views under ASGI with the sync "
+        "views under a threaded WSGI worker, at high concurrency and with slow clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=64, help="Clients in flight at once.")
+        parser.add_argument(
+            "--wsgi-threads", type=int, default=8,
+            help="Threads of the WSGI worker, like a gthread worker's --threads.",
+        )
+        parser.add_argument(
+            "--client-delay", type=float, default=50.0,
+            help="Milliseconds a slow client takes to read each response; the server "
+                 "holds the request (a thread under WSGI, a coroutine under ASGI) meanwhile.",
+        )
+        parser.add_argument("--scale", type=float, default=0.01, help="Dataset scale passed to generate_dataset.")
+        parser.add_argument(
+            "--cached", action="store_true",
+            help="Let the tag cache answer repeated pages instead of rendering every request.",
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database(on_disk=True), override_settings(ALLOWED_HOSTS=[HOST]):
+            call_command("generate_dataset", scale=options["scale"], verbosity=0)
+            urls = self.build_urls(options["requests"], options["cached"])
+            delay = options["client_delay"] / 1000
+
+            with override_settings(ROOT_URLCONF=SyncUrlconf):
+                wsgi = self.run_wsgi(urls, options["concurrency"], options["wsgi_threads"], delay)
+            with override_settings(ROOT_URLCONF=AsyncUrlconf):
+                asgi = asyncio.run(self.run_asgi(urls, options["concurrency"], delay))
+
+        self.stdout.write(
+            f"{options['requests']} requests, {options['concurrency']} concurrent clients, "
+            f"{options['client_delay']:.0f} ms client delay"
+        )
+        self.stdout.write(f"{'server':<22} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+        for label, (elapsed, latencies, errors) in [
+            (f"WSGI sync ({options['wsgi_threads']} threads)", wsgi),
+            ("ASGI async", asgi),
+        ]:
+            summary = summarize_latencies(latencies)
+            self.stdout.write(
+                f"{label:<22} {len(urls) / elapsed:>8.1f} {summary['p50']:>7.1f}ms "
+                f"{summary['p95']:>7.1f}ms {summary['p99']:>7.1f}ms {errors:>7}"
+            )
+
+    @staticmethod
+    def build_urls(count: int, cached: bool) -> List[Tuple[str, str]]:
+        with override_settings(ROOT_URLCONF=SyncUrlconf):
+            pages = [reverse("home"), reverse("filias"), reverse("courses")]
+            pages += [reverse("course_details", args=[pk]) for pk in Course.objects.values_list("pk", flat=True)[:5]]
+            pages += [reverse("filia_details", args=[pk]) for pk in Filia.objects.values_list("pk", flat=True)[:3]]
+        # A unique query string makes every request a cache miss, so views do the work.
+        return [
+            (path, "" if cached else f"request={index}")
+            for index, path in zip(range(count), itertools.cycle(pages))
+        ]
+
+    @staticmethod
+    def run_wsgi(urls, concurrency: int, threads: int, delay: float) -> Tuple[float, List[float], int]:
+        application = WSGIHandler()
+        latencies: List[float] = []
+        errors = 0
+
+        def request(path: str, query: str, queued_at: float) -> None:
+            nonlocal errors
+            status: Dict[str, str] = {}
+
+            def start_response(line, headers, exc_info=None):
+                status["line"] = line
+
+            environ = {
+                "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query,
+                "SERVER_NAME": HOST, "SERVER_PORT": "80", "HTTP_HOST": HOST,
+                "SERVER_PROTOCOL": "HTTP/1.1", "wsgi.url_scheme": "http",
+                "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+            }
+            response = application(environ, start_response)
+            try:
+                b"".join(response)
+            finally:
+                response.close()
+            # The worker thread stays busy until the slow client has read everything.
+            time.sleep(delay)
+            if not status["line"].startswith("200"):
+                errors += 1
+            latencies.append((time.perf_counter() - queued_at) * 1000)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            in_flight = set()
+            for path, query in urls:
+                # Keep at most `concurrency` clients waiting on the server.
+                if len(in_flight) >= concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(pool.submit(request, path, query, time.perf_counter()))
+            for future in in_flight:
+                future.result()
+        return time.perf_counter() - started, latencies, errors
+
+    @staticmethod
+    async def run_asgi(urls, concurrency: int, delay: float) -> Tuple[float, List[float], int]:
+        application = ASGIHandler()
+        latencies: List[float] = []
+        errors = 0
+        pending = iter(urls)
+
+        async def request(path: str, query: str) -> None:
+            nonlocal errors
+            finished = asyncio.Event()
+            received = False
+            status = {}
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await finished.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status["code"] = message["status"]
+                elif not message.get("more_body"):
+                    # Only this coroutine waits for the slow client.
+                    await asyncio.sleep(delay)
+                    finished.set()
+
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+                "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+                "query_string": query.encode(), "root_path": "",
+                "headers": [(b"host", HOST.encode())],
+                "server": (HOST, 80), "client": ("127.0.0.1", 50000),
+            }
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            if status.get("code") != 200:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        async def client() -> None:
+            for path, query in pending:
+                await request(path, query)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies, errors
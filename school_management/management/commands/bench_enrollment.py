@@ -0,0 +1,76 @@
+from typing import List
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from school_management.models import (
+    Course,
+    Filia,
+    Group,
+    Notification,
+    Student,
+    StudentGroupMembership,
+)
+from school_management.utils.benchmarking import benchmark_database, time_call
+from school_management.utils.enums import NotificationType, PaymentStatus
+
+
+@transaction.atomic
+def legacy_add_students(group: Group, student_ids: List[int]) -> None:
+    """The per-student loop `Group.add_students` used before bulk enrollment."""
+    for student in Student.objects.filter(pk__in=student_ids):
+        membership, created = StudentGroupMembership.objects.get_or_create(
+            student=student, group=group, defaults={"status": PaymentStatus.UNPAID.name}
+        )
+        if created:
+            Notification().create_notification(
+                user=student,
+                course=group.course,
+                operation_type=NotificationType.ADDED.name,
+                group=group,
+            )
+
+
+class Command(BaseCommand):
+    help = "Compare the legacy per-student enrollment loop with the bulk enrollment path."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[10, 100, 1000],
+            help="Number of students enrolled per run.",
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(options["sizes"])
+
+        with benchmark_database():
+            student_ids = self.create_students(sizes[-1])
+            course = Course.objects.create(name="Benchmark course")
+            filia = Filia.objects.create(name="Benchmark", city="Kyiv", address="-")
+
+            self.stdout.write(f"{'students':>10} {'legacy, ms':>12} {'bulk, ms':>12} {'speedup':>9}")
+            for size in sizes:
+                ids = student_ids[:size]
+                legacy_group = Group.objects.create(name=f"legacy-{size}", course=course, filia=filia)
+                bulk_group = Group.objects.create(name=f"bulk-{size}", course=course, filia=filia)
+
+                legacy_ms = time_call(legacy_add_students, legacy_group, ids)
+                bulk_ms = time_call(bulk_group.add_students, ids)
+
+                self.stdout.write(
+                    f"{size:>10} {legacy_ms:>12.1f} {bulk_ms:>12.1f} {legacy_ms / bulk_ms:>8.1f}x"
+                )
+
+    @staticmethod
+    def create_students(count: int) -> List[int]:
+        with transaction.atomic():
+            return [
+                Student.objects.create(
+                    email=f"bench-student-{index}@example.com",
+                    first_name="Bench",
+                    last_name=f"Student {index}",
+                    phone_number="(000) 000-00-00",
+                    password="!",
+                ).pk
+                for index in range(count)
+            ]
@@ -0,0 +1,200 @@
+import json
+import random
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from school_management.models import Course, Filia, Group, Student
+from school_management.utils.benchmarking import benchmark_database, summarize_latencies
+from school_management.utils.enums import GroupStatus
+
+# A step is (method, url, form data); scenarios yield as many steps as they need.
+Step = Tuple[str, str, Optional[Dict[str, Any]]]
+MANAGER_EMAILS = {
+    "education_manager": "education.manager@example.com",
+    "program_manager": "program.manager@example.com",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay role-based request mixes against the real URLconf and report throughput, "
+        "latency percentiles and queries per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+        parser.add_argument("--scale", type=float, default=0.01, help="Dataset scale passed to generate_dataset.")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--baseline", help="Compare against the JSON results of an earlier run.")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.2,
+            help="Allowed relative slowdown before a latency or throughput change counts as a regression.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.password = options["password"]
+
+        setup_test_environment()
+        try:
+            with benchmark_database():
+                call_command(
+                    "generate_dataset", scale=options["scale"], seed=options["seed"],
+                    password=self.password, verbosity=0,
+                )
+                results = self.run_scenarios(options["requests"])
+        finally:
+            teardown_test_environment()
+
+        report = {
+            "created_at": datetime.now(dt_timezone.utc).isoformat(),
+            "requests_per_scenario": options["requests"],
+            "scale": options["scale"],
+            "seed": options["seed"],
+            "scenarios": results,
+        }
+        self.print_report(results)
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+            regressions = self.compare(results, baseline["scenarios"], options["tolerance"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def run_scenarios(self, requests_per_scenario: int) -> Dict[str, Dict[str, float]]:
+        self.enrollable = list(
+            Group.objects.filter(status=GroupStatus.ENROLLMENT_STARTED.value[0])
+            .values_list("course_id", "filia_id")
+            .distinct()
+        )
+        self.course_ids = list(Course.objects.values_list("pk", flat=True))
+        self.filia_ids = list(Filia.objects.values_list("pk", flat=True))
+        self.group_ids = list(Group.objects.values_list("pk", flat=True))
+        self.student_ids = list(Student.objects.values_list("pk", flat=True))
+        student_emails = Student.objects.filter(pk__in=self.rng.sample(self.student_ids, 5)).values_list(
+            "email", flat=True
+        )
+
+        scenarios: Dict[str, Tuple[List[Client], Callable[[], Iterator[Step]]]] = {
+            "catalog_browsing": ([Client()], self.catalog_browsing),
+            "course_enrollment": ([self.login(email) for email in student_emails], self.course_enrollment),
+            "manager_group_details": (
+                [self.login(MANAGER_EMAILS["education_manager"])], self.manager_group_details
+            ),
+            "add_remove_students": (
+                [self.login(MANAGER_EMAILS["education_manager"])], self.add_remove_students
+            ),
+        }
+        return {
+            name: self.replay(clients, steps, requests_per_scenario)
+            for name, (clients, steps) in scenarios.items()
+        }
+
+    def login(self, email: str) -> Client:
+        client = Client()
+        response = client.post(reverse("login"), {"username": email, "password": self.password})
+        if response.status_code != 302:
+            raise CommandError(f"Could not log in as {email}.")
+        return client
+
+    def replay(self, clients: List[Client], steps: Callable[[], Iterator[Step]], total: int) -> Dict[str, float]:
+        latencies, query_counts, errors = [], [], 0
+        started = time.perf_counter()
+        while len(latencies) < total:
+            client = self.rng.choice(clients)
+            for method, url, data in steps():
+                with CaptureQueriesContext(connection) as queries:
+                    request_started = time.perf_counter()
+                    response = getattr(client, method)(url, data)
+                    latencies.append((time.perf_counter() - request_started) * 1000)
+                query_counts.append(len(queries))
+                if response.status_code >= 400:
+                    errors += 1
+        elapsed = time.perf_counter() - started
+
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": len(latencies) / elapsed,
+            **{f"{key}_ms": value for key, value in summarize_latencies(latencies).items()},
+            "queries_per_request": sum(query_counts) / len(query_counts),
+            "max_queries": max(query_counts),
+        }
+
+    def catalog_browsing(self) -> Iterator[Step]:
+        yield "get", reverse("home"), None
+        yield "get", reverse("courses"), None
+        yield "get", reverse("course_details", args=[self.rng.choice(self.course_ids)]), None
+        yield "get", reverse("filias"), None
+        yield "get", reverse("filia_details", args=[self.rng.choice(self.filia_ids)]), None
+
+    def course_enrollment(self) -> Iterator[Step]:
+        course_id, filia_id = self.rng.choice(self.enrollable)
+        url = reverse("course_details", args=[course_id])
+        yield "get", url, None
+        yield "post", url, {"filia": filia_id}
+
+    def manager_group_details(self) -> Iterator[Step]:
+        yield "get", reverse("education_manage_group_details", args=[self.rng.choice(self.group_ids)]), None
+
+    def add_remove_students(self) -> Iterator[Step]:
+        group = Group.objects.filter(pk=self.rng.choice(self.group_ids)).only("enrolled_count", "group_size").get()
+        members = set(group.students.values_list("pk", flat=True))
+        student_ids = [
+            student_id for student_id in self.rng.sample(self.student_ids, 10)
+            if student_id not in members
+        ][:max(1, min(2, group.free_seats))]
+
+        yield "get", reverse("education_add_students_to_group", args=[group.pk]), None
+        yield "post", reverse("education_add_students_to_group", args=[group.pk]), {"student_ids": student_ids}
+        yield "post", reverse("education_remove_students_from_group", args=[group.pk]), {"student_ids": student_ids}
+
+    def print_report(self, results: Dict[str, Dict[str, float]]) -> None:
+        self.stdout.write(
+            f"{'scenario':<24} {'req/s':>8} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9} "
+            f"{'queries':>8} {'errors':>7}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<24} {result['throughput_rps']:>8.1f} {result['p50_ms']:>9.2f} "
+                f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                f"{result['queries_per_request']:>8.1f} {result['errors']:>7}"
+            )
+
+    @staticmethod
+    def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+        """Describe every scenario that got slower or chattier than the baseline."""
+        regressions = []
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            if result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {previous['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+            if result["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{name}: throughput {previous['throughput_rps']:.1f} -> {result['throughput_rps']:.1f} req/s"
+                )
+            if result["queries_per_request"] > previous["queries_per_request"] + 0.5:
+                regressions.append(
+                    f"{name}: queries per request {previous['queries_per_request']:.1f} "
+                    f"-> {result['queries_per_request']:.1f}"
+                )
+        return regressions
@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+from typing import List
+
+from django.core.management.base import BaseCommand
+
+from school_management.models import Student
+from school_management.utils.benchmarking import benchmark_database
+from school_management.utils.bulk_users import bulk_create_users
+from school_management.utils.filter_by_search_and_pagination import filter_by_icontains
+from school_management.utils.people_search import filter_by_full_text
+
+SEARCH_FIELDS = ["first_name", "last_name", "email"]
+FIRST_NAMES = [
+    "Andrii", "Bohdan", "Daryna", "Dmytro", "Halyna", "Ivan", "Iryna", "Kateryna",
+    "Maksym", "Marta", "Mykola", "Nazar", "Oksana", "Olena", "Petro", "Roman",
+    "Sofiia", "Taras", "Viktoriia", "Yurii",
+]
+SYLLABLES = [
+    "ko", "va", "len", "shev", "chen", "bon", "dar", "mel", "nyk", "ro",
+    "sen", "tka", "zhu", "lys", "pol", "hri", "mor", "zak", "buz", "kra",
+]
+
+
+def make_last_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(4)).capitalize() + "ko"
+
+
+class Command(BaseCommand):
+    help = "Compare icontains and full-text people search latency as the student table grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--broad-prefixes", nargs="+", default=["iv", "ko"],
+            help="Short prefixes that match a large share of the table, timed separately.",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        last_names: List[str] = []
+
+        with benchmark_database():
+            self.stdout.write(
+                f"{'students':>10} {'query':>8} {'icontains, ms':>15} {'full-text, ms':>15} {'speedup':>9}"
+            )
+            created = 0
+            for size in sorted(options["sizes"]):
+                batch = []
+                for index in range(created, size):
+                    last_name = make_last_name(rng)
+                    last_names.append(last_name)
+                    batch.append(
+                        Student(
+                            email=f"student{index}@example.com",
+                            first_name=rng.choice(FIRST_NAMES),
+                            last_name=last_name,
+                            phone_number="(000) 000-00-00",
+                            password="!",
+                        )
+                    )
+                bulk_create_users(Student, batch, batch_size=5000)
+                created = size
+
+                queries = [rng.choice(last_names)[:rng.randint(5, 9)] for _ in range(options["queries"])]
+                for label, terms in [("narrow", queries), ("broad", options["broad_prefixes"])]:
+                    icontains_ms = self.measure(
+                        lambda query: filter_by_icontains(Student.objects.all(), query, SEARCH_FIELDS),
+                        terms, options["page_size"],
+                    )
+                    full_text_ms = self.measure(
+                        lambda query: filter_by_full_text(Student.objects.all(), query, SEARCH_FIELDS),
+                        terms, options["page_size"],
+                    )
+                    self.stdout.write(
+                        f"{size:>10} {label:>8} {icontains_ms:>15.2f} {full_text_ms:>15.2f} "
+                        f"{icontains_ms / full_text_ms:>8.1f}x"
+                    )
+
+    @staticmethod
+    def measure(search, queries: List[str], page_size: int) -> float:
+        """Median time to fetch the first page and its total, as the paginated views do."""
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            queryset = search(query)
+            queryset.count()
+            list(queryset[:page_size])
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
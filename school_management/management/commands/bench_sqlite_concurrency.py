@@ -0,0 +1,139 @@
+import multiprocessing
+import time
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.db.models import Count
+
+from school_management.models import Course, Filia, Group, Student
+from school_management.utils.benchmarking import benchmark_database, summarize_latencies
+from school_management.utils.bulk_users import bulk_create_users
+from school_management.utils.seat_reservation import reserve_course_seat
+
+PROFILES = {
+    # What a bare sqlite3 config gets: rollback journal, deferred transactions.
+    "default": {"init_command": "PRAGMA journal_mode=DELETE;", "timeout": 5},
+    "production": settings.SQLITE_PRODUCTION_OPTIONS,
+}
+
+
+def read_catalog() -> None:
+    list(Course.objects.prefetch_related("experience", "groups__filia").order_by("name")[:20])
+    list(Group.objects.values("course").annotate(total=Count("pk")))
+
+
+def run_worker(
+    kind: str, start_at: float, deadline: float, student_ids: List[int], course, filia, results
+) -> None:
+    """Run reads or enrollments between `start_at` and `deadline`, then report latencies."""
+    latencies: List[float] = []
+    errors = 0
+    time.sleep(max(0.0, start_at - time.time()))
+    while time.time() < deadline:
+        if kind == "write":
+            if not student_ids:
+                break
+            student_id = student_ids.pop()
+            operation = lambda: reserve_course_seat(student_id, course, filia)  # noqa: E731
+        else:
+            operation = read_catalog
+        started = time.perf_counter()
+        try:
+            operation()
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    results.put((kind, latencies, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read and write throughput of the default and production SQLite "
+        "profiles with concurrent catalog readers and enrolling writers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per profile.")
+        parser.add_argument("--courses", type=int, default=50)
+        parser.add_argument("--students", type=int, default=20000)
+        parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'profile':<12} {'reads/s':>9} {'read p95':>9} {'writes/s':>9} {'write p95':>10} {'errors':>7}"
+        )
+        for profile in options["profiles"]:
+            with benchmark_database(on_disk=True):
+                result = self.run_profile(PROFILES[profile], options)
+            self.stdout.write(
+                f"{profile:<12} {result['reads_per_second']:>9.0f} {result['read']['p95']:>7.1f}ms "
+                f"{result['writes_per_second']:>9.0f} {result['write']['p95']:>8.1f}ms {result['errors']:>7}"
+            )
+
+    def run_profile(self, profile_options: Dict, options) -> Dict:
+        connection.settings_dict["OPTIONS"] = dict(profile_options)
+        connection.close()
+
+        course, filia = self.create_catalog(options["courses"])
+        pending = self.create_students(options["students"])
+        connection.close()
+
+        # Every process starts together once all of them are forked.
+        start_at = time.time() + 0.5
+        deadline = start_at + options["duration"]
+        # Separate processes, like separate server workers: threads would
+        # spend the run queueing on the GIL rather than on the database.
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        workers = [
+            context.Process(target=run_worker, args=("read", start_at, deadline, [], course, filia, results))
+            for _ in range(options["readers"])
+        ]
+        shares = [pending[index::options["writers"]] for index in range(options["writers"])]
+        workers += [
+            context.Process(target=run_worker, args=("write", start_at, deadline, share, course, filia, results))
+            for share in shares
+        ]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        duration = options["duration"]
+        read_latencies = [value for kind, values, _ in collected if kind == "read" for value in values]
+        write_latencies = [value for kind, values, _ in collected if kind == "write" for value in values]
+        return {
+            "reads_per_second": len(read_latencies) / duration,
+            "writes_per_second": len(write_latencies) / duration,
+            "read": summarize_latencies(read_latencies),
+            "write": summarize_latencies(write_latencies),
+            "errors": sum(errors for _, _, errors in collected),
+        }
+
+    @staticmethod
+    def create_catalog(course_count: int):
+        filia = Filia.objects.create(name="Bench", city="Kyiv", address="-")
+        courses = Course.objects.bulk_create(
+            [Course(name=f"Course {index}", description="-") for index in range(course_count)]
+        )
+        # One roomy group per course, so every enrollment finds a seat.
+        Group.objects.bulk_create(
+            [Group(name=f"Group {course.pk}", course=course, filia=filia, group_size=10**6) for course in courses]
+        )
+        return courses[0], filia
+
+    @staticmethod
+    def create_students(count: int) -> List[int]:
+        students = bulk_create_users(
+            Student,
+            [Student(email=f"bench-{index}@example.com", password="!") for index in range(count)],
+            batch_size=5000,
+        )
+        return [student.pk for student in students]
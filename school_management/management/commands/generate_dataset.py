@@ -0,0 +1,313 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterator, List
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from school_management.models import (
+    Course,
+    CustomUser,
+    Experience,
+    Filia,
+    Goal,
+    Group,
+    Manager,
+    Notification,
+    Student,
+    StudentGroupMembership,
+    Teacher,
+)
+from school_management.utils.bulk_users import bulk_create_users
+from school_management.utils.enums import (
+    AgeGroup,
+    GroupStatus,
+    ManagerRole,
+    NotificationType,
+    PaymentStatus,
+)
+
+BASE_DATETIME = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HISTORY_DAYS = 730
+CITIES = ["Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro", "Vinnytsia", "Poltava", "Chernihiv"]
+FIRST_NAMES = [
+    "Andrii", "Bohdan", "Daryna", "Dmytro", "Halyna", "Ivan", "Iryna", "Kateryna",
+    "Maksym", "Marta", "Mykola", "Nazar", "Oksana", "Olena", "Petro", "Roman",
+    "Sofiia", "Taras", "Viktoriia", "Yurii",
+]
+SYLLABLES = ["ko", "va", "len", "shev", "chen", "bon", "dar", "mel", "nyk", "ro", "sen", "tka"]
+EXPERIENCES = ["No experience", "Scratch", "Python basics", "Arduino", "Competitive robotics"]
+GOALS = [
+    "Programming", "Electronics", "Mechanics", "3D modelling",
+    "Competitions", "Game development", "AI", "Engineering",
+]
+GROUP_STATUS_WEIGHTS = [
+    (GroupStatus.ENROLLMENT_STARTED.value[0], 3),
+    (GroupStatus.EDUCATION_STARTED.value[0], 4),
+    (GroupStatus.EDUCATION_COMPLETED.value[0], 3),
+]
+
+
+@contextmanager
+def explicit_timestamps(*fields) -> Iterator[None]:
+    """Let generated rows keep their own auto_now_add timestamps."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty database with a deterministic, production-shaped dataset "
+        "using batched inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--scale", type=float, default=1.0,
+            help="Multiplier applied to every count, e.g. 0.01 for a quick local dataset.",
+        )
+        parser.add_argument("--filias", type=int, default=200)
+        parser.add_argument("--courses", type=int, default=2000)
+        parser.add_argument("--groups", type=int, default=20000)
+        parser.add_argument("--teachers", type=int, default=3000)
+        parser.add_argument("--students", type=int, default=300000)
+        parser.add_argument("--notifications", type=int, default=2000000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--password", default="password",
+            help="Password of every generated user; hashed once and shared.",
+        )
+
+    def handle(self, *args, **options):
+        if CustomUser.objects.exists() or Course.objects.exists():
+            raise CommandError("The database is not empty; run `manage.py flush` first.")
+
+        scale = options["scale"]
+        counts = {
+            name: max(1, int(options[name] * scale))
+            for name in ["filias", "courses", "groups", "teachers", "students", "notifications"]
+        }
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.password_hash = make_password(options["password"])
+        started = time.perf_counter()
+
+        experience_ids, goal_ids = self.create_catalog_attributes()
+        filia_ids = self.step("filias", self.create_filias, counts["filias"])
+        course_ids = self.step("courses", self.create_courses, counts["courses"], experience_ids, goal_ids)
+        self.create_managers()
+        teacher_ids = self.step("teachers", self.create_people, Teacher, counts["teachers"])
+        student_ids = self.step("students", self.create_people, Student, counts["students"])
+        group_plan = self.step(
+            "groups", self.create_groups, counts["groups"], course_ids, filia_ids, student_ids
+        )
+        self.step("memberships", self.create_memberships, group_plan, teacher_ids)
+        self.step(
+            "notifications", self.create_notifications,
+            counts["notifications"], student_ids + teacher_ids, group_plan,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Dataset ready in {time.perf_counter() - started:.1f}s."))
+
+    def step(self, label: str, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        self.stdout.write(f"{label:>14}: {time.perf_counter() - started:7.1f}s")
+        return result
+
+    def batches(self, items: List) -> Iterator[List]:
+        for start in range(0, len(items), self.batch_size):
+            yield items[start:start + self.batch_size]
+
+    def bulk_insert(self, model, objects: List) -> List:
+        created = []
+        for batch in self.batches(objects):
+            with transaction.atomic():
+                created.extend(model.objects.bulk_create(batch))
+        return created
+
+    def random_datetime(self) -> datetime:
+        return BASE_DATETIME - timedelta(seconds=self.rng.randrange(HISTORY_DAYS * 86400))
+
+    def create_catalog_attributes(self):
+        experiences = Experience.objects.bulk_create([Experience(name=name) for name in EXPERIENCES])
+        goals = Goal.objects.bulk_create([Goal(name=name) for name in GOALS])
+        return [item.pk for item in experiences], [item.pk for item in goals]
+
+    def create_filias(self, count: int) -> List[int]:
+        filias = [
+            Filia(
+                name=f"Filia {index + 1}",
+                city=self.rng.choice(CITIES),
+                address=f"{self.rng.randint(1, 200)} Robotics st.",
+            )
+            for index in range(count)
+        ]
+        return [filia.pk for filia in self.bulk_insert(Filia, filias)]
+
+    def create_courses(self, count: int, experience_ids: List[int], goal_ids: List[int]) -> List[int]:
+        age_groups = [value for value, _ in AgeGroup.choices()]
+        courses = self.bulk_insert(
+            Course,
+            [
+                Course(
+                    name=f"Course {index + 1}",
+                    description="Generated course.",
+                    age_group=self.rng.choice(age_groups),
+                )
+                for index in range(count)
+            ],
+        )
+        self.bulk_insert(
+            Course.experience.through,
+            [
+                Course.experience.through(course_id=course.pk, experience_id=experience_id)
+                for course in courses
+                for experience_id in self.rng.sample(experience_ids, self.rng.randint(1, 2))
+            ],
+        )
+        self.bulk_insert(
+            Course.goals.through,
+            [
+                Course.goals.through(course_id=course.pk, goal_id=goal_id)
+                for course in courses
+                for goal_id in self.rng.sample(goal_ids, self.rng.randint(1, 3))
+            ],
+        )
+        return [course.pk for course in courses]
+
+    def create_managers(self) -> None:
+        bulk_create_users(
+            Manager,
+            [
+                Manager(
+                    email=f"{role.value[0].lower()}.manager@example.com",
+                    first_name=role.value[0],
+                    last_name="Manager",
+                    phone_number="(000) 000-00-00",
+                    password=self.password_hash,
+                    role=role.value[0],
+                )
+                for role in ManagerRole
+            ],
+        )
+
+    def create_people(self, model, count: int) -> List[int]:
+        prefix = model.USER_TYPE.value[0]
+        ids = []
+        for start in range(0, count, self.batch_size):
+            people = [
+                model(
+                    email=f"{prefix}{index}@example.com",
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name="".join(self.rng.choice(SYLLABLES) for _ in range(3)).capitalize() + "ko",
+                    phone_number=(
+                        f"({self.rng.randint(0, 999):03}) {self.rng.randint(0, 999):03}-"
+                        f"{self.rng.randint(0, 99):02}-{self.rng.randint(0, 99):02}"
+                    ),
+                    password=self.password_hash,
+                )
+                for index in range(start, min(start + self.batch_size, count))
+            ]
+            ids.extend(user.pk for user in bulk_create_users(model, people, self.batch_size))
+        return ids
+
+    def create_groups(
+        self, count: int, course_ids: List[int], filia_ids: List[int], student_ids: List[int]
+    ) -> Dict[int, List[int]]:
+        """Create the groups with their final seat counts; returns group id -> student ids."""
+        statuses = [status for status, _ in GROUP_STATUS_WEIGHTS]
+        weights = [weight for _, weight in GROUP_STATUS_WEIGHTS]
+        groups, rosters = [], []
+        for index in range(count):
+            group_size = self.rng.randint(8, 20)
+            roster = self.rng.sample(student_ids, min(len(student_ids), self.rng.randint(group_size // 2, group_size)))
+            rosters.append(roster)
+            groups.append(
+                Group(
+                    name=f"Group {index + 1}",
+                    course_id=self.rng.choice(course_ids),
+                    filia_id=self.rng.choice(filia_ids),
+                    status=self.rng.choices(statuses, weights)[0],
+                    group_size=group_size,
+                    enrolled_count=len(roster),
+                )
+            )
+        groups = self.bulk_insert(Group, groups)
+        return {group.pk: roster for group, roster in zip(groups, rosters)}
+
+    def create_memberships(self, group_plan: Dict[int, List[int]], teacher_ids: List[int]) -> None:
+        payment_statuses = [PaymentStatus.PAID.name] * 3 + [PaymentStatus.UNPAID.name]
+        with explicit_timestamps(StudentGroupMembership._meta.get_field("joined_at")):
+            self.bulk_insert(
+                StudentGroupMembership,
+                [
+                    StudentGroupMembership(
+                        student_id=student_id,
+                        group_id=group_id,
+                        status=self.rng.choice(payment_statuses),
+                        joined_at=self.random_datetime(),
+                    )
+                    for group_id, roster in group_plan.items()
+                    for student_id in roster
+                ],
+            )
+        self.bulk_insert(
+            Teacher.teacher_groups.through,
+            [
+                Teacher.teacher_groups.through(teacher_id=teacher_id, group_id=group_id)
+                for group_id in group_plan
+                for teacher_id in self.rng.sample(teacher_ids, min(len(teacher_ids), self.rng.randint(1, 2)))
+            ],
+        )
+
+    def create_notifications(self, count: int, user_ids: List[int], group_plan: Dict[int, List[int]]) -> None:
+        groups = {
+            group.pk: group for group in Group.objects.select_related("course").only("name", "course__name")
+        }
+        group_ids = list(group_plan)
+        operations = [NotificationType.ADDED.name, NotificationType.REMOVED.name]
+        datetime_field = Notification._meta.get_field("datetime")
+
+        with explicit_timestamps(datetime_field):
+            for start in range(0, count, self.batch_size):
+                notifications = []
+                for _ in range(start, min(start + self.batch_size, count)):
+                    group = groups[self.rng.choice(group_ids)]
+                    operation = self.rng.choice(operations)
+                    notifications.append(
+                        Notification(
+                            user_id=self.rng.choice(user_ids),
+                            group_id=group.pk,
+                            course_id=group.course_id,
+                            type_of_operation=operation,
+                            wide_message=Notification.build_message(operation, group.course, group=group),
+                            datetime=self.random_datetime(),
+                            is_read=self.rng.random() < 0.8,
+                        )
+                    )
+                with transaction.atomic():
+                    Notification.objects.bulk_create(notifications)
+
+        CustomUser.objects.update(
+            unread_notifications=Coalesce(
+                Subquery(
+                    Notification.objects.filter(user=OuterRef("pk"), is_read=False)
+                    .values("user")
+                    .annotate(total=Count("pk"))
+                    .values("total")
+                ),
+                Value(0),
+            )
+        )
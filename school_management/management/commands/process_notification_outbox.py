@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from school_management.models import NotificationOutbox
+from school_management.utils.enums import OutboxStatus
+
+
+class Command(BaseCommand):
+    help = "Expand pending notification outbox records into per-user notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Notifications inserted per transaction.",
+        )
+        parser.add_argument(
+            "--max-records", type=int, default=20,
+            help="Outbox records claimed per polling round; bounds the work in flight.",
+        )
+        parser.add_argument(
+            "--max-attempts", type=int, default=5,
+            help="Attempts before a record is marked as failed.",
+        )
+        parser.add_argument(
+            "--lease", type=int, default=300,
+            help="Seconds a claimed record is hidden from other workers.",
+        )
+        parser.add_argument(
+            "--pause", type=float, default=0.05,
+            help="Seconds to yield the database between records.",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=2.0,
+            help="Seconds to sleep when there is nothing to deliver.",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling instead of exiting once the outbox is drained.",
+        )
+        parser.add_argument(
+            "--retry-failed", action="store_true",
+            help="Re-queue failed records before processing. Delivery is idempotent.",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            requeued = NotificationOutbox.objects.filter(status=OutboxStatus.FAILED.name).update(
+                status=OutboxStatus.PENDING.name, attempts=0
+            )
+            self.stdout.write(f"Re-queued {requeued} failed record(s).")
+
+        lease = timedelta(seconds=options["lease"])
+        try:
+            while True:
+                records = NotificationOutbox.claim_due(options["max_records"], lease)
+                if not records:
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                for record in records:
+                    try:
+                        delivered = record.deliver(options["batch_size"])
+                    except Exception as e:
+                        record.mark_failed(e, options["max_attempts"])
+                        self.stderr.write(f"Outbox #{record.pk} failed (attempt {record.attempts}): {e}")
+                    else:
+                        self.stdout.write(f"Outbox #{record.pk}: delivered {delivered} notification(s).")
+                    time.sleep(options["pause"])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
@@ -0,0 +1,62 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from school_management.models import UserImport
+from school_management.utils.enums import ImportStatus
+from school_management.utils.password_hashing import password_hasher
+from school_management.utils.user_import import process_user_import
+
+
+class Command(BaseCommand):
+    help = "Import the CSV files education managers uploaded on the Import page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Rows validated, hashed and inserted together; one transaction each.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Processes hashing passwords, started once and shared by every import "
+                 "(default: one per CPU; 1 hashes in this process).",
+        )
+        parser.add_argument(
+            "--lease", type=int, default=3600,
+            help="Seconds a claimed import is hidden from other workers.",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=2.0,
+            help="Seconds to sleep when there is nothing to import.",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling instead of exiting once every upload is imported.",
+        )
+
+    def handle(self, *args, **options):
+        lease = timedelta(seconds=options["lease"])
+        try:
+            with password_hasher(options["workers"]) as pool:
+                while True:
+                    imports = UserImport.claim_due(1, lease)
+                    if not imports:
+                        if not options["loop"]:
+                            break
+                        time.sleep(options["poll_interval"])
+                        continue
+
+                    for user_import in imports:
+                        try:
+                            process_user_import(user_import, pool, options["batch_size"])
+                        except Exception as e:
+                            user_import.finish(ImportStatus.FAILED.name, f"{type(e).__name__}: {e}")
+                            self.stderr.write(f"Import #{user_import.pk} failed: {e}")
+                        else:
+                            self.stdout.write(
+                                f"Import #{user_import.pk}: created {user_import.total_created} user(s), "
+                                f"{len(user_import.errors)} row error(s)."
+                            )
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from school_management.utils.people_search import install_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Create the people search index if needed and rebuild it from CustomUser."
+
+    def handle(self, *args, **options):
+        if not install_search_index():
+            raise CommandError("Full-text search needs SQLite with the FTS5 extension.")
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS("People search index rebuilt."))
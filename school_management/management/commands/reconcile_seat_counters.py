@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from school_management.models import Group
+
+
+class Command(BaseCommand):
+    help = "Verify Group.enrolled_count against the membership table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true",
+            help="Rewrite drifted counters from the membership table.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = list(
+                Group.objects.annotate(actual=Count("studentgroupmembership"))
+                .exclude(enrolled_count=F("actual"))
+                .values_list("pk", "name", "enrolled_count", "actual")
+            )
+
+            for group_id, name, stored, actual in drifted:
+                self.stdout.write(f"Group #{group_id} {name}: stored {stored}, actual {actual}")
+
+            if not drifted:
+                self.stdout.write(self.style.SUCCESS("All seat counters are exact."))
+                return
+
+            if options["fix"]:
+                Group.recount_enrolled([group_id for group_id, *_ in drifted])
+                self.stdout.write(self.style.SUCCESS(f"Fixed {len(drifted)} group(s)."))
+            else:
+                self.stdout.write(self.style.WARNING(f"{len(drifted)} group(s) drifted; rerun with --fix."))
@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from typing import List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.db.models import Count, F
+
+from school_management.models import Course, Filia, Group, Student, StudentGroupMembership
+from school_management.utils.benchmarking import benchmark_database, summarize_latencies
+from school_management.utils.enums import SeatReservationOutcome
+from school_management.utils.seat_reservation import reserve_course_seat
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent course enrollments at a throwaway on-disk database and "
+        "check that no group goes over capacity."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=1000)
+        parser.add_argument(
+            "--attempts-per-student", type=int, default=2,
+            help="Enrollment requests each student fires; repeats must be rejected.",
+        )
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument("--groups", type=int, default=25)
+        parser.add_argument("--group-size", type=int, default=20)
+        parser.add_argument(
+            "--min-throughput", type=float, default=0.0,
+            help="Fail when fewer enrollment requests per second are served.",
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database(on_disk=True):
+            connection.settings_dict["OPTIONS"]["timeout"] = 30
+            course, filia = self.create_catalog(options["groups"], options["group_size"])
+            student_ids = self.create_students(options["students"])
+
+            requests = queue.Queue()
+            for _ in range(options["attempts_per_student"]):
+                for student_id in student_ids:
+                    requests.put(student_id)
+            total_requests = requests.qsize()
+
+            latencies: List[float] = []
+            outcomes = {outcome: 0 for outcome in SeatReservationOutcome}
+            errors: List[str] = []
+            lock = threading.Lock()
+
+            def worker() -> None:
+                try:
+                    while True:
+                        try:
+                            student_id = requests.get_nowait()
+                        except queue.Empty:
+                            return
+                        started = time.perf_counter()
+                        try:
+                            outcome, _ = reserve_course_seat(student_id, course, filia)
+                        except OperationalError as e:
+                            with lock:
+                                errors.append(str(e))
+                            continue
+                        elapsed = (time.perf_counter() - started) * 1000
+                        with lock:
+                            latencies.append(elapsed)
+                            outcomes[outcome] += 1
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            throughput = total_requests / elapsed
+            summary = summarize_latencies(latencies)
+            self.stdout.write(
+                f"{total_requests} requests on {options['threads']} threads in {elapsed:.2f}s "
+                f"({throughput:.0f} req/s)"
+            )
+            self.stdout.write(
+                f"latency ms: p50 {summary['p50']:.1f}, p95 {summary['p95']:.1f}, p99 {summary['p99']:.1f}"
+            )
+            for outcome, count in outcomes.items():
+                self.stdout.write(f"{outcome.value}: {count}")
+            if errors:
+                self.stdout.write(self.style.WARNING(f"{len(errors)} request(s) failed: {errors[0]}"))
+
+            self.check_invariants(course, filia, len(student_ids), options)
+            if throughput < options["min_throughput"]:
+                raise CommandError(
+                    f"Throughput {throughput:.0f} req/s is below {options['min_throughput']:.0f} req/s."
+                )
+            self.stdout.write(self.style.SUCCESS("Capacity held under contention."))
+
+    def check_invariants(self, course: Course, filia: Filia, student_count: int, options) -> None:
+        overfull = Group.objects.filter(enrolled_count__gt=F("group_size")).count()
+        drifted = (
+            Group.objects.annotate(actual=Count("studentgroupmembership"))
+            .exclude(enrolled_count=F("actual"))
+            .count()
+        )
+        double_enrolled = (
+            StudentGroupMembership.objects.filter(group__course=course, group__filia=filia)
+            .values("student")
+            .annotate(total=Count("pk"))
+            .filter(total__gt=1)
+            .count()
+        )
+        enrolled = StudentGroupMembership.objects.count()
+        expected = min(student_count, options["groups"] * options["group_size"])
+
+        problems = []
+        if overfull:
+            problems.append(f"{overfull} group(s) over capacity")
+        if drifted:
+            problems.append(f"{drifted} seat counter(s) drifted")
+        if double_enrolled:
+            problems.append(f"{double_enrolled} student(s) enrolled twice")
+        if enrolled != expected:
+            problems.append(f"{enrolled} seats taken, expected {expected}")
+        if problems:
+            raise CommandError("; ".join(problems))
+
+    @staticmethod
+    def create_catalog(group_count: int, group_size: int):
+        course = Course.objects.create(name="Stress course")
+        filia = Filia.objects.create(name="Stress", city="Kyiv", address="-")
+        Group.objects.bulk_create(
+            [
+                Group(name=f"stress-{index}", course=course, filia=filia, group_size=group_size)
+                for index in range(group_count)
+            ]
+        )
+        return course, filia
+
+    @staticmethod
+    def create_students(count: int) -> List[int]:
+        with transaction.atomic():
+            return [
+                Student.objects.create(
+                    email=f"stress-student-{index}@example.com",
+                    first_name="Stress",
+                    last_name=f"Student {index}",
+                    phone_number="(000) 000-00-00",
+                    password="!",
+                ).pk
+                for index in range(count)
+            ]
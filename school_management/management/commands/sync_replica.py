@@ -0,0 +1,55 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from school_management.routers import replica_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto every configured replica with the "
+        "online backup API, once or every --interval seconds. A local stand-in "
+        "for real replication."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=None,
+            help="Keep syncing every N seconds until interrupted.",
+        )
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError("No replicas configured; set DATABASE_REPLICAS.")
+        for alias in [DEFAULT_DB_ALIAS, *aliases]:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"{alias} is not an SQLite database.")
+
+        interval = options["interval"]
+        while True:
+            for alias in aliases:
+                elapsed = self.copy(connections[DEFAULT_DB_ALIAS].settings_dict["NAME"],
+                                    connections[alias].settings_dict["NAME"])
+                self.stdout.write(f"{alias}: synced in {elapsed * 1000:.0f} ms")
+            if interval is None:
+                return
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                return
+
+    @staticmethod
+    def copy(source_path, target_path) -> float:
+        started = time.perf_counter()
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            # A consistent snapshot of the primary, written while it keeps serving.
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        return time.perf_counter() - started
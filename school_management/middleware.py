@@ -0,0 +1,261 @@
+import json
+import logging
+import mimetypes
+import os
+import random
+import time
+from contextlib import ExitStack
+from typing import Callable, Dict, List
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from school_management.routers import pin_to_primary, replica_aliases, routing_scope
+from school_management.utils.query_inspection import repeated_fingerprints
+
+logger = logging.getLogger("school_management.instrumentation")
+
+DEFAULT_INSTRUMENTATION = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 1.0,
+    "REPEATED_QUERY_THRESHOLD": 3,
+}
+
+
+class QueryRecorder:
+    """A database execute wrapper that counts and times every statement."""
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.statements.append(sql)
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Opt-in per-request cost report: SQL query count, DB time, template render
+    time and repeated (N+1) query fingerprints, exposed as a `Server-Timing`
+    header and a structured log line.
+
+    Enabled through `settings.REQUEST_INSTRUMENTATION`; unsampled requests
+    only pay for one random() call. Template time is measured for
+    TemplateResponse-based views; views calling `render()` directly report it
+    as part of the application time. Sync only: under ASGI, Django adapts it
+    with a thread hop per request.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        config = {**DEFAULT_INSTRUMENTATION, **getattr(settings, "REQUEST_INSTRUMENTATION", {})}
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.repeated_threshold = config["REPEATED_QUERY_THRESHOLD"]
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._template_timing = [None, None]
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        render_started, render_finished = request._template_timing
+        template = (render_finished - render_started) if render_finished else None
+        self.report(request, response, recorder, total, template)
+        return response
+
+    def process_template_response(self, request: HttpRequest, response):
+        timing = getattr(request, "_template_timing", None)
+        if timing is not None:
+            timing[0] = time.perf_counter()
+
+            def finish_timing(rendered_response):
+                timing[1] = time.perf_counter()
+
+            response.add_post_render_callback(finish_timing)
+        return response
+
+    def report(self, request, response, recorder: QueryRecorder, total: float, template) -> None:
+        db_ms = recorder.duration * 1000
+        total_ms = total * 1000
+        metrics = [f'db;dur={db_ms:.2f};desc="{len(recorder.statements)} queries"']
+        if template is not None:
+            metrics.append(f"tpl;dur={template * 1000:.2f}")
+        metrics.append(f"total;dur={total_ms:.2f}")
+        response["Server-Timing"] = ", ".join(metrics)
+
+        repeated = repeated_fingerprints(recorder.statements, self.repeated_threshold)
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "view": getattr(request.resolver_match, "view_name", None),
+                    "queries": len(recorder.statements),
+                    "db_ms": round(db_ms, 2),
+                    "template_ms": round(template * 1000, 2) if template is not None else None,
+                    "total_ms": round(total_ms, 2),
+                    "repeated_queries": repeated,
+                }
+            )
+        )
+
+
+def _accept_encoding_qvalues(header: str) -> Dict[str, float]:
+    """The q-value of every content coding in an Accept-Encoding header, e.g. {"br": 0.0, "gzip": 1.0}."""
+    qvalues = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[coding.lower()] = qvalue
+    return qvalues
+
+
+class PrecompressedStaticFilesMiddleware:
+    """
+    Serve collected static files straight from STATIC_ROOT, picking the
+    `.br`/`.gz` variant written by `CompressedManifestStaticFilesStorage`
+    the client accepts with the highest q-value (brotli on a tie; q=0 refuses
+    a coding). Content-hashed names are cached as immutable
+    for a year; anything else only briefly, since its content can change
+    under the same URL.
+
+    Disabled under DEBUG, where runserver serves the source files.
+    """
+
+    ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+    IMMUTABLE = "public, max-age=31536000, immutable"
+    SHORT_LIVED = "public, max-age=60"
+
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        if settings.DEBUG or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else f"/{settings.STATIC_URL}"
+        self.root = str(settings.STATIC_ROOT)
+        self.hashed_names = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.is_static(request):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_static(request):
+            # stat() and open() block; keep them off the event loop.
+            response = await sync_to_async(self.serve, thread_sensitive=False)(
+                request, request.path[len(self.prefix):]
+            )
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+    def is_static(self, request: HttpRequest) -> bool:
+        return request.method in ("GET", "HEAD") and request.path.startswith(self.prefix)
+
+    def serve(self, request: HttpRequest, name: str):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            qvalues = _accept_encoding_qvalues(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+            candidates = [
+                (qvalues.get(candidate, qvalues.get("*", 0.0)), candidate, suffix)
+                for candidate, suffix in self.ENCODINGS
+            ]
+            encoding, served_path = None, path
+            # sorted() is stable, so ENCODINGS order breaks ties.
+            for qvalue, candidate, suffix in sorted(candidates, key=lambda item: -item[0]):
+                if qvalue > 0 and os.path.isfile(path + suffix):
+                    encoding, served_path = candidate, path + suffix
+                    break
+
+            content_type, _ = mimetypes.guess_type(path)
+            response = FileResponse(open(served_path, "rb"), content_type=content_type or "application/octet-stream")
+            if encoding:
+                response["Content-Encoding"] = encoding
+            response["Last-Modified"] = http_date(stat.st_mtime)
+
+        response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = self.IMMUTABLE if name in self.hashed_names else self.SHORT_LIVED
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Give every request a routing scope for `ReplicaRouter`, and pin the
+    session to the primary for `REPLICA_MAX_LAG` seconds once the request
+    wrote, so the visitor's next pages read their own writes.
+
+    Disabled when no replica is configured.
+    """
+
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routing_scope() as state:
+            response = self.get_response(request)
+        if state.wrote and hasattr(request, "session"):
+            pin_to_primary(request)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        with routing_scope() as state:
+            response = await self.get_response(request)
+        if state.wrote and hasattr(request, "session"):
+            pin_to_primary(request)
+        return response
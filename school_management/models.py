@@ -1,4 +1,5 @@
-from typing import List
+from datetime import timedelta
+from typing import Dict, Iterable, List
 
 from django.contrib import messages
 from django.contrib.auth.models import (
@@ -8,15 +9,19 @@ from django.contrib.auth.models import (
 )
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.http import HttpRequest
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from school_management.utils.enums import (
     AgeGroup,
     ManagerRole,
-    GroupStatus, NotificationType, PaymentStatus,
+    GroupStatus, ImportStatus, NotificationType, PaymentStatus, EnrollmentOutcome, OutboxStatus, UserType,
 )
+from .utils.decorators.db_retry import retry_on_database_lock
 from .utils.decorators.exceptions import exception_handler
+from .utils.notification_broker import broker
 from .utils.validators import phone_number_validator
 
 
@@ -41,6 +46,12 @@ class CustomUserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def with_role(self, user_type: UserType, manager_role: ManagerRole | None = None):
+        queryset = self.filter(user_type=user_type.value[0])
+        if manager_role is not None:
+            queryset = queryset.filter(manager_role=manager_role.value[0])
+        return queryset
+
 
 class CustomUser(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(_("Email address"), unique=True)
@@ -55,14 +66,31 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    unread_notifications = models.PositiveIntegerField(default=0, editable=False)
+    user_type = models.CharField(
+        _("User type"), max_length=10, choices=UserType.choices(), blank=True, editable=False
+    )
+    manager_role = models.CharField(
+        _("Manager role"), max_length=20, choices=ManagerRole.choices(), blank=True, editable=False
+    )
 
     objects = CustomUserManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name", "phone_number"]
+    USER_TYPE: UserType | None = None
 
     class Meta:
         ordering = ["first_name", "last_name"]
+        indexes = [
+            models.Index(fields=["user_type", "manager_role"], name="customuser_role_idx"),
+            models.Index(fields=["first_name", "last_name", "id"], name="customuser_name_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.USER_TYPE is not None:
+            self.user_type = self.USER_TYPE.value[0]
+        super().save(*args, **kwargs)
 
     def has_usable_password(self):
         return None
@@ -72,6 +100,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
 
 class Student(CustomUser):
+    USER_TYPE = UserType.STUDENT
+
     student_groups = models.ManyToManyField(
         "Group",
         through="StudentGroupMembership",
@@ -99,8 +129,25 @@ class StudentGroupMembership(models.Model):
     def __str__(self):
         return f"{self.student} - {self.group} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous_group_id = None
+            if not self._state.adding:
+                previous_group_id = StudentGroupMembership.objects.filter(
+                    pk=self.pk
+                ).values_list("group_id", flat=True).first()
+            super().save(*args, **kwargs)
+            if previous_group_id != self.group_id:
+                if previous_group_id is not None:
+                    Group.shift_enrolled_count([previous_group_id], -1)
+                Group.shift_enrolled_count([self.group_id], 1)
+            else:
+                Group.bump_membership_version([self.group_id])
+
 
 class Teacher(CustomUser):
+    USER_TYPE = UserType.TEACHER
+
     teacher_groups = models.ManyToManyField(
         "Group", related_name="teachers", blank=True
     )
@@ -110,6 +157,8 @@ class Teacher(CustomUser):
 
 
 class Manager(CustomUser):
+    USER_TYPE = UserType.MANAGER
+
     role = models.CharField(
         max_length=20,
         choices=ManagerRole.choices(),
@@ -118,6 +167,10 @@ class Manager(CustomUser):
         help_text="Specify the manager role.",
     )
 
+    def save(self, *args, **kwargs):
+        self.manager_role = self.role or ""
+        super().save(*args, **kwargs)
+
     def __str__(self):
         role_display = dict(ManagerRole.choices()).get(self.role, "Manager")
         return f"{self.first_name} {self.last_name} ({role_display})"
@@ -128,6 +181,7 @@ class Filia(models.Model):
     city = models.CharField(_("City"), max_length=50)
     address = models.CharField(_("Address"), max_length=100)
     description = models.CharField(_("Description"), max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} - {self.city}"
@@ -157,6 +211,7 @@ class Course(models.Model):
     )
     experience = models.ManyToManyField(Experience, related_name="courses", blank=True)
     goals = models.ManyToManyField(Goal, related_name="courses", blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -176,6 +231,10 @@ class Group(models.Model):
     )
     education_start_date = models.DateField(blank=True, null=True)
     education_finish_date = models.DateField(blank=True, null=True)
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Bumped whenever the roster, a payment status or the teachers change.
+    membership_version = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["name"]
@@ -183,25 +242,96 @@ class Group(models.Model):
     def __str__(self):
         return f"{self.name} - {self.course.name}"
 
-    @transaction.atomic
+    @property
+    def free_seats(self) -> int:
+        return max(self.group_size - self.enrolled_count, 0)
+
+    @staticmethod
+    def shift_enrolled_count(group_ids: Iterable[int], delta: int) -> None:
+        Group.objects.filter(pk__in=group_ids).update(
+            enrolled_count=F("enrolled_count") + delta,
+            membership_version=F("membership_version") + 1,
+        )
+
+    @staticmethod
+    def bump_membership_version(group_ids: Iterable[int]) -> None:
+        Group.objects.filter(pk__in=group_ids).update(membership_version=F("membership_version") + 1)
+
+    @staticmethod
+    def recount_enrolled(group_ids: Iterable[int] | None = None) -> int:
+        """
+        Recompute `enrolled_count` from the membership table, e.g. after rows
+        were written with raw SQL or a bulk_create that skipped the counter.
+        """
+        groups = Group.objects.all() if group_ids is None else Group.objects.filter(pk__in=group_ids)
+        return groups.update(
+            membership_version=F("membership_version") + 1,
+            enrolled_count=Coalesce(
+                Subquery(
+                    StudentGroupMembership.objects.filter(group=OuterRef("pk"))
+                    .values("group")
+                    .annotate(total=Count("pk"))
+                    .values("total")
+                ),
+                0,
+            )
+        )
+
     @exception_handler
+    @retry_on_database_lock()
+    @transaction.atomic
     def add_students(self, student_ids: list[int]) -> bool:
-        students = Student.objects.filter(pk__in=student_ids)
-        if not students.exists():
-            return False
-
-        for student in students:
-            membership, created = StudentGroupMembership.objects.get_or_create(
-                student=student, group=self, defaults={"status": PaymentStatus.UNPAID.name}
+        outcomes = self.enroll_students(student_ids)
+        return any(outcome != EnrollmentOutcome.NOT_FOUND for outcome in outcomes.values())
+
+    def enroll_students(
+        self, student_ids: Iterable[int], seats_claimed: bool = False
+    ) -> Dict[int, EnrollmentOutcome]:
+        """
+        Enroll students in bulk and report what happened to each requested id.
+
+        Existing memberships are resolved in a single query, the new
+        memberships are written with one batched insert and their
+        notifications are queued as a single outbox record. With
+        `seats_claimed`, the caller already counted the new members' seats
+        (see `claim_seats`) and the counter is left alone.
+        """
+        requested_ids = {int(student_id) for student_id in student_ids}
+        outcomes = {student_id: EnrollmentOutcome.NOT_FOUND for student_id in requested_ids}
+
+        students = Student.objects.filter(pk__in=requested_ids).annotate(
+            is_member=Exists(
+                StudentGroupMembership.objects.filter(group=self, student=OuterRef("pk"))
             )
-            if created:
-                Notification().create_notification(
-                    user=student,
-                    course=self.course,
-                    operation_type=NotificationType.ADDED.name,
-                    group=self,
-                )
-        return True
+        ).values_list("pk", "is_member")
+
+        new_student_ids = []
+        for student_id, is_member in students:
+            if is_member:
+                outcomes[student_id] = EnrollmentOutcome.ALREADY_ENROLLED
+            else:
+                outcomes[student_id] = EnrollmentOutcome.ADDED
+                new_student_ids.append(student_id)
+
+        if new_student_ids:
+            StudentGroupMembership.objects.bulk_create(
+                [
+                    StudentGroupMembership(
+                        student_id=student_id, group=self, status=PaymentStatus.UNPAID.name
+                    )
+                    for student_id in new_student_ids
+                ]
+            )
+            if not seats_claimed:
+                self.shift_enrolled_count([self.pk], len(new_student_ids))
+            self.enrolled_count += len(new_student_ids)
+            NotificationOutbox.enqueue(
+                user_ids=new_student_ids,
+                course=self.course,
+                operation_type=NotificationType.ADDED.name,
+                group=self,
+            )
+        return outcomes
 
     @transaction.atomic
     @exception_handler
@@ -225,57 +355,59 @@ class Group(models.Model):
         membership.save()
         return True
 
-    @transaction.atomic
     @exception_handler
+    @retry_on_database_lock()
+    @transaction.atomic
     def add_teachers(self, teacher_ids: List[int]) -> bool:
-        teachers = Teacher.objects.filter(pk__in=teacher_ids)
-        if not teachers.exists():
+        teacher_ids = list(Teacher.objects.filter(pk__in=teacher_ids).values_list("pk", flat=True))
+        if not teacher_ids:
             return False
-        self.teachers.add(*teachers)
+        self.teachers.add(*teacher_ids)
 
-        for teacher in teachers:
-            Notification().create_notification(
-                user=teacher,
-                course=self.course,
-                operation_type=NotificationType.ADDED.name,
-                group=self
-            )
+        NotificationOutbox.enqueue(
+            user_ids=teacher_ids,
+            course=self.course,
+            operation_type=NotificationType.ADDED.name,
+            group=self,
+        )
 
         return True
 
-    @transaction.atomic
     @exception_handler
+    @retry_on_database_lock()
+    @transaction.atomic
     def remove_students(self, student_ids: List[int]) -> bool:
-        students = self.students.filter(pk__in=student_ids)
-        if not students.exists():
+        student_ids = list(self.students.filter(pk__in=student_ids).values_list("pk", flat=True))
+        if not student_ids:
             return False
-        self.students.remove(*students)
-
-        for student in students:
-            Notification().create_notification(
-                user=student,
-                course=self.course,
-                operation_type=NotificationType.REMOVED.name,
-                group=self
-            )
+        # Each deleted membership releases its seat through post_delete.
+        removed, _ = StudentGroupMembership.objects.filter(group=self, student_id__in=student_ids).delete()
+        self.enrolled_count -= removed
+
+        NotificationOutbox.enqueue(
+            user_ids=student_ids,
+            course=self.course,
+            operation_type=NotificationType.REMOVED.name,
+            group=self,
+        )
 
         return True
 
-    @transaction.atomic
     @exception_handler
+    @retry_on_database_lock()
+    @transaction.atomic
     def remove_teachers(self, teacher_ids: List[int]) -> bool:
-        teachers = self.teachers.filter(pk__in=teacher_ids)
-        if not teachers.exists():
+        teacher_ids = list(self.teachers.filter(pk__in=teacher_ids).values_list("pk", flat=True))
+        if not teacher_ids:
             return False
-        self.teachers.remove(*teachers)
+        self.teachers.remove(*teacher_ids)
 
-        for teacher in teachers:
-            Notification().create_notification(
-                user=teacher,
-                course=self.course,
-                operation_type=NotificationType.REMOVED.name,
-                group=self
-            )
+        NotificationOutbox.enqueue(
+            user_ids=teacher_ids,
+            course=self.course,
+            operation_type=NotificationType.REMOVED.name,
+            group=self,
+        )
 
         return True
 
@@ -314,16 +446,25 @@ class Notification(models.Model):
     )
     wide_message = models.TextField()
     datetime = models.DateTimeField(auto_now_add=True)
+    is_read = models.BooleanField(default=False)
+    outbox = models.ForeignKey(
+        'NotificationOutbox', null=True, blank=True, on_delete=models.SET_NULL, related_name="notifications"
+    )
 
     class Meta:
         ordering = ['-datetime']
+        indexes = [
+            models.Index(fields=["user", "-datetime", "-id"], name="notification_inbox_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["outbox", "user"], name="unique_notification_per_outbox_user"),
+        ]
 
     def __str__(self):
         return f"Notification: {self.type_of_operation}"
 
-    @transaction.atomic
-    @exception_handler
-    def create_notification(self, user, course, operation_type, filia=None, group=None) -> None:
+    @staticmethod
+    def build_message(operation_type, course, filia=None, group=None) -> str:
         wide_message = ""
 
         if operation_type == NotificationType.ADDED.name and group:
@@ -335,13 +476,244 @@ class Notification(models.Model):
         elif operation_type == NotificationType.REMOVED.name and group:
             wide_message = f"You were removed from {course.name} - {group.name}."
 
+        return wide_message
+
+    @transaction.atomic
+    @exception_handler
+    def create_notification(self, user, course, operation_type, filia=None, group=None) -> None:
         notification = Notification(
             user=user,
             course=course,
             group=group,
             filia=filia,
             type_of_operation=operation_type,
-            wide_message=wide_message
+            wide_message=self.build_message(operation_type, course, filia=filia, group=group)
         )
 
         notification.save()
+        CustomUser.objects.filter(pk=notification.user_id).update(
+            unread_notifications=F("unread_notifications") + 1
+        )
+        broker.publish_on_commit([notification.user_id])
+
+    @classmethod
+    @exception_handler
+    @retry_on_database_lock()
+    @transaction.atomic
+    def mark_read(cls, user, notification_id: int) -> bool:
+        updated = cls.objects.filter(pk=notification_id, user=user, is_read=False).update(is_read=True)
+        if updated:
+            CustomUser.objects.filter(pk=user.pk, unread_notifications__gt=0).update(
+                unread_notifications=F("unread_notifications") - 1
+            )
+        return bool(updated)
+
+    @classmethod
+    @exception_handler
+    @retry_on_database_lock()
+    @transaction.atomic
+    def mark_all_read(cls, user) -> int:
+        updated = cls.objects.filter(user=user, is_read=False).update(is_read=True)
+        CustomUser.objects.filter(pk=user.pk).update(unread_notifications=0)
+        return updated
+
+
+class NotificationOutbox(models.Model):
+    """
+    One record per group mutation, written in the mutation's transaction and
+    expanded into per-user notifications later by `process_notification_outbox`.
+    """
+    group = models.ForeignKey('Group', null=True, blank=True, on_delete=models.SET_NULL)
+    course = models.ForeignKey('Course', null=True, blank=True, on_delete=models.SET_NULL)
+    filia = models.ForeignKey('Filia', null=True, blank=True, on_delete=models.SET_NULL)
+    type_of_operation = models.CharField(
+        max_length=20,
+        choices=NotificationType.choices()
+    )
+    wide_message = models.TextField()
+    user_ids = models.JSONField(default=list)
+    status = models.CharField(
+        max_length=10,
+        choices=OutboxStatus.choices(),
+        default=OutboxStatus.PENDING.name,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="outbox_status_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"Outbox: {self.type_of_operation} ({len(self.user_ids)} users, {self.status})"
+
+    @classmethod
+    def enqueue(cls, user_ids, course, operation_type, filia=None, group=None) -> "NotificationOutbox":
+        return cls.objects.create(
+            user_ids=sorted(user_ids),
+            course=course,
+            group=group,
+            filia=filia,
+            type_of_operation=operation_type,
+            wide_message=Notification.build_message(operation_type, course, filia=filia, group=group),
+        )
+
+    @classmethod
+    @retry_on_database_lock()
+    @transaction.atomic
+    def claim_due(cls, limit: int, lease: timedelta) -> List["NotificationOutbox"]:
+        """
+        Lease up to `limit` due records. A record whose worker dies mid-delivery
+        becomes due again once the lease runs out.
+        """
+        now = timezone.now()
+        due_ids = cls.objects.filter(
+            status=OutboxStatus.PENDING.name, available_at__lte=now
+        ).values_list("pk", flat=True)[:limit]
+
+        claimed = []
+        for outbox_id in due_ids:
+            leased = cls.objects.filter(
+                pk=outbox_id, status=OutboxStatus.PENDING.name, available_at__lte=now
+            ).update(available_at=now + lease)
+            if leased:
+                claimed.append(outbox_id)
+        return list(cls.objects.filter(pk__in=claimed))
+
+    @retry_on_database_lock()
+    def deliver(self, batch_size: int) -> int:
+        """
+        Insert the notifications in batches of `batch_size`, one short transaction
+        per batch, and bump the recipients' unread counters alongside. Rows that
+        already exist are skipped, so replaying a record that was partially
+        delivered is safe, and recipients deleted since the record was queued
+        are dropped. Returns the number of notifications inserted.
+        """
+        inserted = 0
+        for start in range(0, len(self.user_ids), batch_size):
+            batch = self.user_ids[start:start + batch_size]
+            with transaction.atomic():
+                existing_ids = set(CustomUser.objects.filter(pk__in=batch).values_list("pk", flat=True))
+                delivered_ids = set(
+                    Notification.objects.filter(outbox=self, user_id__in=batch).values_list("user_id", flat=True)
+                )
+                new_user_ids = [
+                    user_id for user_id in batch if user_id in existing_ids and user_id not in delivered_ids
+                ]
+                Notification.objects.bulk_create(
+                    [
+                        Notification(
+                            user_id=user_id,
+                            course_id=self.course_id,
+                            group_id=self.group_id,
+                            filia_id=self.filia_id,
+                            type_of_operation=self.type_of_operation,
+                            wide_message=self.wide_message,
+                            outbox=self,
+                        )
+                        for user_id in new_user_ids
+                    ]
+                )
+                CustomUser.objects.filter(pk__in=new_user_ids).update(
+                    unread_notifications=F("unread_notifications") + 1
+                )
+                broker.publish_on_commit(new_user_ids)
+            inserted += len(new_user_ids)
+
+        self.status = OutboxStatus.PROCESSED.name
+        self.processed_at = timezone.now()
+        self.last_error = ""
+        self.save(update_fields=["status", "processed_at", "last_error"])
+        return inserted
+
+    def mark_failed(self, error: Exception, max_attempts: int) -> None:
+        self.attempts += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self.attempts >= max_attempts:
+            self.status = OutboxStatus.FAILED.name
+        else:
+            self.available_at = timezone.now() + timedelta(seconds=2 ** self.attempts)
+        self.save(update_fields=["attempts", "last_error", "status", "available_at"])
+
+
+class UserImport(models.Model):
+    """
+    A CSV of students and teachers uploaded by a manager, imported later by
+    `process_user_imports` so the upload request returns at once. The file
+    is deleted once processed: it may hold plain-text passwords.
+
+    The counts, errors and `last_row` are saved with every imported batch,
+    so an import whose worker died resumes after the last saved row.
+    """
+    csv_file = models.FileField(upload_to="user_imports/", blank=True)
+    uploaded_by = models.ForeignKey('Manager', null=True, blank=True, on_delete=models.SET_NULL)
+    status = models.CharField(
+        max_length=10,
+        choices=ImportStatus.choices(),
+        default=ImportStatus.PENDING.name,
+    )
+    created_students = models.PositiveIntegerField(default=0)
+    created_teachers = models.PositiveIntegerField(default=0)
+    enrolled = models.PositiveIntegerField(default=0)
+    assigned = models.PositiveIntegerField(default=0)
+    # [{"row": 3, "message": "..."}, ...]
+    errors = models.JSONField(default=list)
+    # CSV row number (the header is row 1) of the last batch saved.
+    last_row = models.PositiveIntegerField(default=1)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="user_import_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"User import #{self.pk} ({self.status})"
+
+    @property
+    def is_pending(self) -> bool:
+        return self.status == ImportStatus.PENDING.name
+
+    @property
+    def total_created(self) -> int:
+        return self.created_students + self.created_teachers
+
+    @classmethod
+    @retry_on_database_lock()
+    @transaction.atomic
+    def claim_due(cls, limit: int, lease: timedelta) -> List["UserImport"]:
+        """
+        Lease up to `limit` pending imports, oldest first. An import whose
+        worker dies becomes due again once the lease runs out and carries on
+        from its `last_row`.
+        """
+        now = timezone.now()
+        due_ids = cls.objects.filter(
+            status=ImportStatus.PENDING.name, available_at__lte=now
+        ).order_by("id").values_list("pk", flat=True)[:limit]
+
+        claimed = []
+        for import_id in due_ids:
+            leased = cls.objects.filter(
+                pk=import_id, status=ImportStatus.PENDING.name, available_at__lte=now
+            ).update(available_at=now + lease)
+            if leased:
+                claimed.append(import_id)
+        return list(cls.objects.filter(pk__in=claimed).order_by("id"))
+
+    def finish(self, status: str, last_error: str = "") -> None:
+        self.status = status
+        self.last_error = last_error
+        self.processed_at = timezone.now()
+        self.csv_file.delete(save=False)
+        # The report fields are saved batch by batch while the import runs.
+        self.save(update_fields=["status", "last_error", "processed_at", "csv_file"])
@@ -0,0 +1,108 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpRequest
+
+# Only this app's tables are worth offloading; sessions, auth and content
+# types always come from the primary.
+REPLICATED_APPS = {"school_management"}
+PRIMARY_PIN_SESSION_KEY = "_primary_pinned_until"
+
+
+class RoutingState:
+    """What the current request may read from a replica, and what it already did."""
+
+    def __init__(self) -> None:
+        self.use_replica = False
+        self.wrote = False
+        self.read_replica = False
+
+
+_routing_state: ContextVar[Optional[RoutingState]] = ContextVar("replica_routing", default=None)
+
+
+def replica_aliases() -> List[str]:
+    return settings.DATABASE_REPLICAS
+
+
+@contextmanager
+def routing_scope() -> Iterator[RoutingState]:
+    """Track reads and writes of one request; nested scopes share the outer state."""
+    state = _routing_state.get()
+    if state is not None:
+        yield state
+        return
+    state = RoutingState()
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+
+@contextmanager
+def reading_from_replica() -> Iterator[RoutingState]:
+    with routing_scope() as state:
+        previous = state.use_replica
+        state.use_replica = True
+        try:
+            yield state
+        finally:
+            state.use_replica = previous
+
+
+def replica_was_read() -> bool:
+    state = _routing_state.get()
+    return state is not None and state.read_replica
+
+
+def is_pinned_to_primary(request: HttpRequest) -> bool:
+    session = getattr(request, "session", None)
+    return session is not None and session.get(PRIMARY_PIN_SESSION_KEY, 0) > time.time()
+
+
+def pin_to_primary(request: HttpRequest) -> None:
+    """Send this session's reads to the primary until replicas have caught up with its write."""
+    request.session[PRIMARY_PIN_SESSION_KEY] = time.time() + settings.REPLICA_MAX_LAG
+
+
+class ReplicaRouter:
+    """
+    Reads of views opted in with `read_from_replica` go to a random replica;
+    everything else uses the primary: writes, reads inside a transaction,
+    and any read after the request wrote something.
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        state = _routing_state.get()
+        if state is None or model._meta.app_label not in REPLICATED_APPS:
+            return None
+        if not state.use_replica or state.wrote or not replica_aliases():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        state.read_replica = True
+        return random.choice(replica_aliases())
+
+    def db_for_write(self, model, **hints) -> str:
+        state = _routing_state.get()
+        if state is not None and model._meta.app_label in REPLICATED_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> Optional[bool]:
+        # Replicas are copies of the primary file, never migrated on their own.
+        if db in replica_aliases():
+            return False
+        return None
@@ -0,0 +1,164 @@
+from typing import Iterable, List, Set
+
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from school_management.models import (
+    Course,
+    CustomUser,
+    Experience,
+    Filia,
+    Goal,
+    Group,
+    Notification,
+    StudentGroupMembership,
+    Teacher,
+)
+from school_management.utils.caching import (
+    CATALOG_TAG,
+    course_tag,
+    filia_tag,
+    invalidate_tags_on_commit,
+)
+from school_management.utils.notification_broker import broker
+from school_management.utils.people_search import install_search_index
+
+
+@receiver(post_delete, sender=StudentGroupMembership)
+def release_membership_seat(sender, instance: StudentGroupMembership, **kwargs) -> None:
+    # Sent for every row, also by queryset, cascading and admin bulk deletes.
+    Group.shift_enrolled_count([instance.group_id], -1)
+
+
+@receiver(post_delete, sender=Notification)
+def discount_deleted_unread_notification(sender, instance: Notification, **kwargs) -> None:
+    # Queryset and admin deletes bypass the methods that keep the counter;
+    # connecting this receiver makes them send post_delete for every row.
+    if not instance.is_read:
+        CustomUser.objects.filter(pk=instance.user_id, unread_notifications__gt=0).update(
+            unread_notifications=F("unread_notifications") - 1
+        )
+        broker.publish_on_commit([instance.user_id])
+
+
+@receiver(post_migrate)
+def install_people_search(sender, using: str, **kwargs) -> None:
+    if sender.name == "school_management":
+        install_search_index(connections[using])
+
+
+def _course_tags(course_ids: Iterable[int]) -> List[str]:
+    return [CATALOG_TAG, *map(course_tag, course_ids)]
+
+
+@receiver(post_init, sender=Group)
+def remember_group_placement(sender, instance: Group, **kwargs) -> None:
+    # A group moved to another course or filia must also refresh the old pages.
+    # Read the raw attributes: touching a deferred field here would reload it.
+    instance._cached_placement = (instance.__dict__.get("course_id"), instance.__dict__.get("filia_id"))
+
+
+@receiver([post_save, post_delete], sender=Group)
+def invalidate_group_pages(sender, instance: Group, **kwargs) -> None:
+    old_course_id, old_filia_id = getattr(instance, "_cached_placement", (None, None))
+    course_ids = {instance.course_id, old_course_id} - {None}
+    filia_ids = {instance.filia_id, old_filia_id} - {None}
+    invalidate_tags_on_commit([*_course_tags(course_ids), *map(filia_tag, filia_ids)])
+    instance._cached_placement = (instance.course_id, instance.filia_id)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_pages(sender, instance: Course, **kwargs) -> None:
+    # On delete the cascaded groups refresh their filias themselves.
+    filia_ids = Group.objects.filter(course_id=instance.pk).values_list("filia_id", flat=True)
+    invalidate_tags_on_commit([*_course_tags([instance.pk]), *map(filia_tag, set(filia_ids))])
+
+
+@receiver([post_save, post_delete], sender=Filia)
+def invalidate_filia_pages(sender, instance: Filia, **kwargs) -> None:
+    course_ids = Group.objects.filter(filia_id=instance.pk).values_list("course_id", flat=True)
+    invalidate_tags_on_commit([filia_tag(instance.pk), *_course_tags(set(course_ids))])
+
+
+def _course_attributes_changed(course_ids: Iterable[int]) -> None:
+    # Experience and goals are shown on the course pages but live in other
+    # tables, so the courses' own timestamps are moved forward explicitly.
+    course_ids = list(course_ids)
+    Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
+    invalidate_tags_on_commit(_course_tags(course_ids))
+
+
+@receiver(post_save, sender=Experience)
+@receiver(post_save, sender=Goal)
+def invalidate_attribute_pages(sender, instance, **kwargs) -> None:
+    _course_attributes_changed(instance.courses.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Experience)
+@receiver(pre_delete, sender=Goal)
+def remember_attribute_courses(sender, instance, **kwargs) -> None:
+    # The through rows go away in a bulk delete that sends no m2m_changed.
+    instance._cached_course_ids = list(instance.courses.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Experience)
+@receiver(post_delete, sender=Goal)
+def invalidate_deleted_attribute_pages(sender, instance, **kwargs) -> None:
+    _course_attributes_changed(getattr(instance, "_cached_course_ids", []))
+
+
+@receiver(m2m_changed, sender=Course.experience.through)
+@receiver(m2m_changed, sender=Course.goals.through)
+def invalidate_course_attribute_pages(
+    sender, instance, action: str, reverse: bool, pk_set: Set[int], **kwargs
+) -> None:
+    if not reverse:
+        if action.startswith("post_"):
+            _course_attributes_changed([instance.pk])
+        return
+
+    # Clearing from the experience/goal side reports no pk_set.
+    if action == "pre_clear":
+        instance._cached_course_ids = list(instance.courses.values_list("pk", flat=True))
+    elif action == "post_clear":
+        _course_attributes_changed(getattr(instance, "_cached_course_ids", []))
+    elif action.startswith("post_"):
+        _course_attributes_changed(pk_set)
+
+
+@receiver(m2m_changed, sender=Teacher.teacher_groups.through)
+def bump_teacher_group_versions(
+    sender, instance, action: str, reverse: bool, pk_set: Set[int], **kwargs
+) -> None:
+    if reverse:
+        if action.startswith("post_"):
+            Group.bump_membership_version([instance.pk])
+        return
+
+    # Clearing from the teacher side reports no pk_set.
+    if action == "pre_clear":
+        instance._cached_group_ids = list(instance.teacher_groups.values_list("pk", flat=True))
+    elif action == "post_clear":
+        Group.bump_membership_version(getattr(instance, "_cached_group_ids", []))
+    elif action.startswith("post_"):
+        Group.bump_membership_version(pk_set)
+
+
+@receiver(pre_delete, sender=Teacher)
+def remember_teacher_groups(sender, instance: Teacher, **kwargs) -> None:
+    instance._cached_group_ids = list(instance.teacher_groups.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Teacher)
+def bump_deleted_teacher_groups(sender, instance: Teacher, **kwargs) -> None:
+    Group.bump_membership_version(getattr(instance, "_cached_group_ids", []))
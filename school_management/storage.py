@@ -0,0 +1,56 @@
+import gzip
+import os
+from typing import Iterator, Tuple
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # Without brotli (see requirements.txt) only gzip variants are written.
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".txt", ".html", ".json", ".xml", ".map", ".ico"}
+# Below this size the encoding headers cost more than compression saves.
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content-hashed static files with precompressed `.br` and `.gz` siblings
+    written at collectstatic time, for `PrecompressedStaticFilesMiddleware`
+    to serve.
+    """
+
+    # Templates reference a few assets that are not in the repo; fall back to
+    # the plain name instead of failing the whole page render.
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run: bool = False, **options) -> Iterator[Tuple[str, str, bool]]:
+        processed = super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            yield from processed
+            return
+
+        for name, hashed_name, was_processed in processed:
+            yield name, hashed_name, was_processed
+            if isinstance(was_processed, Exception) or not hashed_name:
+                continue
+            for target in (name, hashed_name):
+                self.write_compressed_variants(target)
+
+    def write_compressed_variants(self, name: str) -> None:
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return
+        path = self.path(name)
+        with open(path, "rb") as source:
+            content = source.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+
+        variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(content, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(content):
+                with open(path + suffix, "wb") as target:
+                    target.write(compressed)
@@ -1,3 +1,1514 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, suppress
+from datetime import timedelta
+from typing import List
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.contrib.sessions.models import Session
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, transaction
+from django.http import HttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .async_views import with_async_views
+from .middleware import PrecompressedStaticFilesMiddleware, RequestInstrumentationMiddleware
+from .storage import brotli
+from .models import (
+    Course,
+    CustomUser,
+    Experience,
+    Filia,
+    Goal,
+    Group,
+    Manager,
+    Notification,
+    NotificationOutbox,
+    Student,
+    StudentGroupMembership,
+    Teacher,
+    UserImport,
+)
+from .routers import (
+    PRIMARY_PIN_SESSION_KEY,
+    ReplicaRouter,
+    reading_from_replica,
+    replica_was_read,
+    routing_scope,
+)
+from .urls import sync_urlpatterns, urlpatterns
+from .utils.caching import CATALOG_TAG, course_tag, filia_tag, get_or_set_by_tags, get_tag_versions
+from .utils.course_recommendation import CourseRecommendation, get_course_index, recommend_courses
+from .utils.decorators.db_routing import read_from_replica
+from .utils.enums import (
+    AgeGroup,
+    EnrollmentOutcome,
+    GroupStatus,
+    ImportStatus,
+    ManagerRole,
+    NotificationType,
+    OutboxStatus,
+    SeatReservationOutcome,
+    UserType,
+)
+from .utils.filter_by_search_and_pagination import filter_by_search_and_paginate
+from .utils.filters import cached_choices
+from .utils.keyset_pagination import paginate_by_keyset
+from .utils.notification_broker import broker
+from .utils.people_search import filter_by_full_text
+from .utils.query_inspection import fingerprint_sql
+from .utils.role_access_checking import (
+    UserRoles,
+    get_user_role,
+    resolve_user_roles,
+    user_is_education_manager,
+    user_is_program_manager,
+    user_is_student,
+)
+from .utils.seat_reservation import claim_seats, reserve_course_seat
+from .utils.user_import import import_users, process_user_import
+
+
+class NotificationOutboxTests(TestCase):
+    """Outbox delivery is idempotent, skips vanished recipients and backs off on failure."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = [
+            Student.objects.create_user(email=f"student{index}@example.com", password="password")
+            for index in range(3)
+        ]
+        cls.course = Course.objects.create(name="Robotics")
+
+    def enqueue(self) -> NotificationOutbox:
+        return NotificationOutbox.enqueue(
+            user_ids=[student.pk for student in self.students],
+            course=self.course,
+            operation_type=NotificationType.ADDED.name,
+        )
+
+    def test_skips_recipients_deleted_after_enqueue(self):
+        record = self.enqueue()
+        self.students[1].delete()
+
+        self.assertEqual(record.deliver(batch_size=2), 2)
+        record.refresh_from_db()
+        self.assertEqual(record.status, OutboxStatus.PROCESSED.name)
+        self.assertEqual(
+            set(Notification.objects.values_list("user_id", flat=True)),
+            {self.students[0].pk, self.students[2].pk},
+        )
+
+    def test_redelivery_inserts_nothing_twice(self):
+        record = self.enqueue()
+        record.deliver(batch_size=2)
+        self.assertEqual(record.deliver(batch_size=2), 0)
+
+        self.assertEqual(Notification.objects.count(), 3)
+        self.students[0].refresh_from_db()
+        self.assertEqual(self.students[0].unread_notifications, 1)
+
+    def test_failed_delivery_backs_off_then_gives_up(self):
+        record = self.enqueue()
+        lease = timedelta(minutes=5)
+        [claimed] = NotificationOutbox.claim_due(limit=10, lease=lease)
+        self.assertEqual(NotificationOutbox.claim_due(limit=10, lease=lease), [])
+
+        claimed.mark_failed(RuntimeError("database is locked"), max_attempts=2)
+        claimed.refresh_from_db()
+        self.assertEqual((claimed.status, claimed.attempts), (OutboxStatus.PENDING.name, 1))
+        self.assertEqual(claimed.last_error, "RuntimeError: database is locked")
+        self.assertGreater(claimed.available_at, timezone.now())
+        self.assertEqual(NotificationOutbox.claim_due(limit=10, lease=lease), [])
+
+        NotificationOutbox.objects.filter(pk=record.pk).update(available_at=timezone.now())
+        [claimed] = NotificationOutbox.claim_due(limit=10, lease=lease)
+        claimed.mark_failed(RuntimeError("database is locked"), max_attempts=2)
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.status, OutboxStatus.FAILED.name)
+        NotificationOutbox.objects.filter(pk=record.pk).update(available_at=timezone.now())
+        self.assertEqual(NotificationOutbox.claim_due(limit=10, lease=lease), [])
+
+
+class UnreadNotificationCounterTests(TestCase):
+    """The unread counter follows reads and deletes, however they are made."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name="Robotics")
+        cls.student = Student.objects.create_user(email="student@example.com", password="password")
+        cls.other = Student.objects.create_user(email="other@example.com", password="password")
+        for user in [cls.student, cls.student, cls.student, cls.other]:
+            Notification().create_notification(user, cls.course, NotificationType.ADDED.name)
+
+    def unread(self, user) -> int:
+        return CustomUser.objects.get(pk=user.pk).unread_notifications
+
+    def test_mark_read_counts_a_notification_once(self):
+        notification = Notification.objects.filter(user=self.student).first()
+        self.assertEqual(self.unread(self.student), 3)
+
+        self.assertTrue(Notification.mark_read(self.student, notification.pk))
+        self.assertFalse(Notification.mark_read(self.student, notification.pk))
+        self.assertEqual(self.unread(self.student), 2)
+
+    def test_mark_read_ignores_another_users_notification(self):
+        notification = Notification.objects.get(user=self.other)
+
+        self.assertFalse(Notification.mark_read(self.student, notification.pk))
+        self.assertFalse(Notification.objects.get(pk=notification.pk).is_read)
+        self.assertEqual((self.unread(self.student), self.unread(self.other)), (3, 1))
+
+    def test_mark_all_read_resets_only_the_users_counter(self):
+        self.assertEqual(Notification.mark_all_read(self.student), 3)
+        self.assertEqual((self.unread(self.student), self.unread(self.other)), (0, 1))
+        self.assertFalse(Notification.objects.filter(user=self.student, is_read=False).exists())
+
+    def test_deleting_unread_notifications_discounts_them(self):
+        first, second, third = Notification.objects.filter(user=self.student).order_by("pk")
+        Notification.mark_read(self.student, first.pk)
+
+        Notification.objects.filter(pk__in=[first.pk, second.pk]).delete()
+        self.assertEqual(self.unread(self.student), 1)
+        third.delete()
+        self.assertEqual((self.unread(self.student), self.unread(self.other)), (0, 1))
+
+
+class GroupEnrollmentTests(TestCase):
+    """Bulk enrollment reports every requested id and writes the new members in one go."""
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(name="Robotics")
+        filia = Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+        cls.group = Group.objects.create(name="Group", course=course, filia=filia, group_size=10)
+        cls.students = [
+            Student.objects.create_user(email=f"student{index}@example.com", password="password")
+            for index in range(4)
+        ]
+        cls.group.add_students([cls.students[0].pk])
+        cls.teacher = Teacher.objects.create_user(email="teacher@example.com", password="password")
+
+    def test_outcomes_of_new_existing_and_unknown_ids(self):
+        member, first, second, _ = self.students
+        NotificationOutbox.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            outcomes = self.group.enroll_students([member.pk, first.pk, second.pk, self.teacher.pk, 999999])
+
+        self.assertEqual(
+            outcomes,
+            {
+                member.pk: EnrollmentOutcome.ALREADY_ENROLLED,
+                first.pk: EnrollmentOutcome.ADDED,
+                second.pk: EnrollmentOutcome.ADDED,
+                self.teacher.pk: EnrollmentOutcome.NOT_FOUND,
+                999999: EnrollmentOutcome.NOT_FOUND,
+            },
+        )
+        insert = f'INSERT INTO "{StudentGroupMembership._meta.db_table}"'
+        self.assertEqual(sum(query["sql"].startswith(insert) for query in queries), 1)
+
+        [record] = NotificationOutbox.objects.all()
+        self.assertEqual(record.user_ids, sorted([first.pk, second.pk]))
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.enrolled_count, 3)
+        self.assertEqual(set(self.group.students.all()), {member, first, second})
+
+    def test_add_students_fails_only_when_no_id_is_a_student(self):
+        self.assertFalse(self.group.add_students([self.teacher.pk, 999999]))
+        self.assertTrue(self.group.add_students([self.students[0].pk]))
+
+
+class SeatCapacityTests(TestCase):
+    """Seats are claimed with guarded updates, so no path overfills a group."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name="Robotics")
+        cls.filia = Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+        cls.group = Group.objects.create(name="Group", course=cls.course, filia=cls.filia, group_size=2)
+        cls.students = [
+            Student.objects.create_user(email=f"student{index}@example.com", password="password")
+            for index in range(4)
+        ]
+        cls.manager = Manager.objects.create_user(
+            email="manager@example.com", password="password", role=ManagerRole.EDU_MANAGER.value[0]
+        )
+
+    def test_claims_are_all_or_nothing(self):
+        self.assertFalse(claim_seats(self.group.pk, 3))
+        self.assertTrue(claim_seats(self.group.pk, 2))
+        self.assertFalse(claim_seats(self.group.pk, 1))
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.enrolled_count, 2)
+
+    def test_course_enrollment_stops_at_capacity(self):
+        outcomes = [reserve_course_seat(student.pk, self.course, self.filia)[0] for student in self.students[:3]]
+        self.assertEqual(
+            outcomes,
+            [SeatReservationOutcome.RESERVED, SeatReservationOutcome.RESERVED, SeatReservationOutcome.NO_SEATS],
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.enrolled_count, 2)
+        self.assertEqual(self.group.students.count(), 2)
+
+    def test_manager_cannot_add_more_students_than_free_seats(self):
+        self.client.force_login(self.manager)
+        url = reverse("education_add_students_to_group", args=[self.group.pk])
+        # A student took a seat after the manager opened the page.
+        reserve_course_seat(self.students[0].pk, self.course, self.filia)
+
+        self.client.post(url, {"student_ids": [student.pk for student in self.students[1:3]]})
+        self.group.refresh_from_db()
+        self.assertEqual((self.group.enrolled_count, self.group.students.count()), (1, 1))
+
+        self.client.post(url, {"student_ids": [self.students[1].pk]})
+        self.group.refresh_from_db()
+        self.assertEqual((self.group.enrolled_count, self.group.students.count()), (2, 2))
+
+    def test_every_way_of_deleting_a_membership_frees_its_seat(self):
+        group = Group.objects.get(pk=self.group.pk)
+        group.group_size = 4
+        group.save()
+        group.add_students([student.pk for student in self.students])
+        self.assertEqual(Group.objects.get(pk=group.pk).enrolled_count, 4)
+
+        StudentGroupMembership.objects.get(group=group, student=self.students[0]).delete()
+        self.assertEqual(Group.objects.get(pk=group.pk).enrolled_count, 3)
+        StudentGroupMembership.objects.filter(group=group, student__in=self.students[1:3]).delete()
+        group.refresh_from_db()
+        self.assertEqual(group.enrolled_count, 1)
+        self.assertTrue(group.remove_students([self.students[3].pk]))
+        self.assertEqual((group.enrolled_count, Group.objects.get(pk=group.pk).enrolled_count), (0, 0))
+
+    def test_deleting_a_student_frees_their_seats(self):
+        self.group.add_students([self.students[0].pk, self.students[1].pk])
+        self.students[0].delete()
+        self.group.refresh_from_db()
+        self.assertEqual((self.group.enrolled_count, self.group.students.count()), (1, 1))
+
+
+class DatabaseLockRetryTests(TransactionTestCase):
+    """Writers that lose the SQLite write lock are rerun in a fresh transaction, never inside someone else's."""
+
+    def setUp(self):
+        self.course = Course.objects.create(name="Robotics")
+        self.filia = Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+        self.group = Group.objects.create(name="Group", course=self.course, filia=self.filia)
+        self.student = Student.objects.create_user(email="student@example.com", password="password")
+        self.locked_writes = 0
+
+    def lock_first_write(self, table: str):
+        """Fail the first write to `table` the way SQLite does after its busy timeout."""
+        def execute(run, sql, params, many, context):
+            if not self.locked_writes and sql.startswith(("INSERT", "UPDATE", "DELETE")) and f'"{table}"' in sql:
+                self.locked_writes += 1
+                raise OperationalError("database is locked")
+            return run(sql, params, many, context)
+        return connection.execute_wrapper(execute)
+
+    def test_locked_writer_is_retried(self):
+        with (
+            self.lock_first_write(StudentGroupMembership._meta.db_table),
+            self.assertLogs("school_management.utils.decorators.db_retry", "WARNING") as logs,
+        ):
+            self.assertTrue(self.group.add_students([self.student.pk]))
+
+        self.assertEqual(self.locked_writes, 1)
+        self.assertIn("add_students hit a locked database (attempt 1/3)", logs.output[0])
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.enrolled_count, 1)
+        self.assertEqual(list(self.group.students.all()), [self.student])
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+    def test_no_retry_inside_an_outer_transaction(self):
+        with (
+            transaction.atomic(),
+            self.lock_first_write(StudentGroupMembership._meta.db_table),
+            self.assertLogs("school_management.utils.decorators.exceptions", "ERROR"),
+        ):
+            self.assertFalse(self.group.add_students([self.student.pk]))
+
+        self.assertEqual(self.locked_writes, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.enrolled_count, 0)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_locked_import_batch_is_retried(self):
+        csv_file = io.StringIO(
+            "role,email,first_name,last_name,phone_number,group\n"
+            f"student,new@example.com,Ivan,Petrenko,(050) 123-45-67,{self.group.pk}\n"
+        )
+        with (
+            self.lock_first_write(StudentGroupMembership._meta.db_table),
+            self.assertLogs("school_management.utils.decorators.db_retry", "WARNING"),
+        ):
+            report = import_users(csv_file, workers=1)
+
+        self.assertEqual(self.locked_writes, 1)
+        self.assertEqual((report.created["student"], report.enrolled, report.errors), (1, 1, []))
+        self.assertEqual(Student.objects.filter(email="new@example.com").count(), 1)
+
+
+class RoleResolutionTests(TestCase):
+    """Roles come from the user's own columns, are resolved once per request and never written there."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            "student": Student.objects.create_user(email="student@example.com", password="password"),
+            "teacher": Teacher.objects.create_user(email="teacher@example.com", password="password"),
+            "education_manager": Manager.objects.create_user(
+                email="education@example.com", password="password", role=ManagerRole.EDU_MANAGER.value[0]
+            ),
+            "program_manager": Manager.objects.create_user(
+                email="program@example.com", password="password", role=ManagerRole.PROG_MANAGER.value[0]
+            ),
+        }
+
+    def fresh(self, role: str) -> CustomUser:
+        return CustomUser.objects.get(pk=self.users[role].pk)
+
+    def test_roles_come_from_the_loaded_user(self):
+        for role in self.users:
+            with self.subTest(role=role):
+                user = self.fresh(role)
+                with self.assertNumQueries(0):
+                    self.assertEqual(get_user_role(user), role)
+        self.assertIsNone(get_user_role(AnonymousUser()))
+        self.assertFalse(user_is_student(AnonymousUser()))
+
+    def test_roles_are_resolved_once_per_user_object(self):
+        user = self.fresh("program_manager")
+        roles = resolve_user_roles(user)
+        self.assertEqual(roles, UserRoles(is_manager=True, manager_role=ManagerRole.PROG_MANAGER.value[0]))
+        self.assertIs(user._resolved_roles, roles)
+        self.assertIs(resolve_user_roles(user), roles)
+
+    def test_rows_without_role_columns_are_resolved_read_only(self):
+        CustomUser.objects.filter(pk=self.users["education_manager"].pk).update(user_type="", manager_role="")
+        user = self.fresh("education_manager")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(user_is_education_manager(user))
+            self.assertFalse(user_is_program_manager(user))
+        self.assertEqual([query["sql"].split()[0] for query in queries], ["SELECT"])
+        self.assertEqual(self.fresh("education_manager").user_type, "")
+
+        call_command("backfill_user_roles", stdout=io.StringIO())
+        user = self.fresh("education_manager")
+        self.assertEqual(
+            (user.user_type, user.manager_role), (UserType.MANAGER.value[0], ManagerRole.EDU_MANAGER.value[0])
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(user_is_education_manager(user))
+
+
+class CacheTagInvalidationTests(TestCase):
+    """Saving a course, filia or group bumps the tags of every page that shows it, once committed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name="Robotics")
+        cls.other_course = Course.objects.create(name="Design")
+        cls.filia = Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+        cls.other_filia = Filia.objects.create(name="Left bank", city="Kyiv", address="Dnipro st. 2")
+        cls.group = Group.objects.create(name="Group", course=cls.course, filia=cls.filia, group_size=10)
+
+    def setUp(self):
+        cache.clear()
+        self.tags = [
+            CATALOG_TAG,
+            course_tag(self.course.pk),
+            course_tag(self.other_course.pk),
+            filia_tag(self.filia.pk),
+            filia_tag(self.other_filia.pk),
+        ]
+
+    def bumped_tags(self, change) -> set:
+        before = get_tag_versions(self.tags)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+            self.assertEqual(get_tag_versions(self.tags), before)
+        after = get_tag_versions(self.tags)
+        return {tag for tag in self.tags if after[tag] != before[tag]}
+
+    def test_saving_a_course_bumps_it_and_its_filias(self):
+        self.assertEqual(
+            self.bumped_tags(self.course.save),
+            {CATALOG_TAG, course_tag(self.course.pk), filia_tag(self.filia.pk)},
+        )
+
+    def test_saving_a_filia_bumps_it_and_its_courses(self):
+        self.assertEqual(
+            self.bumped_tags(self.filia.save),
+            {CATALOG_TAG, course_tag(self.course.pk), filia_tag(self.filia.pk)},
+        )
+
+    def test_moving_a_group_bumps_old_and_new_placement(self):
+        group = Group.objects.get(pk=self.group.pk)
+        group.course, group.filia = self.other_course, self.other_filia
+        self.assertEqual(self.bumped_tags(group.save), set(self.tags))
+
+    def test_cached_value_is_recomputed_after_a_save(self):
+        tags = [course_tag(self.course.pk)]
+        self.assertEqual(get_or_set_by_tags("course-name", tags, lambda: "Robotics"), "Robotics")
+        self.assertEqual(get_or_set_by_tags("course-name", tags, lambda: "stale"), "Robotics")
+
+        self.course.name = "Robotics 2"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+        self.assertEqual(get_or_set_by_tags("course-name", tags, lambda: self.course.name), "Robotics 2")
+
+
+class FacetedFilterTests(TestCase):
+    """Filter checkboxes carry the count each option would match, all counted in one query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.program_manager = Manager.objects.create_user(
+            email="program@example.com", password="password", role=ManagerRole.PROG_MANAGER.value[0]
+        )
+        cls.scratch = Experience.objects.create(name="Scratch")
+        cls.python = Experience.objects.create(name="Python")
+        cls.central = Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+        cls.left_bank = Filia.objects.create(name="Left bank", city="Kyiv", address="Dnipro st. 2")
+
+        cls.robotics = Course.objects.create(name="Robotics", age_group=AgeGroup.PRETEEN.value[0])
+        cls.robotics.experience.add(cls.scratch)
+        cls.web = Course.objects.create(name="Web", age_group=AgeGroup.TEENAGER.value[0])
+        cls.web.experience.add(cls.python)
+        cls.design = Course.objects.create(name="Design", age_group=AgeGroup.PRETEEN.value[0])
+        cls.design.experience.add(cls.scratch, cls.python)
+
+        Group.objects.create(name="Robotics 1", course=cls.robotics, filia=cls.central)
+        Group.objects.create(name="Web 1", course=cls.web, filia=cls.central)
+        Group.objects.create(name="Web 2", course=cls.web, filia=cls.left_bank)
+        Group.objects.create(
+            name="Design 1", course=cls.design, filia=cls.left_bank,
+            status=GroupStatus.EDUCATION_STARTED.value[0],
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def labels(self, response, name: str) -> List[str]:
+        return [str(checkbox.choice_label) for checkbox in response.context["filter"].form[name]]
+
+    def test_courses_page_labels_options_with_counts(self):
+        response = self.client.get(reverse("courses"))
+
+        self.assertEqual(self.labels(response, "experience"), ["Scratch (2)", "Python (2)"])
+        self.assertEqual(self.labels(response, "filia"), ["Central - Kyiv (2)", "Left bank - Kyiv (2)"])
+        self.assertContains(response, "Scratch (2)")
+        self.assertContains(response, "Left bank - Kyiv (2)")
+
+    def test_courses_selection_keeps_its_own_facet_counts(self):
+        response = self.client.get(reverse("courses"), {"filia": [self.central.pk]})
+
+        self.assertEqual(
+            {course.name for course in response.context["courses"]}, {"Robotics", "Web"}
+        )
+        self.assertEqual(self.labels(response, "filia"), ["Central - Kyiv (2)", "Left bank - Kyiv (2)"])
+        self.assertEqual(self.labels(response, "experience"), ["Scratch (1)", "Python (1)"])
+
+    def test_groups_page_labels_options_with_counts(self):
+        self.client.force_login(self.program_manager)
+        response = self.client.get(reverse("program_manage_groups"))
+
+        self.assertEqual(self.labels(response, "course"), ["Robotics (1)", "Web (2)", "Design (1)"])
+        self.assertEqual(
+            self.labels(response, "status"),
+            ["Enrollment Started (3)", "Education Started (1)", "Education Completed (0)"],
+        )
+        self.assertContains(response, "Web (2)")
+
+    def test_groups_selection_keeps_its_own_facet_counts(self):
+        self.client.force_login(self.program_manager)
+        response = self.client.get(
+            reverse("program_manage_groups"), {"course": [self.web.pk], "filia": [self.left_bank.pk]}
+        )
+
+        self.assertEqual([group.name for group in response.context["groups"]], ["Web 2"])
+        self.assertEqual(self.labels(response, "course"), ["Robotics (0)", "Web (1)", "Design (1)"])
+        self.assertEqual(self.labels(response, "filia"), ["Central - Kyiv (1)", "Left bank - Kyiv (1)"])
+        self.assertEqual(
+            self.labels(response, "status"),
+            ["Enrollment Started (1)", "Education Started (0)", "Education Completed (0)"],
+        )
+
+    def test_all_facets_are_counted_in_one_union_query(self):
+        self.client.force_login(self.program_manager)
+        for url_name, params in [
+            ("courses", {}),
+            ("courses", {"filia": [self.central.pk], "experience": [self.scratch.pk]}),
+            ("program_manage_groups", {}),
+            ("program_manage_groups", {"course": [self.web.pk], "status": ["education_started"]}),
+        ]:
+            with self.subTest(url_name=url_name, params=params):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(reverse(url_name), params)
+                counting = [query["sql"] for query in queries if "COUNT(" in query["sql"]]
+                self.assertEqual(len(counting), 1, counting)
+                self.assertEqual(counting[0].count("UNION ALL"), 2)
+
+    def test_warm_choices_skip_the_option_tables(self):
+        self.client.get(reverse("courses"))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("courses"), {"sort": "name_desc"})
+        # Prefetches still read the rows they need; only the full option lists are cached.
+        option_lists = [f'FROM "{model._meta.db_table}"' for model in (Experience, Filia)]
+        self.assertFalse([
+            query["sql"] for query in queries
+            if any(query["sql"].endswith(option_list) or f"{option_list} ORDER BY" in query["sql"]
+                   for option_list in option_lists)
+        ])
+
+    def test_catalog_edit_refreshes_cached_choices(self):
+        self.assertIn((self.scratch.pk, "Scratch"), cached_choices(Experience.objects.all()))
+
+        self.scratch.name = "Scratch Junior"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.scratch.save()
+
+        self.assertIn((self.scratch.pk, "Scratch Junior"), cached_choices(Experience.objects.all()))
+        response = self.client.get(reverse("courses"))
+        self.assertEqual(self.labels(response, "experience"), ["Scratch Junior (2)", "Python (2)"])
+
+
+class ConditionalGetTests(TestCase):
+    """Course pages answer revalidation with 304, and validators never carry over between visitors."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name="Robotics")
+        cls.students = [
+            Student.objects.create_user(email=f"student{index}@example.com", password="password")
+            for index in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("course_details", args=[self.course.pk])
+
+    def test_anonymous_revalidation_gets_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        self.course.name = "Robotics 2"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Robotics 2")
+
+    def test_signed_in_visitors_never_share_validators(self):
+        etags = []
+        for student in self.students:
+            self.client.force_login(student)
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("Last-Modified", response)
+            etags.append(response["ETag"])
+        self.assertNotEqual(*etags)
+
+        # The second student revalidating with the first one's copy gets a full page.
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[0]).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[1]).status_code, 304)
+
+
+@override_settings(REQUEST_INSTRUMENTATION={"ENABLED": True, "SAMPLE_RATE": 1.0, "REPEATED_QUERY_THRESHOLD": 3})
+class RequestInstrumentationTests(TestCase):
+    """Sampled requests report their query count and timings in a header and one JSON log line."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+
+    def setUp(self):
+        # The catalog pages are cached; a hit would run no queries.
+        cache.clear()
+
+    def test_reports_queries_and_timings(self):
+        with self.assertLogs("school_management.instrumentation", "INFO") as logs:
+            response = self.client.get(reverse("filias"))
+
+        [line] = logs.records
+        report = json.loads(line.getMessage())
+        self.assertEqual(
+            {key: report[key] for key in ["method", "path", "status", "view"]},
+            {"method": "GET", "path": reverse("filias"), "status": 200, "view": "filias"},
+        )
+        self.assertGreater(report["queries"], 0)
+        self.assertIsNotNone(report["template_ms"])
+        self.assertEqual(
+            [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")], ["db", "tpl", "total"]
+        )
+        self.assertIn(f'desc="{report["queries"]} queries"', response["Server-Timing"])
+
+    def test_logs_repeated_queries(self):
+        def view(request):
+            for filia_id in range(3):
+                list(Filia.objects.filter(pk=filia_id))
+            return HttpResponse()
+
+        middleware = RequestInstrumentationMiddleware(view)
+        with self.assertLogs("school_management.instrumentation", "INFO") as logs:
+            response = middleware(RequestFactory().get("/"))
+
+        report = json.loads(logs.records[0].getMessage())
+        self.assertEqual((report["queries"], report["template_ms"]), (3, None))
+        self.assertEqual(list(report["repeated_queries"].values()), [3])
+        self.assertTrue(response["Server-Timing"].startswith("db;dur="))
+
+    def test_disabled_middleware_is_left_out(self):
+        with self.settings(REQUEST_INSTRUMENTATION={"ENABLED": False}):
+            with self.assertRaises(MiddlewareNotUsed):
+                RequestInstrumentationMiddleware(HttpResponse)
+            response = Client().get(reverse("filias"))
+        self.assertNotIn("Server-Timing", response)
+
+
+class PrecompressedStaticFilesTests(SimpleTestCase):
+    """Collected static files are served in the best accepted encoding with the right lifetime."""
+
+    STYLESHEET = b"body { margin: 0; padding: 0; }\n" * 32
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        source = cls.enterClassContext(tempfile.TemporaryDirectory())
+        base = cls.enterClassContext(tempfile.TemporaryDirectory())
+        root = os.path.join(base, "staticfiles")
+        # Right outside STATIC_ROOT, for the traversal check.
+        with open(os.path.join(base, "secret.txt"), "w") as secret:
+            secret.write("secret")
+        os.makedirs(os.path.join(source, "css"))
+        with open(os.path.join(source, "css", "site.css"), "wb") as stylesheet:
+            stylesheet.write(cls.STYLESHEET)
+
+        cls.enterClassContext(
+            override_settings(
+                DEBUG=False,
+                STATIC_ROOT=root,
+                STATICFILES_DIRS=[source],
+                STORAGES={
+                    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                    "staticfiles": {"BACKEND": "school_management.storage.CompressedManifestStaticFilesStorage"},
+                },
+            )
+        )
+        call_command("collectstatic", interactive=False, verbosity=0)
+        cls.hashed_name = staticfiles_storage.stored_name("css/site.css")
+
+    def setUp(self):
+        self.middleware = PrecompressedStaticFilesMiddleware(lambda request: HttpResponse("app", status=404))
+        self.factory = RequestFactory()
+
+    def get(self, path: str, **headers) -> HttpResponse:
+        response = self.middleware(self.factory.get(path, **headers))
+        self.addCleanup(response.close)
+        return response
+
+    def test_hashed_name_is_gzipped_and_immutable(self):
+        self.assertNotEqual(self.hashed_name, "css/site.css")
+        response = self.get(f"/static/{self.hashed_name}", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["Cache-Control"], PrecompressedStaticFilesMiddleware.IMMUTABLE)
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), self.STYLESHEET)
+
+    def test_brotli_is_preferred_when_accepted(self):
+        self.assertTrue(os.path.isfile(staticfiles_storage.path(self.hashed_name) + ".br"))
+        response = self.get(f"/static/{self.hashed_name}", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(b"".join(response.streaming_content)), self.STYLESHEET)
+
+    def test_encodings_follow_q_values(self):
+        for accept_encoding, expected in [
+            ("br;q=0, gzip", "gzip"),
+            ("br; q=0.5, gzip;q=0.8", "gzip"),
+            ("gzip;q=0.5, br;q=0.5", "br"),
+            ("*", "br"),
+            ("*;q=0, gzip", "gzip"),
+            ("br;q=0, gzip;q=0", None),
+            ("deflate, gzipx", None),
+        ]:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(f"/static/{self.hashed_name}", HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertEqual(response.get("Content-Encoding"), expected)
+
+    def test_plain_name_is_short_lived_and_identity_without_accept_encoding(self):
+        response = self.get("/static/css/site.css")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response["Cache-Control"], PrecompressedStaticFilesMiddleware.SHORT_LIVED)
+        self.assertEqual(b"".join(response.streaming_content), self.STYLESHEET)
+
+    def test_unmodified_file_gets_304_with_cache_headers(self):
+        last_modified = self.get(f"/static/{self.hashed_name}")["Last-Modified"]
+        response = self.get(f"/static/{self.hashed_name}", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["Cache-Control"], PrecompressedStaticFilesMiddleware.IMMUTABLE)
+
+    def test_other_paths_fall_through_to_the_app(self):
+        for path in ["/static/../secret.txt", "/static/css/missing.css", "/static/css/", "/courses/"]:
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).content, b"app")
+        response = self.middleware(self.factory.post(f"/static/{self.hashed_name}"))
+        self.assertEqual(response.content, b"app")
+
+
+class CourseRecommendationTests(TestCase):
+    """Courses are ranked in memory from an index rebuilt whenever the catalog changes."""
+
+    AGE_GROUP = AgeGroup.PRETEEN.value[0]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.scratch = Experience.objects.create(name="Scratch")
+        cls.goals = {name: Goal.objects.create(name=name) for name in ["Logic", "Robots", "Games", "Design"]}
+        cls.courses = {
+            name: cls.create_course(name, goal_names)
+            for name, goal_names in [
+                ("Robot Logic", ["Logic", "Robots"]),
+                ("Everything", ["Logic", "Robots", "Games"]),
+                ("Arcade", ["Games"]),
+                ("Bots", ["Robots"]),
+                ("Automata", ["Robots"]),
+            ]
+        }
+        cls.create_course("Older Robots", ["Robots"], age_group=AgeGroup.TEENAGER.value[0])
+
+    @classmethod
+    def create_course(cls, name: str, goal_names: List[str], age_group: str = AGE_GROUP) -> Course:
+        course = Course.objects.create(name=name, age_group=age_group)
+        course.experience.add(cls.scratch)
+        course.goals.add(*(cls.goals[goal_name] for goal_name in goal_names))
+        return course
+
+    def setUp(self):
+        cache.clear()
+
+    def recommend(self, goal_names: List[str], limit: int = 5) -> List[str]:
+        return [
+            recommendation.name
+            for recommendation in recommend_courses(self.AGE_GROUP, "Scratch", goal_names, limit)
+        ]
+
+    def test_more_shared_goals_then_fewer_extra_goals_then_name(self):
+        self.assertEqual(
+            self.recommend(["Logic", "Robots"]), ["Robot Logic", "Everything", "Automata", "Bots"]
+        )
+        self.assertEqual(
+            recommend_courses(self.AGE_GROUP, "Scratch", ["Games"], limit=5),
+            [
+                CourseRecommendation(self.courses["Arcade"].pk, "Arcade", 1),
+                CourseRecommendation(self.courses["Everything"].pk, "Everything", 1),
+            ],
+        )
+
+    def test_limit_keeps_the_best(self):
+        self.assertEqual(self.recommend(["Robots"], limit=2), ["Automata", "Bots"])
+
+    def test_unknown_goals_or_bucket_recommend_nothing(self):
+        self.assertEqual(self.recommend(["Cooking"]), [])
+        self.assertEqual(recommend_courses(self.AGE_GROUP, "Python", ["Robots"]), [])
+
+    def test_warm_index_answers_without_queries(self):
+        self.recommend(["Robots"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.recommend(["Logic"]), ["Robot Logic", "Everything"])
+
+    def test_index_is_rebuilt_after_catalog_edits(self):
+        index = get_course_index()
+        arcade = self.courses["Arcade"]
+        with self.captureOnCommitCallbacks(execute=True):
+            arcade.goals.add(self.goals["Logic"])
+        self.assertIsNot(get_course_index(), index)
+        self.assertEqual(self.recommend(["Logic"]), ["Arcade", "Robot Logic", "Everything"])
+
+        goal = self.goals["Design"]
+        goal.name = "Drawing"
+        with self.captureOnCommitCallbacks(execute=True):
+            goal.save()
+            self.courses["Bots"].goals.add(goal)
+        self.assertEqual(self.recommend(["Drawing"]), ["Bots"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.get(pk=self.courses["Automata"].pk).delete()
+        self.assertEqual(self.recommend(["Robots"], limit=1), ["Bots"])
+
+
+class PeopleListingQueryCountTests(TestCase):
+    """The all-students and all-teachers pages must not query per row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = Manager.objects.create_user(
+            email="manager@example.com", password="password", role=ManagerRole.EDU_MANAGER.value[0]
+        )
+        course = Course.objects.create(name="Robotics")
+        filia = Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+        cls.groups = [
+            Group.objects.create(name=f"Group {index}", course=course, filia=filia, group_size=20)
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def add_people(self, count: int, offset: int) -> None:
+        for index in range(offset, offset + count):
+            student = Student.objects.create(email=f"student{index}@example.com", password="!")
+            teacher = Teacher.objects.create(email=f"teacher{index}@example.com", password="!")
+            for group in self.groups:
+                group.add_students([student.pk])
+                group.add_teachers([teacher.pk])
+
+    def count_queries(self, url_name: str) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_all_students_page_is_constant_in_queries(self):
+        self.add_people(1, offset=0)
+        small = self.count_queries("education_all_students")
+        self.add_people(5, offset=1)
+        large = self.count_queries("education_all_students")
+        self.assertEqual(small, large)
+
+    def test_all_teachers_page_is_constant_in_queries(self):
+        self.add_people(1, offset=0)
+        small = self.count_queries("education_all_teachers")
+        self.add_people(5, offset=1)
+        large = self.count_queries("education_all_teachers")
+        self.assertEqual(small, large)
+
+    def test_student_rows_carry_group_aggregates(self):
+        self.add_people(1, offset=0)
+        response = self.client.get(reverse("education_all_students"))
+        student = response.context["page_obj"].object_list[0]
+        self.assertEqual(student.groups_count, 3)
+        self.assertEqual(student.active_groups_count, 3)
+        self.assertEqual(student.unpaid_count, 3)
+
+
+class PeopleSearchTests(TestCase):
+    """The full-text index ranks people by relevance and follows every change to CustomUser."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ivanenko = Student.objects.create(
+            email="ivan@example.com", first_name="Ivan", last_name="Ivanenko", password="!"
+        )
+        cls.petrenko = Student.objects.create(
+            email="ivanka@example.com", first_name="Ivanka", last_name="Petrenko", password="!"
+        )
+        cls.teacher = Teacher.objects.create(
+            email="ivan.teacher@example.com", first_name="Ivan", last_name="Koval", password="!"
+        )
+
+    def search(self, query: str) -> List[Student]:
+        return list(filter_by_full_text(Student.objects.all(), query))
+
+    def test_best_match_comes_first(self):
+        self.assertEqual(self.search("ivanen"), [self.ivanenko])
+        self.assertEqual(self.search("iv")[0], self.ivanenko)
+        self.assertEqual(self.search("iv pet"), [self.petrenko])
+
+    def test_broad_prefix_keeps_every_match(self):
+        queryset = filter_by_full_text(Student.objects.exclude(pk=self.petrenko.pk), "i")
+        expected = Student.objects.exclude(pk=self.petrenko.pk).filter(first_name__istartswith="i")
+        self.assertEqual(queryset.count(), expected.count())
+        self.assertEqual(set(queryset), set(expected))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.ivanenko.last_name = "Shevchenko"
+        self.ivanenko.save()
+        self.assertEqual(self.search("ivanen"), [])
+        self.assertEqual(self.search("shev"), [self.ivanenko])
+
+        self.petrenko.delete()
+        self.assertEqual(self.search("petr"), [])
+        self.assertEqual(self.search("iv"), [self.ivanenko])
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages seek on the name index and keep search results in rank order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(7):
+            Student.objects.create(
+                email=f"student{index}@example.com", first_name="Ivan" if index % 2 else "Iryna",
+                last_name=f"Koval{index % 3}", password="!",
+            )
+        Student.objects.create(email="ivanenko@example.com", first_name="Petro", last_name="Ivanenko", password="!")
+
+    def walk(self, search_query: str) -> List[List[Student]]:
+        pages, cursor = [], None
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                page = filter_by_search_and_paginate(
+                    search_query, None, Student, ["first_name", "last_name", "email"],
+                    per_page=3, keyset=True, cursor=cursor,
+                )
+            pages.append(list(page))
+            if cursor:
+                self.seek_sql = queries.captured_queries[0]["sql"]
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_seek_on_the_name_and_pk_columns(self):
+        pages = self.walk("")
+        self.assertEqual(
+            [student for page in pages for student in page],
+            list(Student.objects.order_by("first_name", "last_name", "pk")),
+        )
+        self.assertIn(
+            '("school_management_customuser"."first_name", "school_management_customuser"."last_name", '
+            '"school_management_student"."customuser_ptr_id") >',
+            self.seek_sql,
+        )
+
+    def test_descending_pk_pages_cover_every_row_once(self):
+        pages, cursor = [], None
+        while True:
+            page = paginate_by_keyset(Student.objects.all(), ["-last_name", "-pk"], cursor, per_page=3)
+            pages.append(list(page))
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(
+            [student for page in pages for student in page],
+            list(Student.objects.order_by("-last_name", "-pk")),
+        )
+
+    def test_search_pages_follow_the_rank(self):
+        ranked = list(filter_by_full_text(Student.objects.all(), "iv"))
+        # Petro Ivanenko matches on two columns: first by rank, last by name.
+        self.assertEqual((len(ranked), ranked[0].last_name), (4, "Ivanenko"))
+        self.assertEqual([student for page in self.walk("iv") for student in page], ranked)
+
+
+class ViewQueryBudgetTests(TestCase):
+    """
+    Every named URL, requested as a role allowed to see it, must issue the
+    same number of queries on a small and on a grown dataset.
+    """
+
+    # url name -> (role, object the pk argument comes from, or None)
+    URLS = {
+        "home": (None, None),
+        "filias": (None, None),
+        "filia_details": (None, "filia"),
+        "courses": (None, None),
+        "course_details": ("student", "course"),
+        "contact_success": (None, None),
+        "login": (None, None),
+        "register": (None, None),
+        "logout": ("student", None),
+        "role_based_dashboard": ("student", None),
+        "student_dashboard": ("student", None),
+        "teacher_dashboard": ("teacher", None),
+        "education_manager_dashboard": ("education_manager", None),
+        "program_manager_dashboard": ("program_manager", None),
+        "program_manage_courses": ("program_manager", None),
+        "program_change_course": ("program_manager", "course"),
+        "program_add_course": ("program_manager", None),
+        "program_delete_course": ("program_manager", "course"),
+        "program_manage_groups": ("program_manager", None),
+        "program_add_group": ("program_manager", None),
+        "program_change_group": ("program_manager", "group"),
+        "program_delete_group": ("program_manager", "group"),
+        "education_manage_groups": ("education_manager", None),
+        "education_manage_group_details": ("education_manager", "group"),
+        "education_add_teachers_to_group": ("education_manager", "group"),
+        "education_add_students_to_group": ("education_manager", "group"),
+        "education_remove_teachers_from_group": ("education_manager", "group"),
+        "education_remove_students_from_group": ("education_manager", "group"),
+        "education_all_students": ("education_manager", None),
+        "education_all_teachers": ("education_manager", None),
+        "education_student_detail": ("education_manager", "student"),
+        "education_teacher_detail": ("education_manager", "teacher"),
+        "education_import_users": ("education_manager", None),
+        "education_user_import": ("education_manager", "user_import"),
+        "student_groups": ("student", None),
+        "student_group_details": ("student", "group"),
+        "teacher_groups": ("teacher", None),
+        "teacher_group_details": ("teacher", "group"),
+        "notifications": ("student", None),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            "education_manager": Manager.objects.create_user(
+                email="education@example.com", password="password", role=ManagerRole.EDU_MANAGER.value[0]
+            ),
+            "program_manager": Manager.objects.create_user(
+                email="program@example.com", password="password", role=ManagerRole.PROG_MANAGER.value[0]
+            ),
+            "student": Student.objects.create_user(email="student@example.com", password="password"),
+            "teacher": Teacher.objects.create_user(email="teacher@example.com", password="password"),
+        }
+        cls.experience = Experience.objects.create(name="Scratch")
+        cls.goal = Goal.objects.create(name="Programming")
+        cls.objects = {
+            "student": cls.users["student"],
+            "teacher": cls.users["teacher"],
+            "course": cls.create_course("Robotics"),
+            "filia": Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1"),
+        }
+        cls.objects["group"] = Group.objects.create(
+            name="Group", course=cls.objects["course"], filia=cls.objects["filia"], group_size=20
+        )
+        cls.objects["group"].add_students([cls.users["student"].pk])
+        cls.objects["group"].add_teachers([cls.users["teacher"].pk])
+        cls.objects["user_import"] = UserImport.objects.create(
+            uploaded_by=cls.users["education_manager"],
+            status=ImportStatus.PROCESSED.name,
+            errors=[{"row": 2, "message": "email is required."}],
+        )
+
+    @classmethod
+    def create_course(cls, name: str) -> Course:
+        course = Course.objects.create(name=name, description="Course.")
+        course.experience.add(cls.experience)
+        course.goals.add(cls.goal)
+        return course
+
+    def grow(self, size: int, offset: int) -> None:
+        """Add `size` of everything the pages under test list or join."""
+        group = self.objects["group"]
+        for index in range(offset, offset + size):
+            course = self.create_course(f"Course {index}")
+            filia = Filia.objects.create(name=f"Filia {index}", city="Lviv", address=f"Street {index}")
+            for other_course, other_filia in [(course, self.objects["filia"]), (self.objects["course"], filia)]:
+                other = Group.objects.create(name=f"Group {index}", course=other_course, filia=other_filia)
+                other.add_students([self.users["student"].pk])
+                other.add_teachers([self.users["teacher"].pk])
+
+            student = Student.objects.create(email=f"student{index}@example.com", password="!")
+            teacher = Teacher.objects.create(email=f"teacher{index}@example.com", password="!")
+            group.add_students([student.pk])
+            group.add_teachers([teacher.pk])
+        for record in NotificationOutbox.claim_due(limit=100, lease=timedelta(minutes=5)):
+            record.deliver(batch_size=500)
+
+    def capture(self, url_name: str) -> List[str]:
+        role, obj = self.URLS[url_name]
+        self.client.logout()
+        if role:
+            self.client.force_login(self.users[role])
+        args = [self.objects[obj].pk] if obj else []
+        # Budget the uncached path of the tag-cached catalog pages.
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name, args=args))
+        self.assertLess(response.status_code, 400, url_name)
+        return [query["sql"] for query in queries]
+
+    def test_every_named_url_is_budgeted(self):
+        named = {pattern.name for pattern in urlpatterns if pattern.name}
+        self.assertEqual(named, set(self.URLS))
+
+    def test_query_counts_do_not_grow_with_data(self):
+        self.grow(1, offset=0)
+        small = {url_name: self.capture(url_name) for url_name in self.URLS}
+        self.grow(4, offset=1)
+
+        for url_name, small_queries in small.items():
+            with self.subTest(url_name=url_name):
+                large_queries = self.capture(url_name)
+                small_counts = Counter(map(fingerprint_sql, small_queries))
+                grown = {
+                    sql: f"{small_counts[sql]} -> {count}"
+                    for sql, count in Counter(map(fingerprint_sql, large_queries)).items()
+                    if count > small_counts[sql]
+                }
+                self.assertEqual(
+                    len(small_queries), len(large_queries),
+                    "Queries that grew with the data:\n" + "\n".join(
+                        f"  [{change}] {sql}" for sql, change in grown.items()
+                    ),
+                )
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaRouterTests(TransactionTestCase):
+    """
+    Routing decisions only; no query is sent to the (unconfigured) replica.
+    Not a TestCase: its per-test transaction would keep every read on the primary.
+    """
+
+    router = ReplicaRouter()
+
+    def test_reads_outside_a_request_are_not_routed(self):
+        self.assertIsNone(self.router.db_for_read(Course))
+
+    def test_replica_reads_only_where_opted_in(self):
+        with routing_scope():
+            self.assertEqual(self.router.db_for_read(Course), DEFAULT_DB_ALIAS)
+            with reading_from_replica():
+                self.assertEqual(self.router.db_for_read(Course), "replica1")
+                self.assertIsNone(self.router.db_for_read(Session))
+
+    def test_transactions_and_writes_use_the_primary(self):
+        with reading_from_replica():
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(Course), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_write(Course), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Course), DEFAULT_DB_ALIAS)
+
+
+# The primary doubles as the replica, so views can run against the test database.
+@override_settings(DATABASE_REPLICAS=[DEFAULT_DB_ALIAS])
+class ReplicaStickinessTests(TestCase):
+    def test_write_pins_the_session_to_the_primary(self):
+        Student.objects.create_user(email="student@example.com", password="password")
+        self.client.get(reverse("courses"))
+        self.assertNotIn(PRIMARY_PIN_SESSION_KEY, self.client.session)
+
+        # Logging in writes last_login.
+        self.client.post(reverse("login"), {"username": "student@example.com", "password": "password"})
+        self.assertIn(PRIMARY_PIN_SESSION_KEY, self.client.session)
+
+
+class ReplicaReadAfterWriteTests(TransactionTestCase):
+    """
+    Not a TestCase, for the same reason as ReplicaRouterTests. The primary
+    doubles as the replica only inside each test: the router keeps replicas
+    out of migrations, so the flush after a test would skip every table.
+    """
+
+    @staticmethod
+    @read_from_replica
+    def course_count_view(request):
+        Course.objects.count()
+        return HttpResponse("replica" if replica_was_read() else "primary")
+
+    def read_source(self, session) -> str:
+        request = RequestFactory().get("/")
+        request.session, request.user = session, AnonymousUser()
+        return self.course_count_view(request).content.decode()
+
+    def test_reads_stick_to_the_primary_until_the_pin_expires(self):
+        Student.objects.create_user(email="student@example.com", password="password")
+        with self.settings(DATABASE_REPLICAS=[DEFAULT_DB_ALIAS]):
+            self.client.get(reverse("courses"))
+            self.assertEqual(self.read_source(self.client.session), "replica")
+
+            self.client.post(reverse("login"), {"username": "student@example.com", "password": "password"})
+            session = self.client.session
+            self.assertEqual(self.read_source(session), "primary")
+
+            session[PRIMARY_PIN_SESSION_KEY] = time.time() - 1
+            self.assertEqual(self.read_source(session), "replica")
+
+
+class SyncUrlconf:
+    urlpatterns = sync_urlpatterns
+
+
+class AsyncUrlconf:
+    urlpatterns = with_async_views(sync_urlpatterns)
+
+
+class AsyncViewTests(TestCase):
+    """The async views must serve what their sync counterparts serve."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create_user(email="student@example.com", password="password")
+        cls.course = Course.objects.create(name="Robotics", description="Course.")
+        cls.course.experience.add(Experience.objects.create(name="Scratch"))
+        cls.course.goals.add(Goal.objects.create(name="Programming"))
+        cls.filia = Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+        group = Group.objects.create(name="Group", course=cls.course, filia=cls.filia, group_size=20)
+        group.add_students([cls.student.pk])
+        for record in NotificationOutbox.claim_due(limit=100, lease=timedelta(minutes=5)):
+            record.deliver(batch_size=500)
+
+    def get(self, urlconf, url_name: str, *args):
+        cache.clear()
+        with override_settings(ROOT_URLCONF=urlconf):
+            return self.client.get(reverse(url_name, args=args))
+
+    def test_public_pages_match_the_sync_views(self):
+        pages = [
+            ("home",),
+            ("filias",),
+            ("filia_details", self.filia.pk),
+            ("courses",),
+            ("course_details", self.course.pk),
+            ("course_details", 0),
+        ]
+        for page in pages:
+            with self.subTest(page=page):
+                expected = self.get(SyncUrlconf, *page)
+                response = self.get(AsyncUrlconf, *page)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    def test_student_pages(self):
+        self.client.force_login(self.student)
+        response = self.get(AsyncUrlconf, "course_details", self.course.pk)
+        self.assertContains(response, f'<option value="{self.filia.pk}">')
+
+        response = self.get(AsyncUrlconf, "notifications")
+        self.assertContains(response, Notification.objects.get(user=self.student).wide_message)
+
+        with override_settings(ROOT_URLCONF=AsyncUrlconf):
+            self.client.post(reverse("notifications"), {"mark_all_read": "1"})
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.unread_notifications, 0)
+
+    def test_notifications_require_login(self):
+        self.assertEqual(self.get(AsyncUrlconf, "notifications").status_code, 401)
+
+
+@override_settings(ROOT_URLCONF=AsyncUrlconf)
+class NotificationStreamTests(TestCase):
+    """The event stream replays missed notifications and pushes new ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create_user(email="student@example.com", password="password")
+        cls.course = Course.objects.create(name="Robotics")
+        filia = Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+        cls.group = Group.objects.create(name="Group", course=cls.course, filia=filia, group_size=20)
+        cls.group.add_students([cls.student.pk])
+        for record in NotificationOutbox.claim_due(limit=100, lease=timedelta(minutes=5)):
+            record.deliver(batch_size=500)
+        cls.notification = Notification.objects.get(user=cls.student)
+
+    @asynccontextmanager
+    async def stream(self, **headers):
+        """Yield a queue of received events; leave like a client disconnecting."""
+        await self.async_client.aforce_login(self.student)
+        response = await self.async_client.get(reverse("notification_stream"), headers=headers)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = asyncio.Queue()
+
+        async def read():
+            async for event in response.streaming_content:
+                await events.put(event.decode())
+
+        reader = asyncio.create_task(read())
+        try:
+            yield events
+        finally:
+            # The ASGI handler cancels the response task on disconnect.
+            reader.cancel()
+            with suppress(asyncio.CancelledError):
+                await reader
+
+    async def test_replays_after_last_event_id(self):
+        async with self.stream(last_event_id="0") as events:
+            self.assertEqual(await events.get(), "retry: 3000\n\n")
+            event = await asyncio.wait_for(events.get(), timeout=5)
+        self.assertIn(f"id: {self.notification.pk}\nevent: notification\n", event)
+        self.assertIn(self.notification.wide_message, event)
+        self.assertEqual(broker.connections, 0)
+
+    async def test_pushes_new_notifications(self):
+        def notify():
+            with self.captureOnCommitCallbacks(execute=True):
+                Notification().create_notification(
+                    user=self.student, course=self.course,
+                    operation_type=NotificationType.REMOVED.name, group=self.group,
+                )
+
+        async with self.stream() as events:
+            await events.get()
+            await sync_to_async(notify)()
+            event = await asyncio.wait_for(events.get(), timeout=5)
+        self.assertIn("You were removed from Robotics - Group.", event)
+        self.assertNotIn(f"id: {self.notification.pk}\n", event)
+
+    async def test_resubscribing_right_after_the_last_unsubscribe_restarts_the_watcher(self):
+        first = broker.subscribe(self.student.pk)
+        stopped = broker._watcher
+        broker.unsubscribe(first)
+        second = broker.subscribe(self.student.pk)
+        watcher = broker._watcher
+        self.assertIsNot(watcher, stopped)
+        self.assertFalse(watcher.cancelling())
+
+        broker.unsubscribe(second)
+        for task in (stopped, watcher):
+            with suppress(asyncio.CancelledError):
+                await task
+        self.assertIsNone(broker._watcher)
+
+    async def test_rejects_streams_over_the_cap(self):
+        await self.async_client.aforce_login(self.student)
+        with override_settings(NOTIFICATION_STREAM={"MAX_CONNECTIONS": 0}):
+            response = await self.async_client.get(reverse("notification_stream"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(broker.connections, 0)
+
+
+class UserImportTests(TestCase):
+    """CSV imports create users and memberships and report every bad row."""
+
+    HEADER = "role,email,first_name,last_name,phone_number,password,group\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(name="Robotics")
+        filia = Filia.objects.create(name="Central", city="Kyiv", address="Main st. 1")
+        cls.group = Group.objects.create(name="Group", course=course, filia=filia, group_size=2)
+        Student.objects.create_user(email="taken@example.com", password="password")
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        rows = [
+            f"student,anna@example.com,Anna,Koval,(050) 123-45-67,secret,{self.group.pk}",
+            f"teacher,petro@example.com,Petro,Shevchenko,(050) 123-45-68,,{self.group.pk}",
+            "student,ivan@example.com,Ivan,Melnyk,0501234567,,",
+            "student,taken@example.com,Taken,User,(050) 123-45-69,,",
+            "student,olena@example.com,Olena,Bondar,(050) 123-45-70,,999",
+            "parent,oksana@example.com,Oksana,Tkachenko,(050) 123-45-71,,",
+            f"student,marta@example.com,Marta,Romanko,(050) 123-45-72,,{self.group.pk}",
+            f"student,maksym@example.com,Maksym,Senko,(050) 123-45-73,,{self.group.pk}",
+        ]
+        report = import_users(io.StringIO(self.HEADER + "\n".join(rows)), batch_size=4, workers=1)
+
+        self.assertEqual(report.created, {"student": 3, "teacher": 1})
+        self.assertEqual([error.row for error in report.errors], [4, 5, 6, 7, 9])
+        self.assertIn("Phone number must be in the format", report.errors[0].message)
+        self.assertIn("is full", report.errors[-1].message)
+
+        anna = Student.objects.get(email="anna@example.com")
+        self.assertTrue(anna.check_password("secret"))
+        self.assertFalse(Teacher.objects.get(email="petro@example.com").has_usable_password())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.enrolled_count, 2)
+        self.assertEqual(set(self.group.students.values_list("email", flat=True)),
+                         {"anna@example.com", "marta@example.com"})
+        self.assertEqual(list(self.group.teachers.values_list("email", flat=True)), ["petro@example.com"])
+        self.assertEqual(NotificationOutbox.objects.count(), 2)
+
+    def test_hashes_in_a_process_pool(self):
+        rows = "student,anna@example.com,Anna,Koval,(050) 123-45-67,secret,"
+        report = import_users(io.StringIO(self.HEADER + rows), workers=2)
+        self.assertEqual(report.errors, [])
+        self.assertTrue(Student.objects.get(email="anna@example.com").check_password("secret"))
+
+    def upload(self, content: bytes):
+        manager = Manager.objects.create_user(
+            email="manager@example.com", password="password", role=ManagerRole.EDU_MANAGER.value[0]
+        )
+        self.client.force_login(manager)
+        return self.client.post(
+            reverse("education_import_users"), {"csv_file": SimpleUploadedFile("users.csv", content)}
+        )
+
+    def test_upload_is_queued_and_imported_by_the_worker(self):
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            response = self.upload(
+                (self.HEADER + "student,anna@example.com,Anna,Koval,0501234567,,\n"
+                 "student,ivan@example.com,Ivan,Melnyk,(050) 123-45-67,,\n").encode()
+            )
+            user_import = UserImport.objects.get()
+            self.assertRedirects(response, reverse("education_user_import", args=[user_import.pk]))
+            self.assertFalse(Student.objects.filter(email="ivan@example.com").exists())
+            self.assertContains(self.client.get(response.url), "waiting to be imported")
+            path = user_import.csv_file.path
+            self.assertTrue(os.path.isfile(path))
+
+            call_command("process_user_imports", workers=1, stdout=io.StringIO())
+            self.assertFalse(os.path.exists(path))
+
+        user_import.refresh_from_db()
+        self.assertEqual((user_import.status, user_import.created_students), (ImportStatus.PROCESSED.name, 1))
+        self.assertTrue(Student.objects.filter(email="ivan@example.com").exists())
+        response = self.client.get(reverse("education_user_import", args=[user_import.pk]))
+        self.assertContains(response, "Created 1 student(s)")
+        self.assertContains(response, "Phone number must be in the format")
+
+    def test_file_that_is_not_utf8_fails_the_import(self):
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            self.upload((self.HEADER + "student,anna@example.com,Hanna,\xc4nna,0501234567,,").encode("latin-1"))
+            call_command("process_user_imports", workers=1, stdout=io.StringIO())
+
+        user_import = UserImport.objects.get()
+        self.assertEqual(user_import.status, ImportStatus.FAILED.name)
+        self.assertEqual(user_import.last_error, "The file is not a UTF-8 encoded CSV file.")
+        self.assertFalse(user_import.csv_file)
+
+    def test_import_of_a_dead_worker_resumes_after_its_last_batch(self):
+        inserts = 0
+
+        def die_on_second_batch(run, sql, params, many, context):
+            nonlocal inserts
+            if sql.startswith(f'INSERT INTO "{CustomUser._meta.db_table}"'):
+                inserts += 1
+                if inserts == 2:
+                    raise OperationalError("disk I/O error")
+            return run(sql, params, many, context)
+
+        rows = "".join(
+            f"student,student{index}@example.com,Anna,Koval,(050) 123-45-6{index},,\n" for index in range(4)
+        )
+        lease = timedelta(minutes=5)
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            self.upload((self.HEADER + "student,bad,Anna,Koval,0501234567,,\n" + rows).encode())
+            [user_import] = UserImport.claim_due(1, lease)
+            with connection.execute_wrapper(die_on_second_batch), self.assertRaises(OperationalError):
+                process_user_import(user_import, pool=None, batch_size=3)
+
+            user_import.refresh_from_db()
+            self.assertEqual(user_import.status, ImportStatus.PENDING.name)
+            self.assertEqual((user_import.last_row, user_import.created_students), (4, 2))
+            self.assertEqual(UserImport.claim_due(1, lease), [])
+
+            UserImport.objects.filter(pk=user_import.pk).update(available_at=timezone.now())
+            [user_import] = UserImport.claim_due(1, lease)
+            process_user_import(user_import, pool=None, batch_size=3)
+
+        user_import.refresh_from_db()
+        self.assertEqual(user_import.status, ImportStatus.PROCESSED.name)
+        self.assertEqual((user_import.last_row, user_import.created_students), (6, 4))
+        self.assertEqual([error["row"] for error in user_import.errors], [2])
+        self.assertEqual(Student.objects.filter(email__startswith="student").count(), 4)
+
+    def test_rejects_files_without_the_required_columns(self):
+        report = import_users(io.StringIO("email,first_name\nanna@example.com,Anna\n"), workers=1)
+        self.assertEqual(report.total_created, 0)
+        self.assertIn("role, last_name, phone_number", report.errors[0].message)
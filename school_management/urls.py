@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import path
 from . import views
+from .async_views import with_async_views
 
-urlpatterns = [
+sync_urlpatterns = [
     path("", views.home, name="home"),
     path("filias/", views.FiliaListView.as_view(), name="filias"),
     path("filias/<int:pk>/", views.FiliaDetailView.as_view(), name="filia_details"),
@@ -127,6 +129,16 @@ urlpatterns = [
         views.EducationTeacherDetailView.as_view(),
         name="education_teacher_detail"
     ),
+    path(
+        "dashboard/education-manager/import_users/",
+        views.EducationImportUsersView.as_view(),
+        name="education_import_users",
+    ),
+    path(
+        "dashboard/education-manager/import_users/<int:pk>/",
+        views.EducationUserImportView.as_view(),
+        name="education_user_import",
+    ),
     path(
         "dashboard/student/groups/",
         views.StudentGroupListView.as_view(),
@@ -153,3 +165,6 @@ urlpatterns = [
         name="notifications",
     ),
 ]
+
+# Under ASGI the public pages and notifications use their async implementations.
+urlpatterns = with_async_views(sync_urlpatterns) if settings.ASYNC_VIEWS else sync_urlpatterns
@@ -0,0 +1,59 @@
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Any, Dict, Iterator, List
+
+from django.db import connection
+
+
+@contextmanager
+def benchmark_database(verbosity: int = 0, on_disk: bool = False) -> Iterator[None]:
+    """
+    Point the default connection at a throwaway database for the duration of
+    the block, so benchmarks never touch the real data.
+
+    SQLite test databases live in memory by default; pass `on_disk=True` when
+    several threads or processes need to share the database file.
+    """
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    previous_test_name = test_settings.get("NAME")
+    workdir = tempfile.mkdtemp(prefix="school-bench-") if on_disk else None
+    if workdir:
+        test_settings["NAME"] = os.path.join(workdir, "bench.sqlite3")
+
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        test_settings["NAME"] = previous_test_name
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def time_call(func: Callable[..., Any], *args: Any, **kwargs: Any) -> float:
+    """Return the wall-clock time of a single call in milliseconds."""
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    return (time.perf_counter() - started) * 1000
+
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 and mean of a list of latencies in milliseconds."""
+    if not latencies_ms:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    if len(latencies_ms) == 1:
+        value = latencies_ms[0]
+        return {"p50": value, "p95": value, "p99": value, "mean": value}
+    percentiles = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+    return {
+        "p50": percentiles[49],
+        "p95": percentiles[94],
+        "p99": percentiles[98],
+        "mean": statistics.fmean(latencies_ms),
+    }
@@ -0,0 +1,62 @@
+from typing import List, Sequence, Type
+
+from django.db import connection, transaction
+
+from school_management.models import CustomUser
+
+
+def bulk_create_users(
+    model: Type[CustomUser], users: Sequence[CustomUser], batch_size: int = 1000
+) -> List[CustomUser]:
+    """
+    Insert unsaved Student/Teacher/Manager instances in batches.
+
+    `QuerySet.bulk_create` refuses multi-table inherited models, so the
+    CustomUser rows are bulk-created first and the child rows are written with
+    one executemany per batch. Passwords must already be hashed; `user_type`
+    and `manager_role` are filled in the same way `save()` would.
+    """
+    parent_fields = [
+        field for field in CustomUser._meta.concrete_fields if not field.primary_key
+    ]
+    parent_link = model._meta.pk
+    child_fields = [
+        field for field in model._meta.local_concrete_fields if field is not parent_link
+    ]
+    quote = connection.ops.quote_name
+    columns = [parent_link.column] + [field.column for field in child_fields]
+    insert_child = (
+        f"INSERT INTO {quote(model._meta.db_table)} "
+        f"({', '.join(quote(column) for column in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+
+    for user in users:
+        if model.USER_TYPE is not None:
+            user.user_type = model.USER_TYPE.value[0]
+        if hasattr(user, "role"):
+            user.manager_role = user.role or ""
+
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        with transaction.atomic():
+            parents = CustomUser.objects.bulk_create(
+                [
+                    CustomUser(**{field.attname: getattr(user, field.attname) for field in parent_fields})
+                    for user in batch
+                ]
+            )
+            for user, parent in zip(batch, parents):
+                setattr(user, parent_link.attname, parent.pk)
+                user._state.adding = False
+                user._state.db = parent._state.db
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    insert_child,
+                    [
+                        [user.pk] + [field.get_db_prep_save(getattr(user, field.attname), connection)
+                                     for field in child_fields]
+                        for user in batch
+                    ],
+                )
+    return list(users)
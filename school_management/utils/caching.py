@@ -0,0 +1,175 @@
+import hashlib
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+
+from school_management.routers import replica_was_read
+from school_management.utils.decorators.authentication import aload_user
+
+CATALOG_TAG = "catalog"
+
+
+def course_tag(course_id: int) -> str:
+    return f"course:{course_id}"
+
+
+def filia_tag(filia_id: int) -> str:
+    return f"filia:{filia_id}"
+
+
+def _tag_key(tag: str) -> str:
+    return f"tag-version:{tag}"
+
+
+def get_tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    """
+    Current version of every tag. A tag seen for the first time (or evicted)
+    gets a fresh timestamp version, so it can never resurrect an old entry.
+    """
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = cache.get_many(list(keys))
+    for key in keys.keys() - versions.keys():
+        # add() keeps whatever a concurrent request stored first.
+        cache.add(key, time.time_ns(), timeout=None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+async def aget_tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    """Async counterpart of `get_tag_versions`."""
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = await cache.aget_many(list(keys))
+    for key in keys.keys() - versions.keys():
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        versions[key] = await cache.aget(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_tags(tags: Iterable[str]) -> None:
+    """Bump the tags now, making every entry stored under them unreachable."""
+    version = time.time_ns()
+    cache.set_many({_tag_key(tag): version for tag in set(tags)}, timeout=None)
+
+
+def invalidate_tags_on_commit(tags: Iterable[str]) -> None:
+    """
+    Bump the tags once the current transaction commits. Bumping earlier would
+    let a concurrent request cache the old rows under the new version.
+    """
+    tags = set(tags)
+    if tags:
+        transaction.on_commit(lambda: invalidate_tags(tags))
+
+
+def _tagged_key(prefix: str, identity: str, versions: Dict[str, int]) -> str:
+    fingerprint = ":".join(f"{tag}={versions[tag]}" for tag in sorted(versions))
+    digest = hashlib.md5(f"{identity}|{fingerprint}".encode(), usedforsecurity=False).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def _may_be_stale(versions: Dict[str, int]) -> bool:
+    # A replica read shortly after a tag moved may predate the change; caching
+    # it under the new version would keep the old data long after the replica
+    # caught up.
+    newest = max(versions.values(), default=0)
+    return replica_was_read() and time.time_ns() - newest < settings.REPLICA_MAX_LAG * 1e9
+
+
+def get_or_set_by_tags(name: str, tags: Iterable[str], compute: Callable[[], Any], timeout: int = None) -> Any:
+    """Return the value cached under `name` for the current tag versions, computing it on a miss."""
+    if timeout is None:
+        timeout = settings.CATALOG_CACHE_TIMEOUT
+    versions = get_tag_versions(tags)
+    key = _tagged_key("tagged-value", name, versions)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if not _may_be_stale(versions):
+            cache.set(key, value, timeout)
+    return value
+
+
+def _is_cacheable_request(request: HttpRequest) -> bool:
+    # Only anonymous GETs share a page; pending messages would be hidden by a hit.
+    return (
+        request.method == "GET"
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def _is_cacheable_response(request: HttpRequest, response: HttpResponse) -> bool:
+    # A page that issued a CSRF token or any cookie belongs to one visitor.
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+    )
+
+
+def cache_page_by_tags(get_tags: Callable[..., List[str]], timeout: int = None):
+    """
+    Cache the rendered page for anonymous visitors under dependency tags.
+
+    `get_tags(request, **view_kwargs)` names what the page shows; bumping any
+    of those tags with `invalidate_tags` makes the stored copy unreachable.
+    """
+    if timeout is None:
+        timeout = settings.CATALOG_CACHE_TIMEOUT
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+                await aload_user(request)
+                if not _is_cacheable_request(request):
+                    return await view_func(request, *args, **kwargs)
+
+                versions = await aget_tag_versions(get_tags(request, **kwargs))
+                key = _tagged_key("tagged-page", request.build_absolute_uri(), versions)
+                cached = await cache.aget(key)
+                if cached is not None:
+                    return cached
+
+                # Async views return rendered responses.
+                response = await view_func(request, *args, **kwargs)
+                if _is_cacheable_response(request, response) and not _may_be_stale(versions):
+                    await cache.aset(key, response, timeout)
+                return response
+
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            versions = get_tag_versions(get_tags(request, **kwargs))
+            key = _tagged_key("tagged-page", request.build_absolute_uri(), versions)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+            response = view_func(request, *args, **kwargs)
+
+            def store(rendered: HttpResponse) -> None:
+                if _is_cacheable_response(request, rendered) and not _may_be_stale(versions):
+                    cache.set(key, rendered, timeout)
+
+            if hasattr(response, "render") and not response.is_rendered:
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+            return response
+
+        return wrapper
+
+    return decorator
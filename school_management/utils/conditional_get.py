@@ -0,0 +1,132 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.http import HttpRequest, HttpResponse
+from django.views.decorators.http import condition
+
+from school_management.models import Course, Filia, Group
+from school_management.utils.decorators.authentication import aload_user
+
+# (last modification time, extra version string) of what a page shows.
+PageState = Tuple[datetime, str]
+
+
+def _latest(*stamps: Optional[datetime]) -> datetime:
+    return max(stamp for stamp in stamps if stamp is not None)
+
+
+def _course_state_aggregates() -> dict:
+    return {
+        "own_at": Max("updated_at"),
+        "groups_at": Max("groups__updated_at"),
+        "related_at": Max("groups__filia__updated_at"),
+        "group_count": Count("groups", distinct=True),
+    }
+
+
+def _filia_state_aggregates() -> dict:
+    return {
+        "own_at": Max("updated_at"),
+        "groups_at": Max("groups__updated_at"),
+        "related_at": Max("groups__course__updated_at"),
+        "group_count": Count("groups", distinct=True),
+    }
+
+
+def _page_state(state: dict) -> Optional[PageState]:
+    if state["own_at"] is None:
+        return None
+    return _latest(state["own_at"], state["groups_at"], state["related_at"]), str(state["group_count"])
+
+
+def course_page_state(request: HttpRequest, pk: int) -> Optional[PageState]:
+    return _page_state(Course.objects.filter(pk=pk).aggregate(**_course_state_aggregates()))
+
+
+async def acourse_page_state(request: HttpRequest, pk: int) -> Optional[PageState]:
+    return _page_state(await Course.objects.filter(pk=pk).aaggregate(**_course_state_aggregates()))
+
+
+def filia_page_state(request: HttpRequest, pk: int) -> Optional[PageState]:
+    return _page_state(Filia.objects.filter(pk=pk).aggregate(**_filia_state_aggregates()))
+
+
+async def afilia_page_state(request: HttpRequest, pk: int) -> Optional[PageState]:
+    return _page_state(await Filia.objects.filter(pk=pk).aaggregate(**_filia_state_aggregates()))
+
+
+def group_page_state(request: HttpRequest, pk: int) -> PageState:
+    """State of the group a membership decorator already attached to the request."""
+    group: Group = request.group
+    return (
+        _latest(group.updated_at, group.course.updated_at, group.filia.updated_at),
+        str(group.membership_version),
+    )
+
+
+def conditional_page(get_state: Callable[..., Optional[PageState]]):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before the view runs.
+
+    `get_state(request, **view_kwargs)` must be cheap: it stands in for the
+    whole context. For async views it must be a coroutine function. The ETag also covers the visitor (the navbar and forms
+    are personal), and no validator is sent while messages are pending,
+    so a 304 can never swallow one.
+    """
+
+    def state(request: HttpRequest, **kwargs: Any) -> Optional[PageState]:
+        if request.method not in ("GET", "HEAD") or len(messages.get_messages(request)):
+            return None
+        if not hasattr(request, "_conditional_page_state"):
+            request._conditional_page_state = get_state(request, **kwargs)
+        return request._conditional_page_state
+
+    def etag(request: HttpRequest, *args: Any, **kwargs: Any) -> Optional[str]:
+        page_state = state(request, **kwargs)
+        if page_state is None:
+            return None
+        last_modified, version = page_state
+        visitor = "anonymous"
+        if request.user.is_authenticated:
+            visitor = ":".join(
+                [
+                    str(request.user.pk),
+                    str(request.user.unread_notifications),
+                    request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+                ]
+            )
+        raw = f"{visitor}|{last_modified.isoformat()}|{version}"
+        return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+    def last_modified(request: HttpRequest, *args: Any, **kwargs: Any) -> Optional[datetime]:
+        # A date alone cannot tell two visitors apart, so only shared pages get one.
+        if request.user.is_authenticated:
+            return None
+        page_state = state(request, **kwargs)
+        return page_state[0] if page_state else None
+
+    conditional = condition(etag_func=etag, last_modified_func=last_modified)
+    if not iscoroutinefunction(get_state):
+        return conditional
+
+    def decorator(view_func):
+        conditional_view = conditional(view_func)
+
+        # Django calls the validator functions synchronously, so an async
+        # `get_state` is awaited first and its result left for them to reuse.
+        @wraps(view_func)
+        async def async_wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            await aload_user(request)
+            if request.method in ("GET", "HEAD") and not len(messages.get_messages(request)):
+                request._conditional_page_state = await get_state(request, **kwargs)
+            return await conditional_view(request, *args, **kwargs)
+
+        return async_wrapper
+
+    return decorator
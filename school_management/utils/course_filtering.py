@@ -1,37 +1,11 @@
-from django.db.models import QuerySet
 from school_management.models import Course
-
-
-def filter_courses_by_age(
-    courses_list: QuerySet[Course], age_group: str
-) -> QuerySet[Course]:
-    return courses_list.filter(age_group=age_group)
-
-
-def filter_courses_by_experience(
-    courses_list: QuerySet[Course], experience_name: str
-) -> QuerySet[Course]:
-    return courses_list.filter(experience__name=experience_name)
-
-
-def filter_courses_by_goals(
-    courses_list: QuerySet[Course], learning_goals: list[str]
-) -> QuerySet[Course]:
-    return courses_list.filter(goals__name__in=learning_goals).distinct()
+from school_management.utils.course_recommendation import recommend_courses
 
 
 def select_course(
     age_group: str, experience_name: str, learning_goals: list[str]
 ) -> None | Course:
-    courses_list = Course.objects.all()
-    age_filtered_courses = filter_courses_by_age(courses_list, age_group)
-    experience_filtered_courses = filter_courses_by_experience(
-        age_filtered_courses, experience_name
-    )
-    goal_matched_courses = filter_courses_by_goals(
-        experience_filtered_courses, learning_goals
-    )
-
-    if goal_matched_courses.exists():
-        return goal_matched_courses.first()
+    recommendations = recommend_courses(age_group, experience_name, learning_goals, limit=1)
+    if recommendations:
+        return Course.objects.filter(pk=recommendations[0].course_id).first()
     return None
@@ -0,0 +1,99 @@
+import heapq
+import threading
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from school_management.models import Course
+from school_management.utils.caching import CATALOG_TAG, get_tag_versions
+
+
+class CourseRecommendation(NamedTuple):
+    course_id: int
+    name: str
+    score: int
+
+
+class _IndexedCourse(NamedTuple):
+    course_id: int
+    name: str
+    goal_mask: int
+
+
+class CourseIndex:
+    """
+    Course attributes packed for scoring in memory: courses are bucketed by
+    (age group, experience name) and their goals stored as a bitmask.
+    """
+
+    def __init__(self, version: Optional[int]) -> None:
+        self.version = version
+        self.goal_bits: Dict[str, int] = {}
+        self.buckets: Dict[Tuple[str, str], List[_IndexedCourse]] = defaultdict(list)
+
+    @classmethod
+    def build(cls, version: Optional[int] = None) -> "CourseIndex":
+        index = cls(version)
+        goal_masks: Dict[int, int] = defaultdict(int)
+        for course_id, goal_name in Course.goals.through.objects.values_list("course_id", "goal__name"):
+            bit = index.goal_bits.setdefault(goal_name, 1 << len(index.goal_bits))
+            goal_masks[course_id] |= bit
+
+        courses = {
+            course_id: (name, age_group)
+            for course_id, name, age_group in Course.objects.values_list("pk", "name", "age_group")
+        }
+        experiences = Course.experience.through.objects.values_list("course_id", "experience__name")
+        for course_id, experience_name in experiences:
+            name, age_group = courses[course_id]
+            index.buckets[(age_group, experience_name)].append(
+                _IndexedCourse(course_id, name, goal_masks[course_id])
+            )
+        return index
+
+    def goal_mask(self, goal_names: List[str]) -> int:
+        mask = 0
+        for goal_name in goal_names:
+            mask |= self.goal_bits.get(goal_name, 0)
+        return mask
+
+    def recommend(
+        self, age_group: str, experience_name: str, learning_goals: List[str], limit: int
+    ) -> List[CourseRecommendation]:
+        wanted = self.goal_mask(learning_goals)
+        if not wanted:
+            return []
+
+        scored = []
+        for course in self.buckets.get((age_group, experience_name), ()):
+            overlap = (course.goal_mask & wanted).bit_count()
+            if overlap:
+                extra = (course.goal_mask & ~wanted).bit_count()
+                scored.append((overlap, extra, course))
+
+        # More shared goals first, then fewer unrequested goals, then by name.
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1], item[2].name))
+        return [CourseRecommendation(course.course_id, course.name, overlap) for overlap, _, course in best]
+
+
+_index: Optional[CourseIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_course_index() -> CourseIndex:
+    """The process-wide index, rebuilt whenever the catalog tag version moves."""
+    global _index
+    version = get_tag_versions([CATALOG_TAG])[CATALOG_TAG]
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = CourseIndex.build(version)
+            index = _index
+    return index
+
+
+def recommend_courses(
+    age_group: str, experience_name: str, learning_goals: List[str], limit: int = 5
+) -> List[CourseRecommendation]:
+    """Top courses for the age group and experience, ranked by goal overlap."""
+    return get_course_index().recommend(age_group, experience_name, learning_goals, limit)
@@ -1,12 +1,38 @@
 from functools import wraps
 from typing import Callable, Any
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.http import HttpResponse, HttpRequest
 from school_management.utils.error_views import custom_401
+from school_management.utils.role_access_checking import resolve_user_roles
 
 ViewFunction = Callable[[HttpRequest, Any, Any], HttpResponse]
 
 
+async def aload_user(request: HttpRequest) -> Any:
+    """
+    Resolve `request.user` without blocking the event loop. Afterwards the
+    session, the user and its role are loaded, so templates and sync helpers
+    can read them from an async view without querying.
+    """
+    user = await request.auser()
+    if request.user is not user:
+        request.user = user
+        if user.is_authenticated and not user.user_type:
+            await sync_to_async(resolve_user_roles)(user)
+    return user
+
+
 def login_required_401(view_func: ViewFunction) -> ViewFunction:
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapped_view(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            user = await aload_user(request)
+            if not user.is_authenticated:
+                return custom_401(request)
+            return await view_func(request, *args, **kwargs)
+
+        return async_wrapped_view
+
     @wraps(view_func)
     def wrapped_view(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         if not request.user.is_authenticated:
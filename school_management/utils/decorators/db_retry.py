@@ -0,0 +1,39 @@
+import logging
+import random
+import time
+from functools import wraps
+from typing import Any, Callable
+
+from django.db import OperationalError, connection
+
+logger = logging.getLogger(__name__)
+
+LOCK_ERRORS = ("database is locked", "database table is locked")
+
+
+def retry_on_database_lock(attempts: int = 3, backoff: float = 0.05) -> Callable:
+    """
+    Retry a writer that lost the SQLite write lock after the busy timeout.
+
+    The wrapped function must run its own transactions: a retry from inside
+    an outer atomic block would resume a transaction SQLite already rolled
+    back, so in that case the error is re-raised immediately.
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            for attempt in range(1, attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as error:
+                    retryable = any(message in str(error) for message in LOCK_ERRORS)
+                    if not retryable or attempt == attempts or connection.in_atomic_block:
+                        raise
+                    delay = backoff * 2 ** (attempt - 1) * (1 + random.random())
+                    logger.warning(
+                        "%s hit a locked database (attempt %d/%d), retrying in %.0f ms",
+                        func.__name__, attempt, attempts, delay * 1000,
+                    )
+                    time.sleep(delay)
+        return wrapper
+    return decorator
@@ -0,0 +1,47 @@
+from functools import wraps
+from typing import Callable, Any
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse, HttpRequest
+from school_management.routers import is_pinned_to_primary, reading_from_replica, replica_aliases
+from school_management.utils.decorators.authentication import aload_user
+
+ViewFunction = Callable[[HttpRequest, Any, Any], HttpResponse]
+
+
+def _routes_to_replica(request: HttpRequest) -> bool:
+    return request.method in ("GET", "HEAD") and bool(replica_aliases()) and not is_pinned_to_primary(request)
+
+
+def read_from_replica(view_func: ViewFunction) -> ViewFunction:
+    """
+    Serve GET/HEAD requests of a read-only view from a replica, unless the
+    session wrote recently and must see its own changes on the primary.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapped_view(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            await aload_user(request)
+            if not _routes_to_replica(request):
+                return await view_func(request, *args, **kwargs)
+            # Async views render before returning; the async ORM carries the
+            # routing context into its worker thread.
+            with reading_from_replica():
+                return await view_func(request, *args, **kwargs)
+
+        return async_wrapped_view
+
+    @wraps(view_func)
+    def wrapped_view(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        if not _routes_to_replica(request):
+            return view_func(request, *args, **kwargs)
+
+        # The user comes from the primary, like the session that names it.
+        request.user.is_authenticated
+        with reading_from_replica():
+            response = view_func(request, *args, **kwargs)
+            # Templates evaluate querysets lazily; render while still routed.
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        return response
+
+    return wrapped_view
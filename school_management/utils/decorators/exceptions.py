@@ -1,13 +1,16 @@
+import logging
 from functools import wraps
 from typing import Callable, Any
 
+logger = logging.getLogger(__name__)
+
 
 def exception_handler(func: Callable) -> Callable:
     @wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
         try:
             return func(*args, **kwargs)
-        except Exception as e:
-            print(f"Exception in {func.__name__}: {e}")
+        except Exception:
+            logger.exception("Exception in %s", func.__name__)
             return False
     return wrapper
@@ -2,27 +2,56 @@ from functools import wraps
 from typing import Callable, Any
 from django.http import HttpResponse, HttpRequest
 from django.shortcuts import get_object_or_404
-from school_management.models import Group
+from school_management.models import Group, StudentGroupMembership
+from school_management.utils.role_access_checking import user_is_student, user_is_teacher
 from django.core.exceptions import PermissionDenied
 
 ViewFunction = Callable[[HttpRequest, Any, Any], HttpResponse]
 
 
+def _deny(group_id: Any) -> None:
+    # Keep answering 404 for missing groups and 403 for groups the user is not in.
+    get_object_or_404(Group, pk=group_id)
+    raise PermissionDenied
+
+
 def student_in_group(view_func: ViewFunction) -> ViewFunction:
+    """
+    Let the request through only for students of the group, and attach the
+    resolved `request.group` and `request.group_membership` so the view does
+    not fetch them again.
+    """
     @wraps(view_func)
     def wrapped_view(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
-        group = get_object_or_404(Group, pk=kwargs["pk"])
-        if not (hasattr(request.user, "student") and group.students.filter(id=request.user.student.id).exists()):
-            raise PermissionDenied
+        membership = None
+        if user_is_student(request.user):
+            membership = StudentGroupMembership.objects.select_related(
+                "group__course", "group__filia"
+            ).filter(group_id=kwargs["pk"], student_id=request.user.pk).first()
+        if membership is None:
+            _deny(kwargs["pk"])
+
+        request.group = membership.group
+        request.group_membership = membership
         return view_func(request, *args, **kwargs)
     return wrapped_view
 
 
 def teacher_in_group(view_func: ViewFunction) -> ViewFunction:
+    """
+    Let the request through only for teachers of the group, and attach the
+    resolved `request.group` for the view to reuse.
+    """
     @wraps(view_func)
     def wrapped_view(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
-        group = get_object_or_404(Group, pk=kwargs["pk"])
-        if not (hasattr(request.user, "teachers") and group.teachers.filter(id=request.user.teacher.id).exists()):
-            raise PermissionDenied
+        group = None
+        if user_is_teacher(request.user):
+            group = Group.objects.select_related("course", "filia").filter(
+                pk=kwargs["pk"], teachers=request.user.pk
+            ).first()
+        if group is None:
+            _deny(kwargs["pk"])
+
+        request.group = group
         return view_func(request, *args, **kwargs)
     return wrapped_view
@@ -1,13 +1,25 @@
 from functools import wraps
 from typing import Callable, Any
+from asgiref.sync import iscoroutinefunction
 from django.http import HttpResponse, HttpRequest
 from django.core.exceptions import PermissionDenied
+from school_management.utils.decorators.authentication import aload_user
 
 ViewFunction = Callable[[HttpRequest, Any, Any], HttpResponse]
 
 
 def user_passes_test_403(test_func: Callable[[Any], bool]) -> Callable[[ViewFunction], ViewFunction]:
     def decorator(view_func: ViewFunction) -> ViewFunction:
+        if iscoroutinefunction(view_func):
+            # `test_func` stays sync: it only reads the already loaded user.
+            @wraps(view_func)
+            async def async_wrapped_view(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+                if not test_func(await aload_user(request)):
+                    raise PermissionDenied
+                return await view_func(request, *args, **kwargs)
+
+            return async_wrapped_view
+
         @wraps(view_func)
         def wrapped_view(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
             if not test_func(request.user):
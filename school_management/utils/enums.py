@@ -42,6 +42,10 @@ class GroupStatus(Enum):
     def choices(cls) -> List[Tuple[str, str]]:
         return [(item.value[0], item.value[1]) for item in cls]
 
+    @classmethod
+    def active(cls) -> List[str]:
+        return [cls.ENROLLMENT_STARTED.value[0], cls.EDUCATION_STARTED.value[0]]
+
 
 class PaymentStatus(Enum):
     PAID = "Paid"
@@ -50,3 +54,53 @@ class PaymentStatus(Enum):
     @classmethod
     def choices(cls) -> List[Tuple[str, str]]:
         return [(item.name, item.value) for item in cls]
+
+
+class EnrollmentOutcome(Enum):
+    ADDED = "Added"
+    ALREADY_ENROLLED = "Already enrolled"
+    NOT_FOUND = "Student not found"
+
+    @classmethod
+    def choices(cls) -> List[Tuple[str, str]]:
+        return [(item.name, item.value) for item in cls]
+
+
+class OutboxStatus(Enum):
+    PENDING = "Pending"
+    PROCESSED = "Processed"
+    FAILED = "Failed"
+
+    @classmethod
+    def choices(cls) -> List[Tuple[str, str]]:
+        return [(item.name, item.value) for item in cls]
+
+
+class ImportStatus(Enum):
+    PENDING = "Pending"
+    PROCESSED = "Processed"
+    FAILED = "Failed"
+
+    @classmethod
+    def choices(cls) -> List[Tuple[str, str]]:
+        return [(item.name, item.value) for item in cls]
+
+
+class SeatReservationOutcome(Enum):
+    RESERVED = "Reserved"
+    ALREADY_ENROLLED = "Already enrolled"
+    NO_SEATS = "No seats available"
+
+    @classmethod
+    def choices(cls) -> List[Tuple[str, str]]:
+        return [(item.name, item.value) for item in cls]
+
+
+class UserType(Enum):
+    STUDENT = "student", "Student"
+    TEACHER = "teacher", "Teacher"
+    MANAGER = "manager", "Manager"
+
+    @classmethod
+    def choices(cls) -> List[Tuple[str, str]]:
+        return [(item.value[0], item.value[1]) for item in cls]
@@ -1,16 +1,32 @@
-from typing import List, Type
+from typing import Any, Dict, List, Optional, Sequence, Type
 from django.core.paginator import Paginator, Page
 from django.db.models import QuerySet, Model, Q
 
+from school_management.utils.keyset_pagination import KeysetPage, paginate_by_keyset
+from school_management.utils.people_search import (
+    build_match_expression,
+    filter_by_full_text,
+    supports_search,
+)
+
+
+def filter_by_icontains(
+    queryset: QuerySet, search_query: str, search_fields: List[str]
+) -> QuerySet:
+    query = Q()
+    for field in search_fields:
+        query |= Q(**{f"{field}__icontains": search_query})
+    return queryset.filter(query)
+
 
 def filter_by_search(
     queryset: QuerySet, search_query: str, search_fields: List[str]
 ) -> QuerySet:
     if search_query:
-        query = Q()
-        for field in search_fields:
-            query |= Q(**{f"{field}__icontains": search_query})
-        queryset = queryset.filter(query)
+        if supports_search(queryset, search_fields) and build_match_expression(search_query):
+            queryset = filter_by_full_text(queryset, search_query, search_fields)
+        else:
+            queryset = filter_by_icontains(queryset, search_query, search_fields)
     return queryset
 
 
@@ -23,9 +39,27 @@ def paginate_queryset(
 
 def filter_by_search_and_paginate(
     search_query: str, page_number: str, model: Type[Model],
-    search_fields: List[str], per_page: int = 5
-) -> Page:
-    queryset = model.objects.all()
+    search_fields: List[str], per_page: int = 5,
+    keyset: bool = False, cursor: Optional[str] = None,
+    keyset_ordering: Optional[Sequence[str]] = None, with_count: bool = False,
+    annotations: Optional[Dict[str, Any]] = None,
+) -> Page | KeysetPage:
+    """
+    Search `model` and return one page of results.
+
+    With `keyset=True` the page is addressed by `cursor` instead of
+    `page_number` and seeks on `keyset_ordering` (by default the search rank
+    while a full-text search is active, then the model's ordering and the
+    primary key), so deep pages cost the same as the first one.
+    The total is only counted when `with_count` is set. `annotations` are
+    applied to the page query, so per-row aggregates need no extra queries.
+    """
+    queryset = model.objects.annotate(**(annotations or {}))
     queryset = filter_by_search(queryset, search_query, search_fields)
+    if keyset:
+        ordering = keyset_ordering or [*model._meta.ordering, "pk"]
+        if not keyset_ordering and "search_rank" in queryset.query.annotations:
+            ordering = ["search_rank", *ordering]
+        return paginate_by_keyset(queryset, ordering, cursor, per_page, with_count)
     page_obj = paginate_queryset(queryset, page_number, per_page)
     return page_obj
@@ -1,10 +1,90 @@
+from typing import Dict, List, Tuple
+
 import django_filters
+from django.db.models import CharField, Count, F, Q, QuerySet, Value
+from django.db.models.functions import Cast
 from django.forms.widgets import CheckboxSelectMultiple
 from school_management.models import Course, Experience, Filia, Group
+from school_management.utils.caching import CATALOG_TAG, get_or_set_by_tags
 from school_management.utils.enums import AgeGroup, GroupStatus
 
 
-class CourseFilter(django_filters.FilterSet):
+def cached_choices(queryset: QuerySet) -> List[Tuple[int, str]]:
+    """(pk, label) choices of a catalog model, refreshed whenever the catalog changes."""
+    model = queryset.model
+    return get_or_set_by_tags(
+        f"facet-choices:{model._meta.label}",
+        [CATALOG_TAG],
+        lambda: [(obj.pk, str(obj)) for obj in queryset],
+    )
+
+
+class FacetedFilterSet(django_filters.FilterSet):
+    """
+    Labels every checkbox of the `facets` filters with the number of rows it
+    would match under the other current selections.
+
+    All counts come from one query: a UNION ALL of one grouped COUNT per
+    facet. Model facets render their choices from the catalog cache instead
+    of querying the option table on every request.
+    """
+
+    facets: List[str] = []
+
+    @property
+    def form(self):
+        form = super().form
+        if not getattr(self, "_facets_applied", False):
+            self._facets_applied = True
+            self.apply_facet_counts(form)
+        return form
+
+    def selected_facet_values(self, form) -> Dict[str, list]:
+        cleaned_data = getattr(form, "cleaned_data", {}) if form.is_valid() else {}
+        return {name: list(cleaned_data[name]) for name in self.facets if cleaned_data.get(name)}
+
+    def facet_counts(self, selected: Dict[str, list]) -> Dict[str, Dict[str, int]]:
+        """Option counts per facet, keyed by the option value as a string."""
+        parts = []
+        for name in self.facets:
+            field_name = self.filters[name].field_name
+            others = Q()
+            for other, values in selected.items():
+                if other != name:
+                    others &= Q(**{f"{self.filters[other].field_name}__in": values})
+
+            parts.append(
+                self.queryset.filter(others)
+                .order_by()
+                .values(option=Cast(F(field_name), CharField()))
+                .annotate(facet=Value(name), total=Count("pk", distinct=True))
+                .values_list("facet", "option", "total")
+            )
+
+        counts: Dict[str, Dict[str, int]] = {name: {} for name in self.facets}
+        for facet, option, total in parts[0].union(*parts[1:], all=True):
+            if option is not None:
+                counts[facet][option] = total
+        return counts
+
+    def apply_facet_counts(self, form) -> None:
+        if not self.facets:
+            return
+        counts = self.facet_counts(self.selected_facet_values(form))
+
+        for name in self.facets:
+            field = form.fields[name]
+            if hasattr(field, "queryset"):
+                choices = cached_choices(field.queryset)
+            else:
+                choices = list(field.choices)
+            # Only the rendered options change; validation still uses the field.
+            field.widget.choices = [
+                (value, f"{label} ({counts[name].get(str(value), 0)})") for value, label in choices
+            ]
+
+
+class CourseFilter(FacetedFilterSet):
     experience = django_filters.ModelMultipleChoiceFilter(
         field_name="experience",
         queryset=Experience.objects.all(),
@@ -27,12 +107,14 @@ class CourseFilter(django_filters.FilterSet):
         widget=CheckboxSelectMultiple(),
     )
 
+    facets = ["experience", "filia", "age_group"]
+
     class Meta:
         model = Course
         fields = ["experience", "filia", "age_group"]
 
 
-class GroupFilter(django_filters.FilterSet):
+class GroupFilter(FacetedFilterSet):
     filia = django_filters.ModelMultipleChoiceFilter(
         field_name="filia",
         queryset=Filia.objects.all(),
@@ -55,6 +137,8 @@ class GroupFilter(django_filters.FilterSet):
         label="Status",
     )
 
+    facets = ["filia", "course", "status"]
+
     class Meta:
         model = Group
         fields = ["filia", "course", "status"]
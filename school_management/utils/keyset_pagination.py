@@ -0,0 +1,231 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, F, Q, QuerySet, Value
+from django.db.models.expressions import Expression
+
+NEXT = "n"
+PREVIOUS = "p"
+PK_KEY = "keyset_pk"
+
+
+class KeysetPage:
+    """
+    A page of results addressed by cursors instead of page numbers, so a deep
+    page costs the same as the first one and no COUNT(*) is needed.
+    """
+
+    def __init__(
+        self,
+        object_list: List[Any],
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+        count: Optional[int] = None,
+    ) -> None:
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+
+def _parse_ordering(ordering: Sequence[str]) -> List[Tuple[str, bool]]:
+    return [(key.lstrip("-"), key.startswith("-")) for key in ordering]
+
+
+def _with_pk_column(queryset: QuerySet, ordering: Sequence[str]) -> Tuple[QuerySet, List[str]]:
+    """
+    On a model with a concrete parent, "pk" is the parent link, a relation;
+    seek and sort on its column (e.g. `customuser_ptr_id`) instead, named by
+    an annotation.
+    """
+    if not queryset.model._meta.get_parent_list():
+        return queryset, list(ordering)
+    queryset = queryset.annotate(**{PK_KEY: F(queryset.model._meta.pk.attname)})
+    pk_keys = {"pk": PK_KEY, "-pk": f"-{PK_KEY}"}
+    return queryset, [pk_keys.get(key, key) for key in ordering]
+
+
+def _resolve_field(queryset: QuerySet, name: str):
+    """The field of a key: a model field, or the output field of an annotation such as a search rank."""
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    model = queryset.model
+    return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+
+def _json_default(value: Any) -> str:
+    # Keep full microsecond precision; DjangoJSONEncoder rounds to milliseconds,
+    # which would make the seek skip or repeat rows.
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(direction: str, values: Sequence[Any]) -> str:
+    payload = json.dumps([direction, list(values)], default=_json_default)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, queryset: QuerySet, ordering: Sequence[str]
+) -> Optional[Tuple[str, List[Any]]]:
+    """Return (direction, values) or None when the cursor is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, raw_values = json.loads(base64.urlsafe_b64decode(padded))
+        keys = _parse_ordering(ordering)
+        if direction not in (NEXT, PREVIOUS) or len(raw_values) != len(keys):
+            return None
+        values = [
+            _resolve_field(queryset, name).to_python(value)
+            for (name, _), value in zip(keys, raw_values)
+        ]
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+    return direction, values
+
+
+class _RowValueComparison(Expression):
+    """`(k1, k2, ...) > (v1, v2, ...)` as a single SQL row-value comparison."""
+
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(self, lhs: List[Any], operator: str, rhs: List[Any]) -> None:
+        super().__init__()
+        self.lhs, self.operator, self.rhs = lhs, operator, rhs
+
+    def get_source_expressions(self) -> List[Any]:
+        return [*self.lhs, *self.rhs]
+
+    def set_source_expressions(self, exprs: List[Any]) -> None:
+        self.lhs, self.rhs = exprs[:len(self.lhs)], exprs[len(self.lhs):]
+
+    def as_sql(self, compiler, connection):
+        sides, params = [], []
+        for side in (self.lhs, self.rhs):
+            sql_parts = []
+            for expression in side:
+                sql, expression_params = compiler.compile(expression)
+                sql_parts.append(sql)
+                params.extend(expression_params)
+            sides.append(f"({', '.join(sql_parts)})")
+        return f"{sides[0]} {self.operator} {sides[1]}", params
+
+
+def _seek_filter(queryset: QuerySet, keys: List[Tuple[str, bool]], values: List[Any], forward: bool):
+    """
+    The rows past `values` in the order of `keys`. When all keys share a
+    direction this is the row-value comparison `(k1, k2, ...) > (v1, v2, ...)`,
+    which SQLite answers with one range scan of a matching index; mixed
+    directions fall back to an OR of equal prefixes.
+    """
+    if len({descending for _, descending in keys}) == 1:
+        operator = "<" if keys[0][1] == forward else ">"
+        return _RowValueComparison(
+            [F(name) for name, _ in keys],
+            operator,
+            [Value(value, output_field=_resolve_field(queryset, name)) for (name, _), value in zip(keys, values)],
+        )
+
+    condition = Q()
+    for index, (name, descending) in enumerate(keys):
+        lookup = "lt" if descending == forward else "gt"
+        clause = Q(**{f"{name}__{lookup}": values[index]})
+        for previous_index in range(index):
+            clause &= Q(**{keys[previous_index][0]: values[previous_index]})
+        condition |= clause
+    return condition
+
+
+def _row_values(obj: Any, keys: List[Tuple[str, bool]]) -> List[Any]:
+    return [getattr(obj, name) for name, _ in keys]
+
+
+def _page_slice(queryset: QuerySet, ordering: Sequence[str], cursor: Optional[str], per_page: int):
+    """The direction, decoded cursor and the queryset of one page plus a look-ahead row."""
+    keys = _parse_ordering(ordering)
+    decoded = decode_cursor(cursor, queryset, ordering)
+    if decoded is None:
+        return NEXT, None, queryset.order_by(*ordering)[:per_page + 1]
+
+    direction, values = decoded
+    forward = direction == NEXT
+    reversed_ordering = [name if descending else f"-{name}" for name, descending in keys]
+    page_queryset = queryset.filter(_seek_filter(queryset, keys, values, forward))
+    page_queryset = page_queryset.order_by(*(ordering if forward else reversed_ordering))
+    return direction, decoded, page_queryset[:per_page + 1]
+
+
+def _build_page(
+    rows: List[Any], direction: str, decoded, ordering: Sequence[str], per_page: int, count: Optional[int]
+) -> KeysetPage:
+    keys = _parse_ordering(ordering)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == PREVIOUS:
+        rows.reverse()
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if (direction == NEXT and has_more) or direction == PREVIOUS:
+            next_cursor = encode_cursor(NEXT, _row_values(rows[-1], keys))
+        if (direction == PREVIOUS and has_more) or (direction == NEXT and decoded is not None):
+            previous_cursor = encode_cursor(PREVIOUS, _row_values(rows[0], keys))
+
+    return KeysetPage(rows, next_cursor, previous_cursor, count)
+
+
+def paginate_by_keyset(
+    queryset: QuerySet,
+    ordering: Sequence[str],
+    cursor: Optional[str] = None,
+    per_page: int = 20,
+    with_count: bool = False,
+) -> KeysetPage:
+    """
+    Paginate `queryset` by seeking past the last row of the previous page.
+
+    `ordering` must be unique across rows (end it with "pk" or "-pk") and
+    should be backed by an index for the seek to stay cheap. It may name
+    annotations of `queryset`, e.g. a search rank.
+    """
+    page_queryset, ordering = _with_pk_column(queryset, ordering)
+    direction, decoded, page_queryset = _page_slice(page_queryset, ordering, cursor, per_page)
+    rows = list(page_queryset)
+    count = queryset.count() if with_count else None
+    return _build_page(rows, direction, decoded, ordering, per_page, count)
+
+
+async def apaginate_by_keyset(
+    queryset: QuerySet,
+    ordering: Sequence[str],
+    cursor: Optional[str] = None,
+    per_page: int = 20,
+    with_count: bool = False,
+) -> KeysetPage:
+    """Async counterpart of `paginate_by_keyset`."""
+    page_queryset, ordering = _with_pk_column(queryset, ordering)
+    direction, decoded, page_queryset = _page_slice(page_queryset, ordering, cursor, per_page)
+    rows = [row async for row in page_queryset]
+    count = await queryset.acount() if with_count else None
+    return _build_page(rows, direction, decoded, ordering, per_page, count)
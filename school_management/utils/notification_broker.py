@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NOTIFICATION_STREAM = {
+    # Seconds between keep-alive comments on an idle stream.
+    "HEARTBEAT": 15,
+    # Seconds between checks for notifications inserted by other processes
+    # (the outbox worker); one query per web worker, not per connection.
+    "POLL_INTERVAL": 5,
+    # Open streams per worker process; further clients get a 503.
+    "MAX_CONNECTIONS": 200,
+    # Milliseconds the browser waits before reconnecting.
+    "RETRY": 3000,
+    # Most notifications replayed after a reconnect.
+    "REPLAY_LIMIT": 50,
+}
+
+
+def stream_settings() -> Dict[str, Any]:
+    return {**DEFAULT_NOTIFICATION_STREAM, **getattr(settings, "NOTIFICATION_STREAM", {})}
+
+
+class Subscription:
+    """A connected stream: woken up whenever its user may have new notifications."""
+
+    def __init__(self, user_id: int) -> None:
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+
+    def notify(self) -> None:
+        # Publishers run in worker threads; the event belongs to the loop.
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+
+class NotificationBroker:
+    """
+    In-process pub/sub between notification writers and open streams.
+
+    Messages only say "user N has something new"; each stream then reads its
+    rows past the last id it sent, so a missed or merged wake-up never loses
+    a notification. Rows written by another process reach the broker through
+    a watcher task that polls for new ids while anyone is subscribed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._connections = 0
+        self._watcher: Optional[asyncio.Task] = None
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    def acquire(self) -> bool:
+        """Reserve a connection slot; False once the worker is at capacity."""
+        with self._lock:
+            if self._connections >= stream_settings()["MAX_CONNECTIONS"]:
+                return False
+            self._connections += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._connections -= 1
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        loop = asyncio.get_running_loop()
+        if self._watcher is None or self._watcher.done() or self._watcher.get_loop() is not loop:
+            self._watcher = loop.create_task(self.watch())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+            watcher = None
+            if not self._subscriptions:
+                # A cancelled watcher is not done() until the loop runs it
+                # again; forget it so a subscriber arriving first starts a new one.
+                watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.cancel()
+
+    def publish(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            subscriptions = [
+                subscription
+                for user_id in set(user_ids)
+                for subscription in self._subscriptions.get(user_id, ())
+            ]
+        for subscription in subscriptions:
+            subscription.notify()
+
+    def publish_on_commit(self, user_ids: Iterable[int]) -> None:
+        user_ids = list(user_ids)
+        if user_ids:
+            transaction.on_commit(lambda: self.publish(user_ids))
+
+    async def watch(self) -> None:
+        """Publish notifications other processes inserted, until nobody listens."""
+        from school_management.models import Notification
+
+        last_id = await self.latest_id()
+        while self._subscriptions:
+            await asyncio.sleep(stream_settings()["POLL_INTERVAL"])
+            try:
+                rows = [
+                    row async for row in
+                    Notification.objects.filter(pk__gt=last_id).order_by().values_list("pk", "user_id")
+                ]
+            except Exception:
+                logger.exception("Polling for new notifications failed")
+                continue
+            if rows:
+                last_id = max(pk for pk, _ in rows)
+                self.publish(user_id for _, user_id in rows)
+
+    @staticmethod
+    async def latest_id() -> int:
+        # Imported here: the models publish through this module.
+        from school_management.models import Notification
+
+        latest = await Notification.objects.aaggregate(latest=Max("pk"))
+        return latest["latest"] or 0
+
+
+broker = NotificationBroker()
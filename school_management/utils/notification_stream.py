@@ -0,0 +1,68 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from school_management.models import CustomUser, Notification
+from school_management.utils.notification_broker import NotificationBroker, broker, stream_settings
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def _notifications_after(user_id: int, last_id: int, limit: int) -> List[Notification]:
+    return [
+        notification async for notification in
+        Notification.objects.filter(user_id=user_id, pk__gt=last_id).order_by("pk")[:limit]
+    ]
+
+
+async def notification_events(user_id: int, last_event_id: Optional[int]) -> AsyncIterator[str]:
+    """
+    Server-sent events for one user: new notifications as `notification`
+    events (the SSE id is the notification pk) and a comment line every
+    heartbeat. With `last_event_id`, notifications after it are replayed
+    first; without it, the stream starts from now.
+    """
+    config = stream_settings()
+    subscription = broker.subscribe(user_id)
+    try:
+        last_id = last_event_id if last_event_id is not None else await NotificationBroker.latest_id()
+        yield f"retry: {config['RETRY']}\n\n"
+        # A reconnecting client may have missed rows; look once before waiting.
+        subscription.wakeup.set()
+        while True:
+            try:
+                async with asyncio.timeout(config["HEARTBEAT"]):
+                    await subscription.wakeup.wait()
+            except TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            subscription.wakeup.clear()
+
+            notifications = await _notifications_after(user_id, last_id, config["REPLAY_LIMIT"])
+            if not notifications:
+                continue
+            unread = await CustomUser.objects.filter(pk=user_id).values_list(
+                "unread_notifications", flat=True
+            ).afirst()
+            for notification in notifications:
+                last_id = notification.pk
+                yield format_event(
+                    "notification",
+                    {
+                        "id": notification.pk,
+                        "datetime": notification.datetime.isoformat(),
+                        "type": notification.get_type_of_operation_display(),
+                        "message": notification.wide_message,
+                        "unread": unread,
+                    },
+                    event_id=notification.pk,
+                )
+            if len(notifications) == config["REPLAY_LIMIT"]:
+                # More are waiting behind the limit.
+                subscription.wakeup.set()
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,47 @@
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+# Spawned workers import this module before Django is set up, so it must not
+# import models.
+
+
+def _init_hashing_process(settings_module: str) -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+@contextmanager
+def password_hasher(workers: Optional[int] = None) -> Iterator[Optional[Executor]]:
+    """
+    A process pool for hashing passwords, or None to hash in this process.
+
+    PBKDF2 holds the GIL, so only processes spread it over the cores. They
+    are spawned rather than forked (forking a threaded web worker is unsafe)
+    and set Django up to read the same PASSWORD_HASHERS.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_hashing_process,
+        initargs=(settings.SETTINGS_MODULE,),
+    ) as pool:
+        yield pool
+
+
+def hash_passwords(passwords: Sequence[Optional[str]], pool: Optional[Executor]) -> List[str]:
+    if pool is None:
+        return [make_password(password) for password in passwords]
+    # A hash takes long enough that small chunks keep every process busy.
+    return list(pool.map(make_password, passwords, chunksize=8))
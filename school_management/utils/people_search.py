@@ -0,0 +1,142 @@
+import re
+from typing import List
+
+from django.db import OperationalError, connection as default_connection
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import FloatField, QuerySet
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = "school_management_people_search"
+SOURCE_TABLE = "school_management_customuser"
+INDEXED_FIELDS = ["first_name", "last_name", "email"]
+
+_TRIGGERS = {
+    f"{SEARCH_TABLE}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON {SOURCE_TABLE} BEGIN
+            INSERT INTO {SEARCH_TABLE}(rowid, first_name, last_name, email)
+            VALUES (new.id, new.first_name, new.last_name, new.email);
+        END
+    """,
+    f"{SEARCH_TABLE}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON {SOURCE_TABLE} BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        END
+    """,
+    f"{SEARCH_TABLE}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au
+        AFTER UPDATE OF first_name, last_name, email ON {SOURCE_TABLE} BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, first_name, last_name, email)
+            VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+            INSERT INTO {SEARCH_TABLE}(rowid, first_name, last_name, email)
+            VALUES (new.id, new.first_name, new.last_name, new.email);
+        END
+    """,
+}
+
+
+def _existing_objects(connection: BaseDatabaseWrapper) -> set:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND name LIKE %s)",
+            [SEARCH_TABLE, f"{SEARCH_TABLE}_%"],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def install_search_index(connection: BaseDatabaseWrapper = default_connection) -> bool:
+    """
+    Create the FTS5 index over people's names and e-mails plus the triggers that
+    keep it in sync with CustomUser. The index is rebuilt whenever a trigger was
+    missing, e.g. after a migration remade the users table. Returns False on
+    databases without FTS5.
+    """
+    if connection.vendor != "sqlite":
+        return False
+
+    existing = _existing_objects(connection)
+    with connection.cursor() as cursor:
+        if SEARCH_TABLE not in existing:
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                    f"first_name, last_name, email, "
+                    f"content='{SOURCE_TABLE}', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+            except OperationalError:
+                return False
+        for name, statement in _TRIGGERS.items():
+            cursor.execute(statement)
+        if not set(_TRIGGERS) <= existing:
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+    connection.people_search_ready = True
+    return True
+
+
+def rebuild_search_index(connection: BaseDatabaseWrapper = default_connection) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def search_index_available(connection: BaseDatabaseWrapper = default_connection) -> bool:
+    if connection.vendor != "sqlite":
+        return False
+    ready = getattr(connection, "people_search_ready", None)
+    if ready is None:
+        ready = SEARCH_TABLE in _existing_objects(connection)
+        connection.people_search_ready = ready
+    return ready
+
+
+def build_match_expression(search_query: str, search_fields: List[str] | None = None) -> str:
+    """
+    Turn free text into an FTS5 query where every word is a prefix term,
+    optionally restricted to some of the indexed columns.
+    """
+    terms = re.findall(r"\w+", search_query)
+    column_filter = ""
+    if search_fields and set(search_fields) != set(INDEXED_FIELDS):
+        column_filter = "{" + " ".join(search_fields) + "} : "
+    return " ".join(f'{column_filter}"{term}"*' for term in terms)
+
+
+def supports_search(queryset: QuerySet, search_fields: List[str]) -> bool:
+    from school_management.models import CustomUser
+
+    return (
+        issubclass(queryset.model, CustomUser)
+        and set(search_fields) <= set(INDEXED_FIELDS)
+        and search_index_available()
+    )
+
+
+def filter_by_full_text(
+    queryset: QuerySet, search_query: str, search_fields: List[str] | None = None
+) -> QuerySet:
+    """
+    Restrict `queryset` to people matching every word of `search_query` as a
+    prefix of their first name, last name or e-mail, best matches first.
+
+    The match set comes from the FTS index, so the users table is only
+    touched for matching rows; every match is kept, however broad the prefix.
+    """
+    match_expression = build_match_expression(search_query, search_fields)
+    model = queryset.model
+    pk_column = f'"{model._meta.db_table}"."{model._meta.pk.column}"'
+
+    matches = RawSQL(
+        f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [match_expression]
+    )
+    rank = RawSQL(
+        f"SELECT rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid = {pk_column}",
+        [match_expression],
+        output_field=FloatField(),
+    )
+    ordering = queryset.query.order_by or model._meta.ordering
+    return (
+        queryset.filter(pk__in=matches)
+        .annotate(search_rank=rank)
+        .order_by("search_rank", *ordering, "pk")
+    )
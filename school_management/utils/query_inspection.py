@@ -0,0 +1,26 @@
+import re
+from collections import Counter
+from typing import Dict, Iterable
+
+_IN_LIST = re.compile(r"\bIN \(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint_sql(sql: str) -> str:
+    """
+    Reduce a SQL statement to its shape, so the same query issued with
+    different parameters (the N in N+1) collapses to one fingerprint.
+    """
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def repeated_fingerprints(statements: Iterable[str], threshold: int = 2) -> Dict[str, int]:
+    """Fingerprints seen at least `threshold` times, most frequent first."""
+    counts = Counter(fingerprint_sql(sql) for sql in statements)
+    return {sql: count for sql, count in counts.most_common() if count >= threshold}
@@ -1,24 +1,83 @@
-from typing import Any
+from typing import Any, NamedTuple
+
+from school_management.models import CustomUser
+from school_management.utils.enums import ManagerRole, UserType
+
+
+class UserRoles(NamedTuple):
+    is_student: bool = False
+    is_teacher: bool = False
+    is_manager: bool = False
+    manager_role: str | None = None
+
+
+def _roles_from_columns(user_type: str, manager_role: str | None) -> UserRoles:
+    return UserRoles(
+        is_student=user_type == UserType.STUDENT.value[0],
+        is_teacher=user_type == UserType.TEACHER.value[0],
+        is_manager=user_type == UserType.MANAGER.value[0],
+        manager_role=manager_role or None,
+    )
+
+
+def resolve_user_roles(user: Any) -> UserRoles:
+    """
+    Work out the concrete role of `user` once and cache it on the user object,
+    which lives for a single request.
+
+    The role is read from the `user_type`/`manager_role` columns of the
+    already-loaded user, so no query is needed. Rows created before the
+    columns existed fall back to one read-only query against the child
+    tables until `manage.py backfill_user_roles` fills their columns.
+    """
+    if not getattr(user, "is_authenticated", False):
+        return UserRoles()
+
+    roles = getattr(user, "_resolved_roles", None)
+    if roles is not None:
+        return roles
+
+    if user.user_type:
+        roles = _roles_from_columns(user.user_type, user.manager_role)
+    else:
+        row = CustomUser.objects.filter(pk=user.pk).values_list(
+            "student", "teacher", "manager", "manager__role"
+        ).first()
+        student_id, teacher_id, manager_id, manager_role = row or (None, None, None, None)
+        user_type = ""
+        if student_id is not None:
+            user_type = UserType.STUDENT.value[0]
+        elif teacher_id is not None:
+            user_type = UserType.TEACHER.value[0]
+        elif manager_id is not None:
+            user_type = UserType.MANAGER.value[0]
+        roles = _roles_from_columns(user_type, manager_role)
+
+    user._resolved_roles = roles
+    return roles
 
 
 def user_is_student(user: Any) -> bool:
-    return hasattr(user, "student")
+    return resolve_user_roles(user).is_student
 
 
 def user_is_teacher(user: Any) -> bool:
-    return hasattr(user, "teacher")
+    return resolve_user_roles(user).is_teacher
 
 
 def user_is_student_or_teacher(user: Any) -> bool:
-    return hasattr(user, "teacher") or hasattr(user, "student")
+    roles = resolve_user_roles(user)
+    return roles.is_teacher or roles.is_student
 
 
 def user_is_education_manager(user: Any) -> bool:
-    return hasattr(user, "manager") and user.manager.role == "Education"
+    roles = resolve_user_roles(user)
+    return roles.is_manager and roles.manager_role == ManagerRole.EDU_MANAGER.value[0]
 
 
 def user_is_program_manager(user: Any) -> bool:
-    return hasattr(user, "manager") and user.manager.role == "Program"
+    roles = resolve_user_roles(user)
+    return roles.is_manager and roles.manager_role == ManagerRole.PROG_MANAGER.value[0]
 
 
 def get_user_role(user: Any) -> str | None:
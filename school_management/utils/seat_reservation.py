@@ -0,0 +1,127 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from school_management.models import (
+    Course,
+    Filia,
+    Group,
+    NotificationOutbox,
+    Student,
+    StudentGroupMembership,
+)
+from school_management.utils.decorators.db_retry import retry_on_database_lock
+from school_management.utils.decorators.exceptions import exception_handler
+from school_management.utils.enums import (
+    EnrollmentOutcome,
+    GroupStatus,
+    NotificationType,
+    PaymentStatus,
+    SeatReservationOutcome,
+)
+
+
+def claim_seats(group_id: int, count: int) -> bool:
+    """
+    Take `count` seats with a single conditional UPDATE; False, taking none,
+    if fewer are free.
+    """
+    return bool(
+        Group.objects.filter(pk=group_id, enrolled_count__lte=F("group_size") - count).update(
+            enrolled_count=F("enrolled_count") + count,
+            membership_version=F("membership_version") + 1,
+        )
+    )
+
+
+def claim_seat(group_id: int) -> bool:
+    """Take one seat; False if the group is full."""
+    return claim_seats(group_id, 1)
+
+
+def has_active_enrollment(student_id: int, course: Course, filia: Filia) -> bool:
+    return StudentGroupMembership.objects.filter(
+        student_id=student_id,
+        group__course=course,
+        group__filia=filia,
+        group__status__in=GroupStatus.active(),
+    ).exists()
+
+
+@retry_on_database_lock()
+def reserve_course_seat(
+    student_id: int, course: Course, filia: Filia
+) -> Tuple[SeatReservationOutcome, Optional[Group]]:
+    """
+    Enroll a student in the first group of the course at the filia that still
+    has a free seat.
+
+    Each candidate is tried in its own short transaction that starts with the
+    seat claim. On SQLite that UPDATE takes the write lock, so the active
+    enrollment check that follows cannot race a concurrent request from the
+    same student, and a group can never go over `group_size`. A lost claim
+    simply falls through to the next group.
+    """
+    if has_active_enrollment(student_id, course, filia):
+        return SeatReservationOutcome.ALREADY_ENROLLED, None
+
+    candidate_ids = list(
+        Group.objects.filter(course=course, filia=filia, enrolled_count__lt=F("group_size"))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+    for group_id in candidate_ids:
+        with transaction.atomic():
+            if not claim_seat(group_id):
+                continue
+
+            if has_active_enrollment(student_id, course, filia):
+                transaction.set_rollback(True)
+                return SeatReservationOutcome.ALREADY_ENROLLED, None
+
+            group = Group.objects.select_related("course").get(pk=group_id)
+            try:
+                with transaction.atomic():
+                    # bulk_create skips StudentGroupMembership.save(), which would
+                    # count the seat a second time.
+                    StudentGroupMembership.objects.bulk_create(
+                        [
+                            StudentGroupMembership(
+                                student_id=student_id, group=group, status=PaymentStatus.UNPAID.name
+                            )
+                        ]
+                    )
+            except IntegrityError:
+                transaction.set_rollback(True)
+                return SeatReservationOutcome.ALREADY_ENROLLED, None
+
+            NotificationOutbox.enqueue(
+                user_ids=[student_id],
+                course=group.course,
+                operation_type=NotificationType.ADDED.name,
+                group=group,
+            )
+            return SeatReservationOutcome.RESERVED, group
+
+    return SeatReservationOutcome.NO_SEATS, None
+
+
+@exception_handler
+@retry_on_database_lock()
+def reserve_group_seats(group: Group, student_ids: Iterable[int]) -> Optional[Dict[int, EnrollmentOutcome]]:
+    """
+    Enroll the students in `group` if it has a free seat for every one of
+    them who is not a member yet; None, enrolling nobody, if it does not.
+    Like `Group.add_students`, returns False if the enrollment failed.
+
+    The seats are taken with the same guarded UPDATE as `claim_seat`, so the
+    group cannot go over `group_size` however many enrollments run at once.
+    """
+    student_ids = [int(student_id) for student_id in student_ids]
+    with transaction.atomic():
+        new_count = Student.objects.filter(pk__in=student_ids).exclude(student_groups=group).count()
+        if new_count and not claim_seats(group.pk, new_count):
+            return None
+        return group.enroll_students(student_ids, seats_claimed=True)
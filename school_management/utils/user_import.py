@@ -0,0 +1,283 @@
+"""
+Bulk import of students and teachers from CSV.
+
+Columns: `role` (student or teacher), `email`, `first_name`, `last_name`,
+`phone_number` and, optionally, `password` (an empty one leaves the account
+without a usable password) and `group` (a group id: students are enrolled,
+teachers assigned).
+"""
+import copy
+import csv
+import io
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Callable, Dict, List, NamedTuple, Optional, TextIO, Tuple, Type
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from school_management.models import CustomUser, Group, Student, Teacher, UserImport
+from school_management.utils.bulk_users import bulk_create_users
+from school_management.utils.decorators.db_retry import retry_on_database_lock
+from school_management.utils.enums import ImportStatus
+from school_management.utils.password_hashing import hash_passwords, password_hasher
+from school_management.utils.validators import phone_number_validator
+
+REQUIRED_COLUMNS = ["role", "email", "first_name", "last_name", "phone_number"]
+ROLES: Dict[str, Type[CustomUser]] = {"student": Student, "teacher": Teacher}
+
+
+class RowError(NamedTuple):
+    row: int
+    message: str
+
+
+class _ImportRow(NamedTuple):
+    row: int
+    user: CustomUser
+    password: Optional[str]
+    group_id: Optional[int]
+
+
+class ImportReport:
+    def __init__(self) -> None:
+        self.created = {role: 0 for role in ROLES}
+        self.enrolled = 0
+        self.assigned = 0
+        self.errors: List[RowError] = []
+        # Row number of the last row handled; the header is row 1.
+        self.last_row = 1
+
+    @property
+    def total_created(self) -> int:
+        return sum(self.created.values())
+
+    def reject(self, row: int, message: str) -> None:
+        self.errors.append(RowError(row, message))
+
+
+def _parse_row(row_number: int, row: Dict[str, str]) -> _ImportRow:
+    values = {key: (value or "").strip() for key, value in row.items() if key}
+    errors = []
+
+    model = ROLES.get(values.get("role", "").lower())
+    if model is None:
+        errors.append(f"Unknown role {values.get('role', '')!r}; expected one of: {', '.join(ROLES)}.")
+
+    email = CustomUser.objects.normalize_email(values.get("email", ""))
+    for name, value, validators in [
+        ("email", email, [validate_email]),
+        ("first_name", values.get("first_name", ""), CustomUser._meta.get_field("first_name").validators),
+        ("last_name", values.get("last_name", ""), CustomUser._meta.get_field("last_name").validators),
+        ("phone_number", values.get("phone_number", ""), [phone_number_validator]),
+    ]:
+        if not value:
+            errors.append(f"{name} is required.")
+            continue
+        for validator in validators:
+            try:
+                validator(value)
+            except ValidationError as e:
+                errors.extend(f"{name}: {message}" for message in e.messages)
+
+    group_id = None
+    if values.get("group"):
+        try:
+            group_id = int(values["group"])
+        except ValueError:
+            errors.append(f"group must be a group id, not {values['group']!r}.")
+
+    if errors:
+        raise ValidationError(errors)
+
+    user = model(
+        email=email,
+        first_name=values["first_name"],
+        last_name=values["last_name"],
+        phone_number=values["phone_number"],
+    )
+    return _ImportRow(row_number, user, values.get("password") or None, group_id)
+
+
+def _add_to_groups(rows: List[_ImportRow]) -> Tuple[int, int, List[RowError]]:
+    """
+    Enroll the students in as many seats as their groups have left and
+    assign the teachers. Returns the enrolled and assigned counts, plus an
+    error for every student a full group turned away.
+    """
+    enrolled, assigned, errors = 0, 0, []
+    for group_id in sorted({row.group_id for row in rows} - {None}):
+        # Re-read under the write lock: seats may have gone since validation.
+        group = Group.objects.select_for_update().select_related("course").get(pk=group_id)
+        members = [row for row in rows if row.group_id == group_id]
+
+        students = [row for row in members if isinstance(row.user, Student)]
+        admitted, turned_away = students[:group.free_seats], students[group.free_seats:]
+        if admitted:
+            group.enroll_students([row.user.pk for row in admitted])
+            enrolled += len(admitted)
+        errors += [
+            RowError(row.row, f"Group {group_id} is full; the student was imported without it.")
+            for row in turned_away
+        ]
+
+        teacher_ids = [row.user.pk for row in members if isinstance(row.user, Teacher)]
+        if teacher_ids:
+            group.teachers.add(*teacher_ids)
+            assigned += len(teacher_ids)
+    return enrolled, assigned, errors
+
+
+Checkpoint = Callable[[ImportReport], None]
+
+
+@retry_on_database_lock()
+@transaction.atomic
+def _save_batch(rows: List[_ImportRow], progress: ImportReport, checkpoint: Optional[Checkpoint]) -> ImportReport:
+    """
+    Insert the users and their group memberships and checkpoint the report
+    that includes them, all in one transaction; rerun whole if the write
+    lock is lost, so `progress` itself is left untouched.
+    """
+    saved = copy.deepcopy(progress)
+    for role, model in ROLES.items():
+        users = [row.user for row in rows if isinstance(row.user, model)]
+        if users:
+            bulk_create_users(model, users, batch_size=len(users))
+            saved.created[role] += len(users)
+
+    enrolled, assigned, errors = _add_to_groups(rows)
+    saved.enrolled += enrolled
+    saved.assigned += assigned
+    saved.errors += errors
+    if checkpoint:
+        checkpoint(saved)
+    return saved
+
+
+def _import_batch(
+    batch: List[Tuple[int, Dict[str, str]]],
+    pool: Optional[Executor],
+    report: ImportReport,
+    checkpoint: Optional[Checkpoint],
+) -> ImportReport:
+    """Import one batch of rows and return `report` updated with it."""
+    report = copy.deepcopy(report)
+    report.last_row = batch[-1][0]
+    rows = []
+    for row_number, row in batch:
+        try:
+            rows.append(_parse_row(row_number, row))
+        except ValidationError as e:
+            report.reject(row_number, " ".join(e.messages))
+
+    emails = [row.user.email for row in rows]
+    taken = set(CustomUser.objects.filter(email__in=emails).values_list("email", flat=True))
+    groups = Group.objects.in_bulk({row.group_id for row in rows} - {None})
+
+    accepted = []
+    for row in rows:
+        if row.user.email in taken:
+            report.reject(row.row, f"A user with the email {row.user.email} already exists.")
+        elif row.group_id is not None and row.group_id not in groups:
+            report.reject(row.row, f"Group {row.group_id} does not exist.")
+        else:
+            taken.add(row.user.email)
+            accepted.append(row)
+
+    # Hash before opening the transaction: it is the slow part.
+    for row, password in zip(accepted, hash_passwords([row.password for row in accepted], pool)):
+        row.user.password = password
+
+    try:
+        return _save_batch(accepted, report, checkpoint)
+    except IntegrityError as e:
+        # A user created meanwhile under one of the emails; nothing was kept.
+        for row in accepted:
+            report.reject(row.row, f"The batch could not be saved: {e}")
+        if checkpoint:
+            checkpoint(report)
+        return report
+
+
+def run_import(
+    csv_file: TextIO,
+    pool: Optional[Executor],
+    batch_size: int = 500,
+    report: Optional[ImportReport] = None,
+    checkpoint: Optional[Checkpoint] = None,
+) -> ImportReport:
+    """
+    Stream `csv_file` in batches of `batch_size` rows: validate them, hash
+    the passwords in `pool` (or in this process when it is None) and insert
+    each batch, with its group memberships, in one transaction. Invalid rows
+    are skipped and reported by their row number (the header is row 1).
+
+    Given the `report` of an interrupted run, rows up to its `last_row` are
+    skipped. `checkpoint` is called with the report so far in the
+    transaction of every batch.
+    """
+    report = report or ImportReport()
+    reader = csv.DictReader(csv_file)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        report.reject(1, f"Missing column(s): {', '.join(missing)}.")
+        return report
+
+    rows = islice(enumerate(reader, start=2), report.last_row - 1, None)
+    while batch := list(islice(rows, batch_size)):
+        report = _import_batch(batch, pool, report, checkpoint)
+    report.errors.sort()
+    return report
+
+
+def import_users(csv_file: TextIO, batch_size: int = 500, workers: Optional[int] = None) -> ImportReport:
+    """`run_import` with a pool of `workers` processes started for this file alone."""
+    with password_hasher(workers) as pool:
+        return run_import(csv_file, pool, batch_size)
+
+
+def _stored_report(user_import: UserImport) -> ImportReport:
+    report = ImportReport()
+    report.created = {"student": user_import.created_students, "teacher": user_import.created_teachers}
+    report.enrolled = user_import.enrolled
+    report.assigned = user_import.assigned
+    report.errors = [RowError(**error) for error in user_import.errors]
+    report.last_row = user_import.last_row
+    return report
+
+
+def _store_report(user_import: UserImport, report: ImportReport) -> None:
+    user_import.created_students = report.created["student"]
+    user_import.created_teachers = report.created["teacher"]
+    user_import.enrolled = report.enrolled
+    user_import.assigned = report.assigned
+    user_import.errors = [error._asdict() for error in report.errors]
+    user_import.last_row = report.last_row
+    user_import.save(
+        update_fields=["created_students", "created_teachers", "enrolled", "assigned", "errors", "last_row"]
+    )
+
+
+def process_user_import(user_import: UserImport, pool: Optional[Executor], batch_size: int = 500) -> None:
+    """
+    Import an uploaded file and store its report, saving it with every batch
+    so a rerun carries on where this one stopped. The file is deleted once
+    imported or found unreadable.
+    """
+    try:
+        with user_import.csv_file.open("rb") as raw_file:
+            report = run_import(
+                io.TextIOWrapper(raw_file, encoding="utf-8-sig", newline=""),
+                pool,
+                batch_size,
+                report=_stored_report(user_import),
+                checkpoint=lambda progress: _store_report(user_import, progress),
+            )
+    except (UnicodeDecodeError, csv.Error):
+        user_import.finish(ImportStatus.FAILED.name, "The file is not a UTF-8 encoded CSV file.")
+        return
+
+    _store_report(user_import, report)
+    user_import.finish(ImportStatus.PROCESSED.name)
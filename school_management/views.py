@@ -1,5 +1,5 @@
 from typing import Any, Dict
-from django.db.models import QuerySet
+from django.db.models import Count, Prefetch, Q, QuerySet
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import (
@@ -17,13 +17,13 @@ from django.contrib.auth import logout
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.forms import AuthenticationForm
 from django.urls import reverse_lazy, reverse
-from .models import Course, Filia, Group, Student, Teacher, Notification, StudentGroupMembership
+from .models import Course, Filia, Group, Student, Teacher, Notification, StudentGroupMembership, UserImport
 from school_management.utils.filters import CourseFilter, GroupFilter
 from .forms import (
     StudentRegistrationForm,
     CustomAuthenticationForm,
     CourseForm,
-    GroupForm, EnrollmentForm,
+    GroupForm, EnrollmentForm, UserImportForm,
 )
 from school_management.utils.role_access_checking import (
     user_is_student,
@@ -32,16 +32,29 @@ from school_management.utils.role_access_checking import (
     user_is_education_manager,
     get_user_role, user_is_student_or_teacher,
 )
+from .utils.caching import CATALOG_TAG, cache_page_by_tags, course_tag, filia_tag
+from .utils.conditional_get import (
+    conditional_page,
+    course_page_state,
+    filia_page_state,
+    group_page_state,
+)
 from .utils.decorators.authentication import login_required_401
-from .utils.decorators.group_membership import student_in_group
+from .utils.decorators.db_routing import read_from_replica
+from .utils.decorators.group_membership import student_in_group, teacher_in_group
 from .utils.decorators.permissions import user_passes_test_403
-from .utils.enums import GroupStatus
+from .utils.enums import GroupStatus, PaymentStatus, SeatReservationOutcome
 from .utils.filter_by_search_and_pagination import filter_by_search, filter_by_search_and_paginate
+from .utils.keyset_pagination import paginate_by_keyset
+from .utils.seat_reservation import reserve_course_seat, reserve_group_seats
 from .utils.sorting import apply_sorting
+from .utils.user_import import REQUIRED_COLUMNS
 
 
+@cache_page_by_tags(lambda request: [CATALOG_TAG])
+@read_from_replica
 def home(request: HttpRequest) -> HttpResponse:
-    courses = Course.objects.all().order_by("name")[:3]
+    courses = Course.objects.prefetch_related("experience").order_by("name")[:3]
 
     context = {"courses": courses}
 
@@ -103,21 +116,21 @@ class RoleBasedDashboardView(TemplateView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_student)], name="dispatch"
+    [login_required_401, user_passes_test_403(user_is_student), read_from_replica], name="dispatch"
 )
 class StudentDashboardView(TemplateView):
     template_name = "dashboard/student_dashboard.html"
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_teacher)], name="dispatch"
+    [login_required_401, user_passes_test_403(user_is_teacher), read_from_replica], name="dispatch"
 )
 class TeacherDashboardView(TemplateView):
     template_name = "dashboard/teacher_dashboard.html"
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_education_manager)],
+    [login_required_401, user_passes_test_403(user_is_education_manager), read_from_replica],
     name="dispatch",
 )
 class EducationManagerDashboardView(TemplateView):
@@ -125,14 +138,14 @@ class EducationManagerDashboardView(TemplateView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_program_manager)], name="dispatch"
+    [login_required_401, user_passes_test_403(user_is_program_manager), read_from_replica], name="dispatch"
 )
 class ProgramManagerDashboardView(TemplateView):
     template_name = "dashboard/program_manager_dashboard.html"
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_program_manager)], name="dispatch"
+    [login_required_401, user_passes_test_403(user_is_program_manager), read_from_replica], name="dispatch"
 )
 class ProgramManageCoursesView(FilterView):
     template_name = "managers/program_manage_courses.html"
@@ -197,7 +210,7 @@ class ProgramManageCourseDeleteView(DeleteView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_program_manager)], name="dispatch"
+    [login_required_401, user_passes_test_403(user_is_program_manager), read_from_replica], name="dispatch"
 )
 class ProgramManageGroupsView(FilterView):
     template_name = "managers/program_manage_groups.html"
@@ -259,7 +272,7 @@ class ManageGroupDeleteView(DeleteView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_education_manager)],
+    [login_required_401, user_passes_test_403(user_is_education_manager), read_from_replica],
     name="dispatch",
 )
 class EducationManageGroupsView(FilterView):
@@ -275,7 +288,7 @@ class EducationManageGroupsView(FilterView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_education_manager)],
+    [login_required_401, user_passes_test_403(user_is_education_manager), read_from_replica],
     name="dispatch",
 )
 class EducationManageGroupDetailsView(TemplateView):
@@ -285,14 +298,14 @@ class EducationManageGroupDetailsView(TemplateView):
         context = super().get_context_data(**kwargs)
         group = get_object_or_404(Group, pk=self.kwargs["pk"])
 
-        memberships = StudentGroupMembership.objects.filter(group=group)
+        memberships = StudentGroupMembership.objects.filter(group=group).select_related("student")
         teachers = group.teachers.all()
 
         context.update(
             {
                 "group": group,
                 "memberships": memberships,
-                "students_count": memberships.count(),
+                "students_count": group.enrolled_count,
                 "teachers": teachers,
             }
         )
@@ -422,35 +435,35 @@ class EducationManageGroupAddStudentsView(TemplateView):
         return context
 
     def post(self, request, *args, **kwargs) -> HttpResponse:
-        group = get_object_or_404(Group.objects.select_for_update(), pk=self.kwargs["pk"])
+        group = get_object_or_404(Group.objects.select_related("course"), pk=self.kwargs["pk"])
         student_ids = request.POST.getlist("student_ids")
 
         if not student_ids:
             messages.error(request, "No students were selected.")
             return redirect("education_add_students_to_group", pk=group.pk)
 
-        available_group_slots = group.group_size - group.students.count()
-        if available_group_slots <= 0:
+        outcomes = reserve_group_seats(group, student_ids)
+        if outcomes is False:
             messages.error(
-                self.request,
-                "Cannot add any more students to this group. The group is already full.",
+                request, "An error occurred while adding students. Please try again."
             )
             return redirect("education_manage_group_details", pk=group.pk)
 
-        elif available_group_slots < len(student_ids):
+        if outcomes is None:
+            group.refresh_from_db(fields=["enrolled_count"])
+            if group.free_seats <= 0:
+                messages.error(
+                    self.request,
+                    "Cannot add any more students to this group. The group is already full.",
+                )
+                return redirect("education_manage_group_details", pk=group.pk)
             messages.error(
                 request,
-                f"You can only add {available_group_slots} student(s) to this group.",
+                f"You can only add {group.free_seats} student(s) to this group.",
             )
             return redirect("education_add_students_to_group", pk=group.pk)
 
-        if group.add_students(student_ids):
-            messages.success(request, "Selected students were added successfully.")
-        else:
-            messages.error(
-                request, "An error occurred while adding students. Please try again."
-            )
-
+        messages.success(request, "Selected students were added successfully.")
         return redirect("education_manage_group_details", pk=group.pk)
 
 
@@ -551,7 +564,7 @@ class EducationManageGroupRemoveStudentsView(TemplateView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_education_manager)],
+    [login_required_401, user_passes_test_403(user_is_education_manager), read_from_replica],
     name="dispatch",
 )
 class EducationManageAllStudentsView(TemplateView):
@@ -562,13 +575,28 @@ class EducationManageAllStudentsView(TemplateView):
         students_count = Student.objects.count()
 
         search_query = self.request.GET.get("q", "")
-        page_number = self.request.GET.get("page")
+        cursor = self.request.GET.get("cursor")
 
         page_obj = filter_by_search_and_paginate(
             search_query=search_query,
-            page_number=page_number,
+            page_number=None,
             model=Student,
             search_fields=["first_name", "last_name", "email"],
+            keyset=True,
+            cursor=cursor,
+            annotations={
+                "groups_count": Count("studentgroupmembership", distinct=True),
+                "active_groups_count": Count(
+                    "studentgroupmembership",
+                    filter=Q(studentgroupmembership__group__status__in=GroupStatus.active()),
+                    distinct=True,
+                ),
+                "unpaid_count": Count(
+                    "studentgroupmembership",
+                    filter=Q(studentgroupmembership__status=PaymentStatus.UNPAID.name),
+                    distinct=True,
+                ),
+            },
         )
 
         context.update(
@@ -582,7 +610,7 @@ class EducationManageAllStudentsView(TemplateView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_education_manager)],
+    [login_required_401, user_passes_test_403(user_is_education_manager), read_from_replica],
     name="dispatch",
 )
 class EducationStudentDetailView(DetailView):
@@ -593,7 +621,9 @@ class EducationStudentDetailView(DetailView):
     def get_context_data(self, **kwargs) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
         student = self.get_object()
-        memberships = StudentGroupMembership.objects.filter(student=student)
+        memberships = StudentGroupMembership.objects.filter(student=student).select_related(
+            "group__course", "group__filia"
+        )
 
         context.update(
             {
@@ -620,7 +650,7 @@ class EducationStudentDetailView(DetailView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_education_manager)],
+    [login_required_401, user_passes_test_403(user_is_education_manager), read_from_replica],
     name="dispatch",
 )
 class EducationManageAllTeachersView(TemplateView):
@@ -631,13 +661,23 @@ class EducationManageAllTeachersView(TemplateView):
         teachers_count = Teacher.objects.count()
 
         search_query = self.request.GET.get("q", "")
-        page_number = self.request.GET.get("page")
+        cursor = self.request.GET.get("cursor")
 
         page_obj = filter_by_search_and_paginate(
             search_query=search_query,
-            page_number=page_number,
+            page_number=None,
             model=Teacher,
             search_fields=["first_name", "last_name", "email"],
+            keyset=True,
+            cursor=cursor,
+            annotations={
+                "groups_count": Count("teacher_groups", distinct=True),
+                "active_groups_count": Count(
+                    "teacher_groups",
+                    filter=Q(teacher_groups__status__in=GroupStatus.active()),
+                    distinct=True,
+                ),
+            },
         )
 
         context.update(
@@ -652,7 +692,7 @@ class EducationManageAllTeachersView(TemplateView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_education_manager)],
+    [login_required_401, user_passes_test_403(user_is_education_manager), read_from_replica],
     name="dispatch",
 )
 class EducationTeacherDetailView(DetailView):
@@ -668,18 +708,64 @@ class EducationTeacherDetailView(DetailView):
         return context
 
 
+@method_decorator(
+    [login_required_401, user_passes_test_403(user_is_education_manager)],
+    name="dispatch",
+)
+class EducationImportUsersView(TemplateView):
+    template_name = "managers/education_import_users.html"
+
+    def get_context_data(self, **kwargs) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context.setdefault("form", UserImportForm())
+        context["required_columns"] = REQUIRED_COLUMNS
+        context["recent_imports"] = UserImport.objects.select_related("uploaded_by")[:10]
+        return context
+
+    def post(self, request, *args, **kwargs) -> HttpResponse:
+        form = UserImportForm(request.POST, request.FILES)
+        if not form.is_valid():
+            return self.render_to_response(self.get_context_data(form=form))
+
+        # Hashing thousands of passwords takes minutes; process_user_imports
+        # does it off the request, with one bounded pool per worker.
+        user_import = UserImport.objects.create(
+            csv_file=form.cleaned_data["csv_file"], uploaded_by_id=request.user.pk
+        )
+        messages.info(request, "The file was queued for import.")
+        return redirect("education_user_import", pk=user_import.pk)
+
+
+@method_decorator(
+    [login_required_401, user_passes_test_403(user_is_education_manager)],
+    name="dispatch",
+)
+class EducationUserImportView(DetailView):
+    template_name = "managers/education_user_import.html"
+    context_object_name = "user_import"
+    queryset = UserImport.objects.select_related("uploaded_by")
+
+
+@method_decorator([cache_page_by_tags(lambda request: [CATALOG_TAG]), read_from_replica], name="dispatch")
 class FiliaListView(ListView):
     template_name = "unauthorized/filias.html"
     context_object_name = "filias"
     queryset = Filia.objects.all().order_by("name")
 
 
+@method_decorator(
+    [conditional_page(filia_page_state), cache_page_by_tags(lambda request, pk: [filia_tag(pk)]), read_from_replica],
+    name="dispatch",
+)
 class FiliaDetailView(DetailView):
     template_name = "unauthorized/filia_details.html"
     context_object_name = "filia"
-    queryset = Filia.objects.prefetch_related("groups__filia")
+    queryset = Filia.objects.prefetch_related(
+        Prefetch("groups", queryset=Group.objects.select_related("course", "filia"))
+    )
 
 
+@method_decorator([cache_page_by_tags(lambda request: [CATALOG_TAG]), read_from_replica], name="dispatch")
 class CourseListView(FilterView):
     template_name = "unauthorized/courses.html"
     context_object_name = "courses"
@@ -694,6 +780,10 @@ class CourseListView(FilterView):
         return apply_sorting(queryset, sort_option)
 
 
+@method_decorator(
+    [conditional_page(course_page_state), cache_page_by_tags(lambda request, pk: [course_tag(pk)]), read_from_replica],
+    name="dispatch",
+)
 class CourseDetailView(DetailView):
     template_name = "unauthorized/course_details.html"
     context_object_name = "course"
@@ -713,26 +803,15 @@ class CourseDetailView(DetailView):
         if form.is_valid():
             filia = form.cleaned_data["filia"]
 
-            has_active_enrollment = StudentGroupMembership.objects.filter(
-                student=student,
-                group__course=course,
-                group__filia=filia,
-                group__status__in=["education_started", "enrollment_started"]
-            ).exists()
+            outcome, group = reserve_course_seat(student.id, course, filia)
 
-            if has_active_enrollment:
+            if outcome == SeatReservationOutcome.RESERVED:
+                messages.success(request, f"You have been added to the group: {group.name}.")
+                return redirect("student_group_details", pk=group.pk)
+            elif outcome == SeatReservationOutcome.ALREADY_ENROLLED:
                 messages.error(request, "You already have an active enrollment in this course and filia.")
             else:
-                matching_groups = Group.objects.filter(course=course, filia=filia)
-
-                for group in matching_groups:
-                    available_group_slots = group.group_size - group.students.count()
-                    if available_group_slots > 0:
-                        if group.add_students([student.id]):
-                            messages.success(request, f"You have been added to the group: {group.name}.")
-                            return redirect("student_group_details", pk=group.pk)
-                else:
-                    messages.error(request, "No available slots on groups. Try again later")
+                messages.error(request, "No available slots on groups. Try again later")
 
             return redirect("course_details", pk=course.pk)
         else:
@@ -745,7 +824,7 @@ def contact_success(request: HttpRequest) -> HttpResponse:
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_student)],
+    [login_required_401, user_passes_test_403(user_is_student), read_from_replica],
     name="dispatch",
 )
 class StudentGroupListView(TemplateView):
@@ -757,19 +836,19 @@ class StudentGroupListView(TemplateView):
 
         context["enrollment_groups"] = student.student_groups.filter(
             status="enrollment_started"
-        )
+        ).select_related("course", "filia")
         context["education_groups"] = student.student_groups.filter(
             status="education_started"
-        )
+        ).select_related("course", "filia")
         context["finished_groups"] = student.student_groups.filter(
             status="education_completed"
-        )
+        ).select_related("course", "filia")
 
         return context
 
 
 @method_decorator(
-    [login_required_401, student_in_group],
+    [login_required_401, student_in_group, conditional_page(group_page_state)],
     name="dispatch",
 )
 class StudentGroupDetailsView(TemplateView):
@@ -777,10 +856,8 @@ class StudentGroupDetailsView(TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        group = get_object_or_404(Group, pk=self.kwargs["pk"])
-
-        student = self.request.user
-        membership = StudentGroupMembership.objects.filter(student=student, group=group).first()
+        group = self.request.group
+        membership = self.request.group_membership
 
         students = group.students.all()
         teachers = group.teachers.all()
@@ -790,7 +867,7 @@ class StudentGroupDetailsView(TemplateView):
                 "group": group,
                 "membership": membership,
                 "students": students,
-                "students_count": students.count(),
+                "students_count": group.enrolled_count,
                 "teachers": teachers,
             }
         )
@@ -798,7 +875,7 @@ class StudentGroupDetailsView(TemplateView):
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_teacher)],
+    [login_required_401, user_passes_test_403(user_is_teacher), read_from_replica],
     name="dispatch",
 )
 class TeacherGroupListView(TemplateView):
@@ -810,19 +887,19 @@ class TeacherGroupListView(TemplateView):
 
         context["enrollment_groups"] = teacher.teacher_groups.filter(
             status="enrollment_started"
-        )
+        ).select_related("course", "filia")
         context["education_groups"] = teacher.teacher_groups.filter(
             status="education_started"
-        )
+        ).select_related("course", "filia")
         context["finished_groups"] = teacher.teacher_groups.filter(
             status="education_completed"
-        )
+        ).select_related("course", "filia")
 
         return context
 
 
 @method_decorator(
-    [login_required_401, user_passes_test_403(user_is_teacher)],
+    [login_required_401, teacher_in_group, conditional_page(group_page_state)],
     name="dispatch",
 )
 class TeacherGroupDetailsView(TemplateView):
@@ -830,7 +907,7 @@ class TeacherGroupDetailsView(TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        group = get_object_or_404(Group, pk=self.kwargs["pk"])
+        group = self.request.group
 
         students = group.students.all()
         teachers = group.teachers.all()
@@ -839,7 +916,7 @@ class TeacherGroupDetailsView(TemplateView):
             {
                 "group": group,
                 "students": students,
-                "students_count": students.count(),
+                "students_count": group.enrolled_count,
                 "teachers": teachers,
             }
         )
@@ -849,5 +926,17 @@ class TeacherGroupDetailsView(TemplateView):
 @login_required_401
 @user_passes_test_403(user_is_student_or_teacher)
 def notifications_view(request):
-    notifications = Notification.objects.filter(user=request.user).order_by('-datetime')
-    return render(request, 'students/notifications.html', {'notifications': notifications})
+    if request.method == "POST":
+        if "mark_all_read" in request.POST:
+            Notification.mark_all_read(request.user)
+        elif "mark_read" in request.POST:
+            Notification.mark_read(request.user, request.POST.get("notification_id"))
+        return redirect("notifications")
+
+    page_obj = paginate_by_keyset(
+        queryset=Notification.objects.filter(user=request.user),
+        ordering=["-datetime", "-id"],
+        cursor=request.GET.get("cursor"),
+        per_page=20,
+    )
+    return render(request, 'students/notifications.html', {'page_obj': page_obj})
@@ -0,0 +1,54 @@
+document.addEventListener("DOMContentLoaded", function () {
+    const streamUrl = document.body.dataset.notificationStream;
+    if (!streamUrl || !window.EventSource) return;
+
+    const link = document.querySelector("#notifications-link");
+    // Only the first page of the notifications list shows the newest ones.
+    const list = document.querySelector("#notification-list[data-live]");
+
+    function updateBadge(unread) {
+        if (!link) return;
+        let badge = link.querySelector(".badge");
+        if (!unread) {
+            if (badge) badge.remove();
+            return;
+        }
+        if (!badge) {
+            badge = document.createElement("span");
+            badge.className = "badge bg-primary";
+            link.append(" ", badge);
+        }
+        badge.textContent = unread;
+    }
+
+    function prependNotification(notification) {
+        if (!list) return;
+        const empty = list.querySelector(".no-notifications");
+        if (empty) empty.remove();
+
+        const item = document.createElement("div");
+        item.className = "notification";
+        const header = document.createElement("p");
+        const datetime = document.createElement("strong");
+        datetime.textContent = new Date(notification.datetime).toLocaleString();
+        const badge = document.createElement("span");
+        badge.className = "badge bg-primary";
+        badge.textContent = "New";
+        header.append(datetime, " ", badge);
+        const type = document.createElement("p");
+        type.innerHTML = "<em></em>";
+        type.firstChild.textContent = notification.type;
+        const message = document.createElement("p");
+        message.textContent = notification.message;
+        item.append(header, type, message);
+        list.prepend(item);
+    }
+
+    // EventSource reconnects by itself, resending the last id it received.
+    const source = new EventSource(streamUrl);
+    source.addEventListener("notification", function (event) {
+        const notification = JSON.parse(event.data);
+        updateBadge(notification.unread);
+        prependNotification(notification);
+    });
+});